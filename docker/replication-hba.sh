@@ -0,0 +1,3 @@
+#!/bin/bash
+# Permite conexiones de replicación (pg_basebackup / streaming) desde la red de Docker
+echo "host replication all all scram-sha-256" >> "$PGDATA/pg_hba.conf"
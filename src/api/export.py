@@ -0,0 +1,62 @@
+from datetime import date
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from src.api.queries import hired_by_quarter_query, above_mean_query, DEFAULT_YEAR
+from src.services import export_service
+from src.services.export_service import EXPORT_FORMATS, EXPORT_TABLES
+from src.utils.logger import get_logger
+
+router = APIRouter()
+logger = get_logger(__name__)
+
+
+def _streaming_response(fmt: str, name: str, sql: str, params: dict) -> StreamingResponse:
+    """Respuesta en streaming (CSV vía COPY TO STDOUT o NDJSON vía cursor del servidor)."""
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Formato inválido: '{fmt}'. Debe ser uno de: {EXPORT_FORMATS}")
+    body, media_type = export_service.stream(fmt, sql, params)
+    logger.info("📤 Exportando %s en %s", name, fmt)
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{name}.{fmt}"'},
+    )
+
+
+@router.get("/queries/hired-by-quarter/")
+async def export_hired_by_quarter(
+    format: str = "csv",
+    year: int = Query(DEFAULT_YEAR, ge=1900, le=9999),
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+):
+    """📤 Exporta el resultado de /api/queries/hired-by-quarter/ (mismos parámetros)."""
+    sql, params = export_service.compile_query(*hired_by_quarter_query(year, start, end))
+    return _streaming_response(format, "hired_by_quarter", sql, params)
+
+
+@router.get("/queries/above-mean/")
+async def export_above_mean(
+    format: str = "csv",
+    year: int = Query(DEFAULT_YEAR, ge=1900, le=9999),
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+):
+    """📤 Exporta el resultado de /api/queries/above-mean/ (mismos parámetros)."""
+    sql, params = export_service.compile_query(*above_mean_query(year, start, end))
+    return _streaming_response(format, "above_mean", sql, params)
+
+
+@router.get("/{table}/")
+async def export_table(table: str, format: str = "csv"):
+    """
+    📤 Exporta una tabla completa (departments, jobs o hired_employees) ordenada por id.
+    - format=csv: COPY ... TO STDOUT con encabezado.
+    - format=ndjson: una fila JSON por línea leída con un cursor del servidor.
+    La memoria se mantiene constante sin importar el tamaño de la tabla.
+    """
+    if table not in EXPORT_TABLES:
+        raise HTTPException(status_code=400, detail=f"Tabla inválida: '{table}'. Debe ser una de: {list(EXPORT_TABLES)}")
+    sql, params = export_service.table_sql(table)
+    return _streaming_response(format, table, sql, params)
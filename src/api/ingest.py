@@ -1,91 +1,286 @@
-from fastapi import APIRouter, UploadFile, Form, HTTPException, Depends
+from typing import Optional
+from fastapi import APIRouter, UploadFile, Form, HTTPException, Depends, Header, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
-from src.services.batch_insert_service import insert_batch
+from src.services.batch_insert_service import insert_batch, insert_stream
+from src.services.bulk_load_service import CONFLICT_POLICIES, DuplicateKeyError
+from src.services.input_formats import FORMATS, detect_format
+from src.services.ingest_executor import (
+    run_ingest, reserve, submit_reserved, cancel_reservation, IngestPoolSaturated, INGEST_RETRY_AFTER
+)
+from src.services import job_service
+from src.services.reject_store import REASONS, MAX_PAGE_SIZE, list_rejects
 from src.config.database import get_db
 from src.utils.logger import get_logger
-import tempfile
+from src.utils.timing import profiled, profiler_for
 import os
+import shutil
+import tempfile
 
 router = APIRouter()
 logger = get_logger(__name__)
 
+VALID_TYPES = ["departments", "jobs", "hired_employees"]
+UPLOAD_MODES = ["sync", "async"]
+
+# Tamaño de bloque al copiar uploads a disco (modo async)
+SPOOL_CHUNK_BYTES = 1024 * 1024
+
+# Tamaño máximo de archivo para el endpoint por lotes (el de streaming no tiene límite)
+MAX_UPLOAD_BYTES = int(os.getenv("INGEST_MAX_UPLOAD_MB", "50")) * 1024 * 1024
+
+
+def _validate_upload(file: UploadFile, type: str, on_conflict: str = "skip") -> tuple:
+    """
+    Valida extensión del archivo, tipo de tabla y política de conflictos.
+    Devuelve (nombre normalizado, formato: csv | parquet | arrow | ndjson).
+    """
+    # 1️⃣ Validar tipo de archivo
+    filename = file.filename.lower()
+    fmt = detect_format(filename)
+    if fmt is None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Solo se permiten archivos CSV (.csv), Parquet, Arrow IPC o NDJSON ({', '.join(FORMATS)}).",
+        )
+
+    # 2️⃣ Validar tipo de tabla
+    if type not in VALID_TYPES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Tipo inválido: '{type}'. Debe ser uno de: {VALID_TYPES}"
+        )
+
+    # 3️⃣ Validar política ante ids existentes
+    if on_conflict not in CONFLICT_POLICIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"on_conflict inválido: '{on_conflict}'. Debe ser uno de: {list(CONFLICT_POLICIES)}"
+        )
+    return filename, fmt
+
+
+def _build_response(type: str, result: dict) -> dict:
+    """Construye la respuesta retrocompatible del endpoint de carga."""
+    response = {
+        "table": type,
+        "inserted": result.get("inserted", 0),
+        "invalid_rows": result.get("invalid_rows", 0),
+        "duplicates": result.get("duplicates", 0),
+        "message": result.get("message", "Procesamiento completado correctamente"),
+    }
+
+    # Id de la carga para consultar sus filas rechazadas (GET /rejects/{upload_id})
+    summary = result.get("summary") or {}
+    if summary.get("upload_id"):
+        response["upload_id"] = summary["upload_id"]
+
+    # Agregar resumen solo si existe
+    if summary and (
+        summary.get("rejected_fk") or summary.get("invalid_rows")
+        or summary.get("duplicates") or summary.get("updated") or summary.get("timings")
+    ):
+        response["summary"] = summary
+
+    return response
+
+
+def _translate_errors(e: Exception) -> HTTPException:
+    """Mapea excepciones de la ingesta a respuestas HTTP."""
+    # ⚙️ Errores controlados explícitos
+    if isinstance(e, HTTPException):
+        return e
+
+    # ⛔ Pool de ingesta saturado: respuesta rápida para que el cliente reintente
+    if isinstance(e, IngestPoolSaturated):
+        return HTTPException(
+            status_code=503, detail=str(e), headers={"Retry-After": str(INGEST_RETRY_AFTER)}
+        )
+
+    # 🔁 Ids existentes con on_conflict=error
+    if isinstance(e, DuplicateKeyError):
+        logger.warning("🔁 Conflicto de ids: %s", e)
+        return HTTPException(status_code=409, detail=str(e))
+
+    # ⚠️ Errores de validación de datos
+    if isinstance(e, ValueError):
+        logger.error("⚠️ Error de validación: %s", e)
+        return HTTPException(status_code=400, detail=str(e))
+
+    # ❌ Errores SQL o de integridad
+    if isinstance(e, SQLAlchemyError):
+        logger.error("❌ Error SQLAlchemy: %s", e, exc_info=True)
+        return HTTPException(status_code=500, detail="Error de base de datos")
+
+    # 🧯 Errores inesperados
+    logger.error("❌ Error inesperado: %s", e, exc_info=True)
+    return HTTPException(status_code=500, detail=str(e))
+
+
+def _spool_to_disk(file: UploadFile, suffix: str) -> str:
+    """Copia el upload a un archivo temporal en bloques de tamaño fijo (sin cargarlo entero en memoria)."""
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
+        try:
+            shutil.copyfileobj(file.file, tmp, SPOOL_CHUNK_BYTES)
+        except Exception:
+            os.remove(tmp.name)
+            raise
+        return tmp.name
+
+
+async def _enqueue_job(
+    file: UploadFile, type: str, filename: str, on_conflict: str, profile: str = None, fmt: str = "csv"
+) -> JSONResponse:
+    """
+    Reserva un cupo del pool, guarda el upload en disco, registra el trabajo y lo encola.
+    El cupo se toma antes de copiar el archivo para que el 503 por saturación sea inmediato.
+    """
+    reserve()
+    try:
+        tmp_path = await run_in_threadpool(_spool_to_disk, file, os.path.splitext(filename)[1])
+    except Exception:
+        cancel_reservation()
+        raise
+
+    # El registro del trabajo hace I/O de base de datos: fuera del event loop
+    try:
+        job = await run_in_threadpool(job_service.create_job, type, filename)
+    except Exception:
+        cancel_reservation()
+        os.remove(tmp_path)
+        raise
+
+    try:
+        # submit_reserved devuelve el cupo por su cuenta si no logra encolar
+        submit_reserved(job_service.run_job, job["job_id"], tmp_path, type, on_conflict, profile, fmt)
+    except Exception:
+        await run_in_threadpool(job_service.discard_job, job["job_id"])
+        os.remove(tmp_path)
+        raise
+
+    logger.info("🧾 Job %s encolado: %s → %s", job["job_id"], filename, tmp_path)
+    return JSONResponse(
+        status_code=202,
+        content={
+            "job_id": job["job_id"],
+            "table": type,
+            "status": job["status"],
+            "status_url": f"/api/ingest/jobs/{job['job_id']}",
+        },
+    )
+
 
 @router.post("/upload/")
 async def upload_csv(
     type: str = Form(...),
     file: UploadFile = Form(...),
+    mode: str = Form("sync"),
+    on_conflict: str = Form("skip"),
+    x_ingest_profile: Optional[str] = Header(None),
     db: Session = Depends(get_db)
 ):
     """
-    📤 Endpoint para cargar archivos CSV.
-    - Valida tipo de archivo y estructura.
-    - Inserta por lotes (máx. 1000 filas por batch).
+    📤 Endpoint para cargar archivos CSV, Parquet, Arrow IPC (.arrow / .feather) o NDJSON.
+    - Valida tipo de archivo y estructura (mismas columnas en todos los formatos).
+    - Inserta por lotes (máx. MAX_BATCH_SIZE filas por request).
     - Maneja errores, duplicados y registros inválidos.
     - Muestra resumen si hay registros rechazados por FK.
+    - mode=async: responde 202 con un job_id y procesa el archivo en streaming en segundo plano.
+    - on_conflict: skip (por defecto) | update | error (409 si hay ids existentes).
+    - summary.timings: tiempo, filas, filas/s y delta de memoria pico por etapa.
+    - Header X-Ingest-Profile: 1 | cprofile | pyinstrument perfila la carga (summary.profile).
     """
     try:
-        # 1️⃣ Validar tipo de archivo
-        filename = file.filename.lower()
-        if not filename.endswith(".csv"):
-            raise HTTPException(status_code=400, detail="Solo se permiten archivos CSV (.csv).")
-
-        # 2️⃣ Validar tipo de tabla
-        valid_types = ["departments", "jobs", "hired_employees"]
-        if type not in valid_types:
+        filename, fmt = _validate_upload(file, type, on_conflict)
+        profile = profiler_for(x_ingest_profile)
+        if mode not in UPLOAD_MODES:
+            raise HTTPException(status_code=400, detail=f"Modo inválido: '{mode}'. Debe ser uno de: {UPLOAD_MODES}")
+        if mode == "async":
+            return await _enqueue_job(file, type, filename, on_conflict, profile, fmt)
+
+        if file.size is not None and file.size > MAX_UPLOAD_BYTES:
             raise HTTPException(
-                status_code=400,
-                detail=f"Tipo inválido: '{type}'. Debe ser uno de: {valid_types}"
+                status_code=413,
+                detail=f"El archivo supera el tamaño máximo de {MAX_UPLOAD_BYTES // (1024 * 1024)} MB por request."
             )
 
-        # 3️⃣ Guardar archivo temporalmente
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".csv") as tmp:
-            content = await file.read()
-            tmp.write(content)
-            tmp_path = tmp.name
+        # 3️⃣ Pasar el stream ya spooleado por Starlette directo al parser (sin copiarlo en memoria)
+        logger.info("📦 Archivo recibido: %s (%s bytes)", filename, file.size)
 
-        logger.info(f"📦 Archivo recibido: {filename} → {tmp_path}")
+        # 4️⃣ Procesar el archivo e insertar los datos en el pool de ingesta (fuera del event loop)
+        result = await run_ingest(profiled(profile, type, insert_batch), db, file.file, type, on_conflict, fmt=fmt)
 
-        # 4️⃣ Procesar el CSV e insertar los datos
-        result = insert_batch(db, tmp_path, type)
+        # 5️⃣ Construir respuesta retrocompatible
+        return _build_response(type, result)
 
-        # 5️⃣ Eliminar archivo temporal (si es posible)
-        try:
-            os.remove(tmp_path)
-        except Exception as e:
-            logger.warning(f"No se pudo eliminar el archivo temporal: {tmp_path} ({e})")
+    except Exception as e:
+        raise _translate_errors(e)
 
-        # 6️⃣ Construir respuesta retrocompatible
-        response = {
-            "table": type,
-            "inserted": result.get("inserted", 0),
-            "invalid_rows": result.get("invalid_rows", 0),
-            "duplicates": result.get("duplicates", 0),
-            "message": result.get("message", "Procesamiento completado correctamente"),
-        }
 
-        # 7️⃣ Agregar resumen solo si existe
-        summary = result.get("summary")
-        if summary and (summary.get("rejected_fk") or summary.get("invalid_rows") or summary.get("duplicates")):
-            response["summary"] = summary
+@router.post("/upload/stream/")
+async def upload_csv_stream(
+    type: str = Form(...),
+    file: UploadFile = Form(...),
+    on_conflict: str = Form("skip"),
+    x_ingest_profile: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    """
+    🌊 Endpoint de carga en streaming para archivos grandes.
+    - Lee el archivo (CSV, Parquet, Arrow IPC o NDJSON) por chunks (INGEST_STREAM_CHUNK_SIZE filas)
+      sin límite total de filas.
+    - Valida, deduplica y carga cada chunk con memoria acotada.
+    - Devuelve un único resumen combinado.
+    - on_conflict: skip (por defecto) | update | error.
+    - Header X-Ingest-Profile: igual que en /upload/.
+    """
+    try:
+        filename, fmt = _validate_upload(file, type, on_conflict)
+        logger.info("🌊 Archivo recibido en streaming: %s", filename)
+
+        profile = profiler_for(x_ingest_profile)
+        result = await run_ingest(
+            profiled(profile, type, insert_stream), db, file.file, type, on_conflict=on_conflict, fmt=fmt
+        )
 
+        response = _build_response(type, result)
+        response["chunks"] = result["summary"]["chunks"]
         return response
 
-    # ⚙️ Errores controlados explícitos
-    except HTTPException as e:
-        raise e
+    except Exception as e:
+        raise _translate_errors(e)
 
-    # ⚠️ Errores de validación de datos
-    except ValueError as e:
-        logger.error(f"⚠️ Error de validación: {e}")
-        raise HTTPException(status_code=400, detail=str(e))
 
-    # ❌ Errores SQL o de integridad
-    except SQLAlchemyError as e:
-        logger.error(f"❌ Error SQLAlchemy: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail="Error de base de datos")
+@router.get("/jobs/{job_id}")
+def get_ingest_job(job_id: str):
+    """
+    🧾 Estado de un trabajo de ingesta asíncrona.
+    - status: queued | running | completed | failed
+    - progress: filas leídas, insertadas, duplicadas, inválidas y rechazadas por FK
+    - result: resumen final de la ingesta (cuando termina)
+    """
+    job = job_service.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job no encontrado: {job_id}")
+    return job
 
-    # 🧯 Errores inesperados
-    except Exception as e:
-        logger.error(f"❌ Error inesperado: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/rejects/{upload_id}")
+def get_ingest_rejects(
+    upload_id: str,
+    reason: Optional[str] = None,
+    after: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+):
+    """
+    🗃️ Filas rechazadas de una carga (upload_id de la respuesta o job_id de una carga asíncrona).
+    - reason: invalid | duplicate_in_file | duplicate | foreign_key (opcional)
+    - Paginación por cursor: pasar `next_after` como `after` para la página siguiente.
+    - pending_batches > 0: todavía hay rechazos de la carga en cola de escritura.
+    """
+    if reason is not None and reason not in REASONS:
+        raise HTTPException(status_code=400, detail=f"Motivo inválido: '{reason}'. Debe ser uno de: {list(REASONS)}")
+    return list_rejects(db, upload_id, reason, after, limit)
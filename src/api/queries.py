@@ -1,82 +1,200 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import date, datetime
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy import text
-from sqlalchemy.orm import Session
-from src.config.database import SessionLocal
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.config.replicas import get_read_db
+from src.services.query_cache import query_cache
+from src.services.metrics_service import build_metrics_query
 from src.utils.logger import get_logger
 
 router = APIRouter()
 logger = get_logger(__name__)
 
+DEFAULT_YEAR = 2021
 
-def get_db():
-    """Dependencia de base de datos para endpoints."""
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
 
+async def _fetch_rows(db: AsyncSession, query, params: dict) -> list:
+    result = await db.execute(query, params)
+    return [dict(row) for row in result.mappings()]
 
-@router.get("/hired-by-quarter/", tags=["Queries"])
-def employees_by_quarter(db: Session = Depends(get_db)):
+
+def _date_range(year: int, start: Optional[date], end: Optional[date]) -> tuple:
     """
-    📊 Endpoint 1:
-    Devuelve el número de empleados contratados por job y department en 2021,
-    dividido por trimestre (Q1, Q2, Q3, Q4).
+    Convierte year / start / end en el rango semiabierto [inicio, fin) que usan los
+    predicados `datetime >= :start AND datetime < :end` (aprovechan el índice sobre datetime).
+    start y end, si se envían, reemplazan los límites del año; end es exclusivo.
     """
-    try:
+    range_start = datetime.combine(start, datetime.min.time()) if start else datetime(year, 1, 1)
+    range_end = datetime.combine(end, datetime.min.time()) if end else datetime(year + 1, 1, 1)
+    if range_start >= range_end:
+        raise HTTPException(status_code=400, detail="El rango de fechas es inválido: start debe ser anterior a end.")
+    return range_start, range_end
+
+
+def hired_by_quarter_query(year: int, start: Optional[date] = None, end: Optional[date] = None) -> tuple:
+    """
+    SQL de contrataciones por trimestre; devuelve (query, params).
+    Sin start/end lee el agregado hired_by_quarter_summary (mantenido por triggers), por lo que
+    el costo depende de la cantidad de pares department/job y no del total de contrataciones.
+    Con start/end (end exclusivo) cuenta sobre hired_employees con un predicado de rango.
+    """
+    if start is None and end is None:
+        query = text("""
+            SELECT
+                d.department AS department,
+                j.job AS job,
+                COALESCE(SUM(s.hired) FILTER (WHERE s.quarter = 1), 0) AS "Q1",
+                COALESCE(SUM(s.hired) FILTER (WHERE s.quarter = 2), 0) AS "Q2",
+                COALESCE(SUM(s.hired) FILTER (WHERE s.quarter = 3), 0) AS "Q3",
+                COALESCE(SUM(s.hired) FILTER (WHERE s.quarter = 4), 0) AS "Q4"
+            FROM hired_by_quarter_summary s
+            JOIN departments d ON s.department_id = d.id
+            JOIN jobs j ON s.job_id = j.id
+            WHERE s.year = :year
+            GROUP BY d.department, j.job
+            HAVING SUM(s.hired) > 0
+            ORDER BY d.department ASC, j.job ASC;
+        """)
+        params = {"year": year}
+    else:
         query = text("""
-            SELECT 
+            SELECT
                 d.department AS department,
                 j.job AS job,
-                COUNT(*) FILTER (WHERE EXTRACT(QUARTER FROM e.datetime) = 1) AS Q1,
-                COUNT(*) FILTER (WHERE EXTRACT(QUARTER FROM e.datetime) = 2) AS Q2,
-                COUNT(*) FILTER (WHERE EXTRACT(QUARTER FROM e.datetime) = 3) AS Q3,
-                COUNT(*) FILTER (WHERE EXTRACT(QUARTER FROM e.datetime) = 4) AS Q4
+                COUNT(*) FILTER (WHERE EXTRACT(QUARTER FROM e.datetime) = 1) AS "Q1",
+                COUNT(*) FILTER (WHERE EXTRACT(QUARTER FROM e.datetime) = 2) AS "Q2",
+                COUNT(*) FILTER (WHERE EXTRACT(QUARTER FROM e.datetime) = 3) AS "Q3",
+                COUNT(*) FILTER (WHERE EXTRACT(QUARTER FROM e.datetime) = 4) AS "Q4"
             FROM hired_employees e
             JOIN departments d ON e.department_id = d.id
             JOIN jobs j ON e.job_id = j.id
-            WHERE EXTRACT(YEAR FROM e.datetime) = 2021
+            WHERE e.datetime >= :start AND e.datetime < :end
             GROUP BY d.department, j.job
             ORDER BY d.department ASC, j.job ASC;
         """)
+        range_start, range_end = _date_range(year, start, end)
+        params = {"start": range_start, "end": range_end}
+
+    return query, params
+
 
-        result = db.execute(query).mappings().all()
+def above_mean_query(year: int, start: Optional[date] = None, end: Optional[date] = None,
+                     include_ratio: bool = False) -> tuple:
+    """
+    SQL de departamentos por encima del promedio; devuelve (query, params).
+    Cuenta hired_employees una sola vez por departamento y obtiene el promedio con
+    AVG(...) OVER () sobre esos conteos (sin la segunda lectura del subquery en HAVING).
+    Con include_ratio agrega ratio = hired / promedio.
+    """
+    range_start, range_end = _date_range(year, start, end)
+    params = {"start": range_start, "end": range_end}
+    ratio = ",\n            ROUND(c.hired / c.mean, 4)::float8 AS ratio" if include_ratio else ""
+    query = text(f"""
+        WITH counts AS (
+            SELECT department_id, COUNT(*) AS hired, AVG(COUNT(*)) OVER () AS mean
+            FROM hired_employees
+            WHERE datetime >= :start AND datetime < :end
+            GROUP BY department_id
+        )
+        SELECT
+            d.id AS id,
+            d.department AS department,
+            c.hired AS hired{ratio}
+        FROM counts c
+        JOIN departments d ON c.department_id = d.id
+        WHERE c.hired > c.mean
+        ORDER BY hired DESC;
+    """)
+    return query, params
+
+
+@router.get("/hired-by-quarter/", tags=["Queries"])
+async def employees_by_quarter(
+    year: int = Query(DEFAULT_YEAR, ge=1900, le=9999),
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    📊 Endpoint 1:
+    Devuelve el número de empleados contratados por job y department en el año
+    indicado (por defecto 2021), dividido por trimestre (Q1, Q2, Q3, Q4).
+    Con start/end (end exclusivo) cuenta las contrataciones de ese rango.
+    """
+    query, params = hired_by_quarter_query(year, start, end)
+    try:
+        result = await query_cache.get_or_compute_async(
+            ("hired-by-quarter", tuple(sorted(params.items()))), lambda: _fetch_rows(db, query, params)
+        )
         return {"rows": result, "total": len(result)}
     except Exception as e:
-        logger.error(f"Error ejecutando query hired-by-quarter: {str(e)}")
+        logger.error("Error ejecutando query hired-by-quarter: %s", e)
         raise HTTPException(status_code=500, detail="Error ejecutando consulta SQL")
 
 
 @router.get("/above-mean/", tags=["Queries"])
-def departments_above_mean(db: Session = Depends(get_db)):
+async def departments_above_mean(
+    year: int = Query(DEFAULT_YEAR, ge=1900, le=9999),
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    include_ratio: bool = False,
+    db: AsyncSession = Depends(get_read_db),
+):
     """
     📈 Endpoint 2:
-    Lista los departamentos que contrataron más empleados que el promedio general de 2021.
+    Lista los departamentos que contrataron más empleados que el promedio general
+    del año indicado (por defecto 2021) o del rango start/end (end exclusivo).
+    include_ratio=true agrega la razón de cada departamento contra el promedio.
     """
+    query, params = above_mean_query(year, start, end, include_ratio)
     try:
-        query = text("""
-            SELECT 
-                d.id AS id,
-                d.department AS department,
-                COUNT(e.id) AS hired
-            FROM hired_employees e
-            JOIN departments d ON e.department_id = d.id
-            WHERE EXTRACT(YEAR FROM e.datetime) = 2021
-            GROUP BY d.id, d.department
-            HAVING COUNT(e.id) > (
-                SELECT AVG(sub.hired)
-                FROM (
-                    SELECT COUNT(id) AS hired
-                    FROM hired_employees
-                    WHERE EXTRACT(YEAR FROM datetime) = 2021
-                    GROUP BY department_id
-                ) sub
-            )
-            ORDER BY hired DESC;
-        """)
-        result = db.execute(query).mappings().all()
+        result = await query_cache.get_or_compute_async(
+            ("above-mean", tuple(sorted(params.items())), include_ratio), lambda: _fetch_rows(db, query, params)
+        )
         return {"rows": result, "total": len(result)}
     except Exception as e:
-        logger.error(f"Error ejecutando query above-mean: {str(e)}")
+        logger.error("Error ejecutando query above-mean: %s", e)
+        raise HTTPException(status_code=500, detail="Error ejecutando consulta SQL")
+
+
+@router.get("/metrics/", tags=["Queries"])
+async def hiring_metrics(
+    grain: str = "quarter",
+    group_by: List[str] = Query([]),
+    year: int = Query(DEFAULT_YEAR, ge=1900, le=9999),
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    📐 Métricas de contratación configurables:
+    - grain: day | week | month | quarter | year (bucket con date_trunc).
+    - group_by: cualquier subconjunto de department, job (repetido o separado por comas).
+    - year o start/end (end exclusivo) definen el rango.
+    Usa el agregado trimestral cuando la granularidad y el rango lo permiten.
+    """
+    dimensions = [name.strip() for item in group_by for name in item.split(",") if name.strip()]
+    range_start, range_end = _date_range(year, start, end)
+    try:
+        query, params, source = build_metrics_query(grain, dimensions, range_start, range_end)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        result = await query_cache.get_or_compute_async(
+            ("metrics", tuple(sorted(params.items())), tuple(dimensions)), lambda: _fetch_rows(db, query, params)
+        )
+        return {"grain": grain, "group_by": dimensions, "source": source, "rows": result, "total": len(result)}
+    except Exception as e:
+        logger.error("Error ejecutando query metrics: %s", e)
         raise HTTPException(status_code=500, detail="Error ejecutando consulta SQL")
+
+
+@router.get("/cache/stats/", tags=["Queries"])
+async def query_cache_stats():
+    """
+    🧠 Estado del caché de resultados de consultas:
+    aciertos, fallos, tasa de aciertos, entradas y versión de datos vigente.
+    """
+    return query_cache.stats()
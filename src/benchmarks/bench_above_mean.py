@@ -0,0 +1,98 @@
+"""
+⏱️ Benchmark: departments above mean (subquery en HAVING vs. AVG() OVER ()).
+
+Uso:
+    python -m src.benchmarks.bench_above_mean [--rows 10000000] [--repeat 3]
+
+Crea tablas temporales departments / hired_employees (con el mismo índice que el
+modelo) que ocultan a las reales dentro de la sesión, así que no toca los datos de
+la base. La consulta nueva es exactamente la de src/api/queries.py.
+"""
+import argparse
+import time
+from sqlalchemy import text
+from src.api.queries import above_mean_query
+from src.config.database import SessionLocal
+
+# Consulta original (dos lecturas de hired_employees: conteos + subquery del promedio)
+LEGACY_SQL = text("""
+    SELECT d.id AS id, d.department AS department, COUNT(e.id) AS hired
+    FROM hired_employees e
+    JOIN departments d ON e.department_id = d.id
+    WHERE EXTRACT(YEAR FROM e.datetime) = 2021
+    GROUP BY d.id, d.department
+    HAVING COUNT(e.id) > (
+        SELECT AVG(sub.hired)
+        FROM (
+            SELECT COUNT(id) AS hired
+            FROM hired_employees
+            WHERE EXTRACT(YEAR FROM datetime) = 2021
+            GROUP BY department_id
+        ) sub
+    )
+    ORDER BY hired DESC
+""")
+
+
+def create_synthetic_tables(db, rows: int):
+    """Tablas temporales con `rows` contrataciones repartidas en 2020-2022 y 12 departamentos."""
+    db.execute(text("CREATE TEMP TABLE departments (id int PRIMARY KEY, department text NOT NULL)"))
+    db.execute(text("INSERT INTO departments SELECT i, 'Dept ' || i FROM generate_series(1, 12) i"))
+    db.execute(text("""
+        CREATE TEMP TABLE hired_employees (
+            id int PRIMARY KEY, name text NOT NULL, datetime timestamp NOT NULL,
+            department_id int, job_id int
+        )
+    """))
+    db.execute(text("""
+        INSERT INTO hired_employees
+        SELECT i, 'Employee',
+               timestamp '2020-01-01' + (random() * interval '1095 days'),
+               1 + (random() * random() * 11)::int,
+               1 + (random() * 39)::int
+        FROM generate_series(1, :rows) i
+    """), {"rows": rows})
+    db.execute(text("CREATE INDEX ON hired_employees (datetime, department_id, job_id)"))
+    db.execute(text("ANALYZE departments"))
+    db.execute(text("ANALYZE hired_employees"))
+
+
+def _timed(db, query, params, repeat: int):
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = db.execute(query, params).all()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        create_synthetic_tables(db, args.rows)
+        print(f"🧪 {args.rows:,} filas sintéticas generadas en {time.perf_counter() - start:.1f}s")
+
+        query, params = above_mean_query(2021)
+        legacy, legacy_rows = _timed(db, LEGACY_SQL, {}, args.repeat)
+        window, window_rows = _timed(db, query, params, args.repeat)
+        assert [tuple(r) for r in legacy_rows] == [tuple(r) for r in window_rows], "Resultados distintos"
+
+        print(f"{'consulta':>22} | {'mejor (s)':>9}")
+        print("-" * 36)
+        print(f"{'subquery en HAVING':>22} | {legacy:9.3f}")
+        print(f"{'AVG() OVER ()':>22} | {window:9.3f}")
+        print(f"speedup: {legacy / window:.2f}x ({len(window_rows)} departamentos sobre el promedio)")
+    finally:
+        db.rollback()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+🧵 Benchmark: parseo + validación secuencial vs. paralelo por particiones.
+
+Uso:
+    python -m src.benchmarks.bench_parallel_parse [--rows 2000000] [--workers 1 2 4 8 16]
+                                                  [--partition-mb 16]
+
+Genera un CSV sintético de hired_employees y mide filas/s del parseo + validación
+de insert_stream (_iter_validated_chunks, sin la carga a la base) en modo secuencial
+frente a INGEST_PARSE_WORKERS procesos. El speedup esperado es casi lineal hasta la
+cantidad de núcleos físicos disponibles.
+"""
+import argparse
+import os
+import tempfile
+import time
+from src.benchmarks.bench_validation import synthetic_hired
+from src.services import parallel_parse_service
+from src.services.batch_insert_service import _iter_validated_chunks
+
+
+def _parse(path: str, workers: int):
+    for _ in _iter_validated_chunks(path, "hired_employees", parse_workers=workers):
+        pass
+
+
+def _timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    fn(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--partition-mb", type=int, default=16)
+    args = parser.parse_args()
+
+    parallel_parse_service.PARTITION_BYTES = args.partition_mb * 1024 * 1024
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "hired.csv")
+        synthetic_hired(args.rows).to_csv(path, index=False)
+        print(f"CSV: {args.rows:,} filas, {os.path.getsize(path) / 1e6:.1f} MB, {os.cpu_count()} CPUs")
+
+        baseline = _timed(_parse, path, 1)
+        print(f"{'modo':>14} | {'tiempo (s)':>10} | {'filas/s':>12} | speedup")
+        print("-" * 52)
+        print(f"{'secuencial':>14} | {baseline:10.2f} | {args.rows / baseline:12,.0f} | 1.0x")
+        for workers in args.workers:
+            # Primera pasada para calentar el pool (spawn de procesos)
+            _parse(path, workers)
+            elapsed = _timed(_parse, path, workers)
+            print(f"{f'{workers} procesos':>14} | {elapsed:10.2f} | {args.rows / elapsed:12,.0f} | {baseline / elapsed:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
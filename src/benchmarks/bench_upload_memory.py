@@ -0,0 +1,69 @@
+"""
+🧠 Benchmark: memoria pico por upload (read() completo vs. stream spooleado).
+
+Uso:
+    python -m src.benchmarks.bench_upload_memory [--rows 2000 200000]
+
+Mide con tracemalloc la memoria Python pico al procesar un CSV recibido como
+SpooledTemporaryFile (igual que UploadFile de Starlette):
+  - legacy: await file.read() + NamedTemporaryFile + pd.read_csv(path)
+  - stream: pd.read_csv(file.file) directo sobre el stream spooleado
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import tracemalloc
+import pandas as pd
+from src.tests.utils_csv_generator import generate_hired_csv
+
+SPOOL_MAX_SIZE = 1024 * 1024  # Igual que Starlette
+
+
+def _spooled(path: str):
+    spooled = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    with open(path, "rb") as f:
+        shutil.copyfileobj(f, spooled)
+    spooled.seek(0)
+    return spooled
+
+
+def legacy(spooled):
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".csv") as tmp:
+        tmp.write(spooled.read())
+        tmp_path = tmp.name
+    try:
+        return pd.read_csv(tmp_path)
+    finally:
+        os.remove(tmp_path)
+
+
+def stream(spooled):
+    return pd.read_csv(spooled)
+
+
+def _peak(fn, path: str) -> int:
+    spooled = _spooled(path)
+    tracemalloc.start()
+    fn(spooled)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[2_000, 200_000])
+    args = parser.parse_args()
+
+    print(f"{'filas':>10} | {'archivo (MB)':>12} | {'legacy pico (MB)':>16} | {'stream pico (MB)':>16}")
+    print("-" * 64)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for rows in args.rows:
+            path = generate_hired_csv(os.path.join(tmp_dir, f"hired_{rows}.csv"), rows=rows)
+            size = os.path.getsize(path) / 1e6
+            print(f"{rows:>10} | {size:12.2f} | {_peak(legacy, path) / 1e6:16.2f} | {_peak(stream, path) / 1e6:16.2f}")
+
+
+if __name__ == "__main__":
+    main()
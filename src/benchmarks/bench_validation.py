@@ -0,0 +1,76 @@
+"""
+⏱️ Benchmark: validación de hired_employees (iterrows vs. columnar).
+
+Uso:
+    python -m src.benchmarks.bench_validation [--sizes 1000 10000 100000 1000000]
+                                              [--legacy-max 100000]
+
+La versión legacy (iterrows + pd.to_datetime por fila) solo se mide hasta
+--legacy-max filas porque a 1M filas tarda varios minutos.
+"""
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from src.services.batch_insert_service import validate_frame
+
+
+def synthetic_hired(rows: int, invalid_ratio: float = 0.02, seed: int = 42) -> pd.DataFrame:
+    """Genera un DataFrame crudo (como lo devuelve read_csv) con ~2% de filas inválidas."""
+    rng = np.random.default_rng(seed)
+    seconds = rng.integers(0, 365 * 24 * 3600, rows)
+    dates = (pd.Timestamp("2021-01-01") + pd.to_timedelta(seconds, unit="s")).strftime("%Y-%m-%dT%H:%M:%SZ")
+    df = pd.DataFrame({
+        "id": np.arange(1, rows + 1, dtype="float64"),
+        "name": "Employee",
+        "datetime": np.asarray(dates, dtype=object),
+        "department_id": rng.integers(1, 13, rows).astype("float64"),
+        "job_id": rng.integers(1, 41, rows).astype("float64"),
+    })
+    bad = rng.random(rows) < invalid_ratio
+    df.loc[bad & (rng.random(rows) < 0.5), "datetime"] = "INVALID_DATE"
+    df.loc[bad & (rng.random(rows) < 0.5), "job_id"] = np.nan
+    return df
+
+
+def legacy_validate(df: pd.DataFrame):
+    """Validación original fila a fila (referencia)."""
+    invalid_rows = []
+    for _, row in df.iterrows():
+        try:
+            if pd.isna(row["id"]) or pd.isna(row["name"]) or pd.isna(row["datetime"]) \
+               or pd.isna(row["department_id"]) or pd.isna(row["job_id"]):
+                raise ValueError("Campos obligatorios nulos")
+            pd.to_datetime(row["datetime"], errors="raise", utc=True)
+        except Exception as e:
+            invalid_rows.append({**row.to_dict(), "error": str(e)})
+    df = df.dropna(subset=["id", "name", "datetime", "department_id", "job_id"])
+    df["datetime"] = pd.to_datetime(df["datetime"], errors="coerce", utc=True)
+    return df.dropna(subset=["datetime"]), invalid_rows
+
+
+def _timed(fn, df):
+    start = time.perf_counter()
+    fn(df.copy())
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--legacy-max", type=int, default=100_000)
+    args = parser.parse_args()
+
+    print(f"{'filas':>10} | {'legacy (s)':>10} | {'columnar (s)':>12} | {'filas/s columnar':>16} | speedup")
+    print("-" * 70)
+    for rows in args.sizes:
+        df = synthetic_hired(rows)
+        vectorized = _timed(lambda d: validate_frame(d, "hired_employees"), df)
+        legacy = _timed(legacy_validate, df) if rows <= args.legacy_max else None
+        legacy_txt = f"{legacy:10.3f}" if legacy is not None else f"{'-':>10}"
+        speedup = f"{legacy / vectorized:6.1f}x" if legacy is not None else "-"
+        print(f"{rows:>10} | {legacy_txt} | {vectorized:12.3f} | {rows / vectorized:16,.0f} | {speedup}")
+
+
+if __name__ == "__main__":
+    main()
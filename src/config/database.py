@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
@@ -8,6 +8,8 @@ import sys
 # 🔹 Cargar variables de entorno desde .env (si existe)
 load_dotenv()
 
+from src.config.pool import create_sync_engine, configure_engine, engine_options  # noqa: E402  (lee el .env)
+
 # 🔹 Variables de conexión PostgreSQL
 PG_USER = os.getenv("PG_USER", "kalito")
 PG_PASSWORD = os.getenv("PG_PASSWORD", "kalito123")
@@ -21,32 +23,40 @@ SKIP_DB = os.getenv("SQLALCHEMY_SKIP_DB", "false").lower() == "true"
 # ==============================
 # ✅ Cambiar driver: psycopg (no psycopg2)
 # ==============================
-if PG_PASSWORD:
-    SQLALCHEMY_DATABASE_URL = (
-        f"postgresql+psycopg://{PG_USER}:{PG_PASSWORD}@{PG_HOST}:{PG_PORT}/{PG_DB}"
-    )
-else:
-    SQLALCHEMY_DATABASE_URL = (
-        f"postgresql+psycopg://{PG_USER}@{PG_HOST}:{PG_PORT}/{PG_DB}"
-    )
+def database_url(host: str, port: str) -> str:
+    """URL de SQLAlchemy para un servidor (primario o réplica) con las mismas credenciales y base."""
+    if PG_PASSWORD:
+        return f"postgresql+psycopg://{PG_USER}:{PG_PASSWORD}@{host}:{port}/{PG_DB}"
+    return f"postgresql+psycopg://{PG_USER}@{host}:{port}/{PG_DB}"
+
+
+SQLALCHEMY_DATABASE_URL = database_url(PG_HOST, PG_PORT)
 
 # ==============================
 # 🔧 Crear motor y sesión
 # ==============================
 if not SKIP_DB:
     try:
-        engine = create_engine(SQLALCHEMY_DATABASE_URL, pool_pre_ping=True, future=True)
+        engine = create_sync_engine(SQLALCHEMY_DATABASE_URL)
         SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        # Motor async (psycopg async) para las lecturas de la API de consultas;
+        # la ingesta sigue usando el motor síncrono
+        async_engine = configure_engine(create_async_engine(SQLALCHEMY_DATABASE_URL, **engine_options(asynchronous=True)))
+        AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
         Base = declarative_base()
     except Exception as e:
         print(f"⚠️ [SQLAlchemy] Error al conectar a PostgreSQL: {e}", file=sys.stderr)
         engine = None
         SessionLocal = None
+        async_engine = None
+        AsyncSessionLocal = None
         Base = declarative_base()
 else:
     print("⚙️ [SQLAlchemy] Conexión a base de datos deshabilitada (modo CI o skip).")
     engine = None
     SessionLocal = None
+    async_engine = None
+    AsyncSessionLocal = None
     Base = declarative_base()
 
 
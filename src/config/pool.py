@@ -0,0 +1,211 @@
+"""
+🏊 Pool de conexiones configurable y con métricas.
+
+Todas las engines (síncrona, async y réplicas) se crean con estos parámetros:
+- DB_POOL_SIZE / DB_MAX_OVERFLOW: conexiones persistentes y extra por engine.
+- DB_POOL_TIMEOUT: segundos máximos esperando una conexión libre.
+- DB_POOL_RECYCLE: segundos de vida de una conexión (-1 = sin límite).
+- DB_POOL_PRE_PING: always (ping en cada checkout), idle (solo si la conexión estuvo
+  inactiva más de DB_POOL_PING_IDLE_SECONDS) o none.
+- DB_POOL_BACKEND: sqlalchemy (QueuePool) o psycopg (psycopg_pool.ConnectionPool para la
+  engine síncrona; la async usa siempre el pool async de SQLAlchemy con los mismos límites).
+
+Conexiones máximas por worker = engines × (DB_POOL_SIZE + DB_MAX_OVERFLOW).
+"""
+import os
+import threading
+import time
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import DisconnectionError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "idle").lower()
+DB_POOL_PING_IDLE_SECONDS = float(os.getenv("DB_POOL_PING_IDLE_SECONDS", "30"))
+DB_POOL_BACKEND = os.getenv("DB_POOL_BACKEND", "sqlalchemy").lower()
+
+PRE_PING_STRATEGIES = ("always", "idle", "none")
+POOL_BACKENDS = ("sqlalchemy", "psycopg")
+if DB_POOL_PRE_PING not in PRE_PING_STRATEGIES:
+    raise ValueError(f"DB_POOL_PRE_PING inválido: '{DB_POOL_PRE_PING}'. Debe ser uno de: {PRE_PING_STRATEGIES}")
+if DB_POOL_BACKEND not in POOL_BACKENDS:
+    raise ValueError(f"DB_POOL_BACKEND inválido: '{DB_POOL_BACKEND}'. Debe ser uno de: {POOL_BACKENDS}")
+
+# ============================================================
+#  POOL DE SQLALCHEMY CON MÉTRICAS DE ESPERA
+# ============================================================
+
+class _CheckoutStats:
+    """Esperas del checkout: pedidos en curso, totales y tiempo acumulado/máximo."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.waiting = 0
+        self.requests = 0
+        self.wait_ms = 0.0
+        self.max_wait_ms = 0.0
+
+    def start(self):
+        with self._lock:
+            self.waiting += 1
+        return time.perf_counter()
+
+    def finish(self, started: float):
+        elapsed = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self.waiting -= 1
+            self.requests += 1
+            self.wait_ms += elapsed
+            self.max_wait_ms = max(self.max_wait_ms, elapsed)
+
+
+class _InstrumentedPoolMixin:
+    """Mide el tiempo que cada checkout pasa esperando (o abriendo) una conexión."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkout_stats = _CheckoutStats()
+
+    def _do_get(self):
+        started = self.checkout_stats.start()
+        try:
+            return super()._do_get()
+        finally:
+            self.checkout_stats.finish(started)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.checkout_stats = self.checkout_stats
+        return pool
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+# ============================================================
+#  PRE-PING SOLO PARA CONEXIONES INACTIVAS
+# ============================================================
+
+def _install_idle_ping(engine):
+    """Ping (SELECT 1) en el checkout solo si la conexión estuvo inactiva más del umbral."""
+
+    @event.listens_for(engine, "checkin")
+    def _mark_idle(dbapi_connection, record):
+        record.info["checked_in_at"] = time.monotonic()
+
+    @event.listens_for(engine, "checkout")
+    def _ping_if_idle(dbapi_connection, record, proxy):
+        checked_in_at = record.info.get("checked_in_at")
+        if checked_in_at is None or time.monotonic() - checked_in_at < DB_POOL_PING_IDLE_SECONDS:
+            return
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute("SELECT 1")
+        except Exception as e:
+            # El pool descarta la conexión y reintenta con una nueva
+            raise DisconnectionError(f"Conexión inactiva caída: {e}") from e
+        finally:
+            cursor.close()
+
+# ============================================================
+#  CREACIÓN DE ENGINES
+# ============================================================
+
+def engine_options(asynchronous: bool = False) -> dict:
+    """Argumentos de create_engine / create_async_engine para el pool de SQLAlchemy."""
+    return {
+        "poolclass": InstrumentedAsyncQueuePool if asynchronous else InstrumentedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING == "always",
+    }
+
+
+def configure_engine(engine):
+    """Listeners de pool comunes (pre-ping por inactividad) sobre una engine ya creada."""
+    if DB_POOL_PRE_PING == "idle":
+        _install_idle_ping(engine.sync_engine if hasattr(engine, "sync_engine") else engine)
+    return engine
+
+
+def create_sync_engine(url: str):
+    """Engine síncrona con el backend de pool elegido."""
+    if DB_POOL_BACKEND == "psycopg":
+        from psycopg.conninfo import make_conninfo
+        from psycopg_pool import ConnectionPool
+        from sqlalchemy.engine import make_url
+
+        sa_url = make_url(url)
+        psycopg_pool = ConnectionPool(
+            make_conninfo(
+                host=sa_url.host, port=sa_url.port, user=sa_url.username,
+                password=sa_url.password, dbname=sa_url.database,
+            ),
+            min_size=DB_POOL_SIZE,
+            max_size=DB_POOL_SIZE + DB_MAX_OVERFLOW,
+            timeout=DB_POOL_TIMEOUT,
+            max_lifetime=DB_POOL_RECYCLE if DB_POOL_RECYCLE > 0 else 365 * 24 * 3600.0,
+            check=ConnectionPool.check_connection if DB_POOL_PRE_PING == "always" else None,
+            close_returns=True,
+            name="sync",
+            open=True,
+        )
+        # close() devuelve la conexión a psycopg_pool; SQLAlchemy no mantiene su propio pool
+        engine = create_engine("postgresql+psycopg://", creator=psycopg_pool.getconn, poolclass=NullPool, future=True)
+        engine.psycopg_pool = psycopg_pool
+        return engine
+
+    return configure_engine(create_engine(url, future=True, **engine_options()))
+
+# ============================================================
+#  MÉTRICAS DEL POOL
+# ============================================================
+
+def pool_stats(engine) -> dict:
+    """Estado actual del pool: conexiones en uso, libres, esperando y tiempo de espera."""
+    if engine is None:
+        return {}
+    sync_engine = engine.sync_engine if hasattr(engine, "sync_engine") else engine
+
+    psycopg_pool = getattr(sync_engine, "psycopg_pool", None)
+    if psycopg_pool is not None:
+        stats = psycopg_pool.get_stats()
+        size, available = stats.get("pool_size", 0), stats.get("pool_available", 0)
+        requests = stats.get("requests_num", 0)
+        wait_ms = stats.get("requests_wait_ms", 0)
+        return {
+            "backend": "psycopg",
+            "size": size,
+            "max_size": psycopg_pool.max_size,
+            "checked_out": size - available,
+            "idle": available,
+            "waiting": stats.get("requests_waiting", 0),
+            "requests": requests,
+            "wait_ms_total": wait_ms,
+            "wait_ms_avg": round(wait_ms / requests, 3) if requests else 0.0,
+            "errors": stats.get("requests_errors", 0),
+        }
+
+    pool = sync_engine.pool
+    checkout = getattr(pool, "checkout_stats", None) or _CheckoutStats()
+    return {
+        "backend": "sqlalchemy",
+        "size": pool.size(),
+        "max_size": pool.size() + pool._max_overflow,
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "waiting": checkout.waiting,
+        "requests": checkout.requests,
+        "wait_ms_total": round(checkout.wait_ms, 3),
+        "wait_ms_avg": round(checkout.wait_ms / checkout.requests, 3) if checkout.requests else 0.0,
+        "wait_ms_max": round(checkout.max_wait_ms, 3),
+    }
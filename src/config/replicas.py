@@ -0,0 +1,136 @@
+"""
+🔀 Ruteo de lecturas a réplicas de PostgreSQL (opcional).
+
+Con PG_REPLICA_HOSTS="replica1:5432,replica2" las rutas de /api/queries/* y /api/export/*
+leen de las réplicas en round-robin; la ingesta sigue usando el primario (engine / SessionLocal).
+Las réplicas usan las mismas credenciales y base que el primario (PG_USER, PG_PASSWORD, PG_DB).
+- Health check: cada réplica se verifica con SELECT 1 como máximo cada REPLICA_HEALTH_INTERVAL
+  segundos; si ninguna responde, se lee del primario.
+- Read-your-writes: con READ_YOUR_WRITES_SECONDS > 0, durante ese tiempo después de un commit
+  de la ingesta las lecturas van al primario (ventana por proceso/worker).
+"""
+import itertools
+import os
+import time
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from src.config import database
+from src.config.pool import configure_engine, engine_options, pool_stats
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+PG_REPLICA_HOSTS = [host.strip() for host in os.getenv("PG_REPLICA_HOSTS", "").split(",") if host.strip()]
+REPLICA_HEALTH_INTERVAL = float(os.getenv("REPLICA_HEALTH_INTERVAL", "5"))
+REPLICA_CONNECT_TIMEOUT = int(os.getenv("REPLICA_CONNECT_TIMEOUT", "2"))
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "0"))
+
+
+class _Replica:
+    def __init__(self, host: str, engine):
+        self.host = host
+        self.engine = engine
+        self.healthy = True
+        self.checked_at = None
+
+
+class ReplicaRouter:
+    """Elige el motor async de lectura: réplica sana en round-robin, o el primario."""
+
+    def __init__(self, hosts: list, primary, read_your_writes: float = READ_YOUR_WRITES_SECONDS):
+        self.primary = primary
+        self.read_your_writes = read_your_writes
+        self.replicas = []
+        if primary is not None:
+            for host in hosts:
+                name, _, port = host.partition(":")
+                engine = configure_engine(create_async_engine(
+                    database.database_url(name, port or database.PG_PORT),
+                    connect_args={"connect_timeout": REPLICA_CONNECT_TIMEOUT},
+                    **engine_options(asynchronous=True),
+                ))
+                self.replicas.append(_Replica(host, engine))
+        self._turn = itertools.count()
+        self._last_write = None
+
+    def mark_write(self):
+        """Registra un commit de escritura (abre la ventana de read-your-writes)."""
+        self._last_write = time.monotonic()
+
+    def _in_write_window(self) -> bool:
+        return (
+            self.read_your_writes > 0 and self._last_write is not None
+            and time.monotonic() - self._last_write < self.read_your_writes
+        )
+
+    def _set_health(self, replica: _Replica, healthy: bool, reason: str = ""):
+        if healthy != replica.healthy:
+            if healthy:
+                logger.info("🔀 Réplica %s disponible de nuevo", replica.host)
+            else:
+                logger.warning("⚠️ Réplica %s fuera de servicio: %s", replica.host, reason)
+        replica.healthy = healthy
+        replica.checked_at = time.monotonic()
+
+    async def _is_healthy(self, replica: _Replica) -> bool:
+        if replica.checked_at is not None and time.monotonic() - replica.checked_at < REPLICA_HEALTH_INTERVAL:
+            return replica.healthy
+        try:
+            async with replica.engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+            self._set_health(replica, True)
+        except (DBAPIError, OSError) as e:
+            self._set_health(replica, False, str(e).splitlines()[0])
+        return replica.healthy
+
+    def mark_down(self, engine):
+        """Marca como caída la réplica de `engine` (error al conectar fuera del health check)."""
+        for replica in self.replicas:
+            if replica.engine is engine:
+                self._set_health(replica, False, "error al conectar")
+
+    async def read_engine(self):
+        """Motor para una lectura: primario en la ventana de read-your-writes o sin réplicas sanas."""
+        if not self.replicas or self._in_write_window():
+            return self.primary
+        start = next(self._turn)
+        for offset in range(len(self.replicas)):
+            replica = self.replicas[(start + offset) % len(self.replicas)]
+            if await self._is_healthy(replica):
+                return replica.engine
+        return self.primary
+
+    def stats(self) -> dict:
+        return {
+            "replicas": [{"host": r.host, "healthy": r.healthy, "pool": pool_stats(r.engine)} for r in self.replicas],
+            "read_your_writes_seconds": self.read_your_writes,
+            "in_write_window": self._in_write_window(),
+        }
+
+    async def dispose(self):
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+
+replica_router = ReplicaRouter(PG_REPLICA_HOSTS, database.async_engine)
+
+
+async def get_read_db():
+    """Sesión async de solo lectura (réplica o primario) para las rutas de consultas."""
+    if database.AsyncSessionLocal is None:
+        raise RuntimeError("Base de datos no inicializada o deshabilitada.")
+    engine = await replica_router.read_engine()
+    db = AsyncSession(engine, expire_on_commit=False)
+    try:
+        if engine is not replica_router.primary:
+            try:
+                await db.connection()
+            except (DBAPIError, OSError):
+                # La réplica cayó entre health checks: se lee del primario
+                replica_router.mark_down(engine)
+                await db.close()
+                db = database.AsyncSessionLocal()
+        yield db
+    finally:
+        await db.close()
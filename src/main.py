@@ -1,8 +1,17 @@
 from fastapi import FastAPI
+from fastapi.responses import Response
 from fastapi.middleware.cors import CORSMiddleware
-from src.api import ingest, queries
-from src.utils.logger import get_logger
-from src.config.database import Base, engine
+from src.api import ingest, queries, export
+from src.utils.logger import dropped_records, get_logger
+from src.config.database import Base, engine, SessionLocal, async_engine
+from src.config.pool import pool_stats
+from src.config.replicas import replica_router
+from src.services import ingest_executor
+from src.services.query_cache import query_cache
+from src.services.reject_store import reject_writer
+from src.utils.prometheus import REGISTRY, CONTENT_TYPE, CallbackMetric, MetricsMiddleware
+from src.models import models  # noqa: F401  (registra las tablas en Base.metadata para create_all)
+from src.services import quarterly_summary_service
 
 logger = get_logger(__name__)
 
@@ -22,9 +31,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 📈 Latencia por ruta para /metrics (middleware ASGI puro)
+app.add_middleware(MetricsMiddleware)
+
 # 🔹 Registrar routers
 app.include_router(ingest.router, prefix="/api/ingest", tags=["Ingest"])
 app.include_router(queries.router, prefix="/api/queries", tags=["Queries"])
+app.include_router(export.router, prefix="/api/export", tags=["Export"])
 
 # 🔹 Evento de inicio de la aplicación
 @app.on_event("startup")
@@ -37,8 +50,15 @@ def init_database():
     try:
         Base.metadata.create_all(bind=engine)
         logger.info("✅ Tablas listas en la base de datos.")
+
+        # Reconstruye el agregado trimestral si quedó desincronizado (p. ej. datos previos a los triggers)
+        db = SessionLocal()
+        try:
+            quarterly_summary_service.rebuild_if_stale(db)
+        finally:
+            db.close()
     except Exception as e:
-        logger.error(f"❌ Error creando tablas: {e}")
+        logger.error("❌ Error creando tablas: %s", e)
         raise e
 
 # 🔹 Endpoint de salud
@@ -48,6 +68,70 @@ async def health_check():
     logger.info("✅ Health check OK")
     return {"status": "ok", "message": "API is running"}
 
+# 🔹 Estado de los pools de conexiones
+@app.get("/health/pool", tags=["Health"])
+async def pool_health():
+    """Conexiones en uso, libres, pedidos esperando y tiempo de espera por pool (por worker)."""
+    return {
+        "sync": pool_stats(engine),
+        "async": pool_stats(async_engine),
+        "replicas": replica_router.stats()["replicas"],
+    }
+
+# 🔹 Métricas Prometheus (gauges leídos al momento del scrape)
+def _pools() -> list:
+    pools = [("sync", pool_stats(engine)), ("async", pool_stats(async_engine))]
+    pools += [(f"replica:{r['host']}", r["pool"]) for r in replica_router.stats()["replicas"]]
+    return [(name, stats) for name, stats in pools if stats]
+
+
+def _pool_metric(name: str, documentation: str, key: str, kind: str = "gauge", scale: float = 1):
+    REGISTRY.register(CallbackMetric(
+        name, documentation, lambda: [((pool,), stats[key] * scale) for pool, stats in _pools()], ("pool",), kind,
+    ))
+
+
+REGISTRY.register(CallbackMetric(
+    "ingest_uploads_in_flight", "Cargas admitidas en el pool de ingesta (en ejecución + en cola).",
+    lambda: [((), ingest_executor.stats()["in_flight"])],
+))
+_pool_metric("db_pool_checked_out", "Conexiones en uso.", "checked_out")
+_pool_metric("db_pool_idle", "Conexiones libres en el pool.", "idle")
+_pool_metric("db_pool_max", "Conexiones máximas (size + overflow).", "max_size")
+_pool_metric("db_pool_waiting", "Pedidos esperando una conexión.", "waiting")
+_pool_metric("db_pool_checkouts_total", "Conexiones pedidas al pool.", "requests", "counter")
+_pool_metric("db_pool_wait_seconds_total", "Tiempo acumulado esperando conexiones.", "wait_ms_total", "counter", 0.001)
+REGISTRY.register(CallbackMetric(
+    "query_cache_requests_total", "Consultas servidas por el caché de resultados (hit/miss).",
+    lambda: [(("hit",), query_cache.stats()["hits"]), (("miss",), query_cache.stats()["misses"])], ("result",),
+    "counter",
+))
+REGISTRY.register(CallbackMetric(
+    "query_cache_hit_ratio", "Tasa de aciertos del caché de resultados.", lambda: [((), query_cache.stats()["hit_rate"])],
+))
+REGISTRY.register(CallbackMetric(
+    "ingest_rejects_pending_batches", "Lotes de filas rechazadas en cola de escritura.",
+    lambda: [((), reject_writer.stats()["pending_batches"])],
+))
+REGISTRY.register(CallbackMetric(
+    "ingest_rejects_written_total", "Filas rechazadas guardadas (ok) o perdidas por error de escritura (failed).",
+    lambda: [(("ok",), reject_writer.written), (("failed",), reject_writer.failed)], ("result",), "counter",
+))
+REGISTRY.register(CallbackMetric(
+    "ingest_rejects_direct_total", "Filas rechazadas escritas por la ingesta porque no entraban en la cola.",
+    lambda: [((), reject_writer.direct)], kind="counter",
+))
+REGISTRY.register(CallbackMetric(
+    "log_records_dropped_total", "Registros de log descartados por cola llena.", lambda: [((), dropped_records())],
+    kind="counter",
+))
+
+
+@app.get("/metrics", tags=["Health"], include_in_schema=False)
+async def metrics():
+    """Métricas en formato de texto de Prometheus (por worker)."""
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
 # 🔹 Mensaje de inicio
 @app.on_event("startup")
 def log_startup():
@@ -1,6 +1,8 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import BigInteger, Column, Integer, String, Text, DateTime, ForeignKey, JSON, Index, event, func
 from sqlalchemy.orm import relationship
 from src.config.database import Base
+from src.services.quarterly_summary_service import install_triggers
+from src.services.partition_service import HIRED_EMPLOYEES_PARTITIONED, install_partitions
 
 # 🏢 Tabla: departments
 class Department(Base):
@@ -27,10 +29,18 @@ class Job(Base):
 # 👤 Tabla: hired_employees
 class HiredEmployee(Base):
     __tablename__ = "hired_employees"
+    __table_args__ = (
+        # Rangos por fecha (datetime >= :start AND datetime < :end) con conteos por
+        # department/job resueltos desde el índice (index-only scan)
+        Index("ix_hired_employees_datetime_dept_job", "datetime", "department_id", "job_id"),
+        # Con HIRED_EMPLOYEES_PARTITIONING=year|month: particionado por rango de fechas
+        {"postgresql_partition_by": "RANGE (datetime)"} if HIRED_EMPLOYEES_PARTITIONED else {},
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(150), nullable=False)
-    datetime = Column(DateTime, nullable=False)
+    # En una tabla particionada la clave primaria debe incluir la columna de partición
+    datetime = Column(DateTime, nullable=False, primary_key=HIRED_EMPLOYEES_PARTITIONED)
     department_id = Column(Integer, ForeignKey("departments.id"))
     job_id = Column(Integer, ForeignKey("jobs.id"))
 
@@ -40,3 +50,70 @@ class HiredEmployee(Base):
 
     def __repr__(self):
         return f"<HiredEmployee(id={self.id}, name='{self.name}')>"
+
+
+# 📊 Tabla: hired_by_quarter_summary (agregado mantenido por triggers sobre hired_employees)
+class HiredQuarterSummary(Base):
+    __tablename__ = "hired_by_quarter_summary"
+
+    year = Column(Integer, primary_key=True)
+    quarter = Column(Integer, primary_key=True)
+    department_id = Column(Integer, primary_key=True)
+    job_id = Column(Integer, primary_key=True)
+    hired = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<HiredQuarterSummary({self.year}-Q{self.quarter}, dept={self.department_id}, job={self.job_id})>"
+
+
+
+# 🧾 Tabla: ingest_jobs (estado de las cargas asíncronas, compartido entre workers)
+class IngestJob(Base):
+    __tablename__ = "ingest_jobs"
+
+    job_id = Column(String(32), primary_key=True)
+    table_name = Column(String(50), nullable=False)
+    filename = Column(String(255), nullable=False)
+    status = Column(String(20), nullable=False, index=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    started_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
+    progress = Column(JSON, nullable=False)
+    result = Column(JSON)
+    error = Column(Text)
+
+    def __repr__(self):
+        return f"<IngestJob(job_id='{self.job_id}', status='{self.status}')>"
+
+
+# 🗃️ Tabla: ingest_rejects (filas rechazadas por carga; se escribe con COPY desde reject_store)
+class IngestReject(Base):
+    __tablename__ = "ingest_rejects"
+    __table_args__ = (
+        # GET /rejects/{upload_id} pagina por id, con o sin filtro de motivo
+        Index("ix_ingest_rejects_upload_id", "upload_id", "id"),
+        Index("ix_ingest_rejects_upload_reason", "upload_id", "reason", "id"),
+    )
+
+    id = Column(BigInteger, primary_key=True)
+    upload_id = Column(String(32), nullable=False)
+    table_name = Column(String(50), nullable=False)
+    reason = Column(String(20), nullable=False)
+    error = Column(Text)
+    data = Column(JSON, nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now(), index=True)
+
+    def __repr__(self):
+        return f"<IngestReject(upload_id='{self.upload_id}', reason='{self.reason}')>"
+
+
+def ensure_indexes(target, connection, **kw):
+    """create_all no agrega índices a tablas existentes: se crean aquí si faltan."""
+    for index in HiredEmployee.__table__.indexes:
+        index.create(connection, checkfirst=True)
+
+
+# Índices, triggers del agregado y partición DEFAULT (se verifican/(re)crean en cada create_all)
+event.listen(Base.metadata, "after_create", ensure_indexes)
+event.listen(Base.metadata, "after_create", install_triggers)
+event.listen(Base.metadata, "after_create", install_partitions)
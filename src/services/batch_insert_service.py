@@ -1,232 +1,367 @@
 import os
 import pandas as pd
-from datetime import datetime
-from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 from fastapi import HTTPException
-from src.models import models
+from src.config.replicas import replica_router
+from src.services.bulk_load_service import prepare_copy_frame, copy_frame, FOREIGN_KEYS
+from src.services.dimension_cache import dimension_cache, reject_unknown_fk, DIMENSION_TABLES
+from src.services.input_formats import read_frame, iter_frames
+from src.services.partition_service import is_partitioned, ensure_partitions
+from src.services.parallel_parse_service import map_partitions, PARSE_WORKERS
+from src.services.parse_worker import parse_partition
+from src.services.query_cache import query_cache
+from src.services.reject_store import reject_writer, new_upload_id
+from src.services.validation_service import (  # noqa: F401  (NULL_FIELDS_ERROR reexportado)
+    EXPECTED_COLUMNS, NULL_FIELDS_ERROR, check_columns, validate_frame,
+)
 from src.utils.logger import get_logger
+from src.utils.prometheus import record_ingest
+from src.utils.timing import stage, track_ingest
 
 logger = get_logger(__name__)
 MAX_BATCH_SIZE = 2000
 
-# Columnas esperadas por tabla
-EXPECTED_COLUMNS = {
-    "departments": ["id", "department"],
-    "jobs": ["id", "job"],
-    "hired_employees": ["id", "name", "datetime", "department_id", "job_id"],
-}
+# Filas por chunk en la ingesta en streaming (sin límite total de filas)
+STREAM_CHUNK_SIZE = int(os.getenv("INGEST_STREAM_CHUNK_SIZE", "50000"))
+# Máximo de filas rechazadas por FK devueltas en el resumen (el detalle completo va a ingest_rejects)
+MAX_REPORTED_REJECTS = 1000
 
 # ============================================================
 #  CARGA Y VALIDACIÓN DEL CSV
 # ============================================================
 
-def load_csv_strict(file_path: str, table: str):
-    """Carga un CSV y valida formato, tipos y valores nulos."""
+def _read_error(e: Exception) -> ValueError:
+    """Traduce errores de lectura de pandas a errores de validación."""
+    msg = str(e).lower()
+    if "no columns" in msg or "empty" in msg:
+        return ValueError("El archivo CSV está vacío o no contiene datos válidos.")
+    return ValueError(f"Error al leer CSV: {e}")
+
+
+def load_csv_strict(file_path: str, table: str, upload_id: str = None):
+    """Carga un CSV y valida formato, tipos y valores nulos (inválidas → rechazos de `upload_id`)."""
     if table not in EXPECTED_COLUMNS:
         raise ValueError(f"Tabla no soportada: {table}")
 
     try:
-        df = pd.read_csv(file_path)
+        with stage("read_csv") as timer:
+            df = pd.read_csv(file_path)
+            timer.rows = len(df)
     except Exception as e:
-        msg = str(e).lower()
-        if "no columns" in msg or "empty" in msg:
-            raise ValueError("El archivo CSV está vacío o no contiene datos válidos.")
-        raise ValueError(f"Error al leer CSV: {e}")
-
-    # Validar encabezados exactos
-    if list(df.columns) != EXPECTED_COLUMNS[table]:
-        raise ValueError(
-            f"Estructura inválida: faltan columnas esperadas para {table}. "
-            f"Cabeceras recibidas: {list(df.columns)}"
-        )
+        raise _read_error(e)
 
-    df = df.dropna(how="all")
-    invalid_rows = []
+    check_columns(df.columns, table)
+    return _validate_loaded(df, table, upload_id)
 
-    if table == "hired_employees":
-        for _, row in df.iterrows():
-            try:
-                if pd.isna(row["id"]) or pd.isna(row["name"]) or pd.isna(row["datetime"]) \
-                   or pd.isna(row["department_id"]) or pd.isna(row["job_id"]):
-                    raise ValueError("Campos obligatorios nulos")
-                pd.to_datetime(row["datetime"], errors="raise", utc=True)
-            except Exception as e:
-                invalid_rows.append({**row.to_dict(), "error": str(e)})
-
-        if invalid_rows:
-            os.makedirs("logs", exist_ok=True)
-            pd.DataFrame(invalid_rows).to_csv("logs/invalid_hired_employees.csv", index=False)
-            logger.warning(
-                f"{len(invalid_rows)} registros inválidos guardados en logs/invalid_hired_employees.csv"
-            )
 
-        df = df.dropna(subset=["id", "name", "datetime", "department_id", "job_id"])
-        df["datetime"] = pd.to_datetime(df["datetime"], errors="coerce", utc=True)
-        df["id"] = pd.to_numeric(df["id"], errors="coerce")
-        df["department_id"] = pd.to_numeric(df["department_id"], errors="coerce")
-        df["job_id"] = pd.to_numeric(df["job_id"], errors="coerce")
-        df = df.dropna(subset=["id", "datetime", "department_id", "job_id"])
-        df = df.where(pd.notnull(df), None)
-
-    else:
-        field = EXPECTED_COLUMNS[table][1]
-        for _, row in df.iterrows():
-            try:
-                if pd.isna(row["id"]) or pd.isna(row[field]):
-                    raise ValueError("Campos obligatorios nulos")
-            except Exception as e:
-                invalid_rows.append({**row.to_dict(), "error": str(e)})
-
-        if invalid_rows:
-            os.makedirs("logs", exist_ok=True)
-            pd.DataFrame(invalid_rows).to_csv(f"logs/invalid_{table}.csv", index=False)
-            logger.warning(
-                f"{len(invalid_rows)} registros inválidos guardados en logs/invalid_{table}.csv"
-            )
+def load_file_strict(source, table: str, fmt: str = "csv", upload_id: str = None):
+    """
+    Igual que load_csv_strict para Parquet, Arrow IPC o NDJSON: columnas tipadas leídas
+    sin parsear texto, con las mismas columnas (y orden) exigidas al CSV.
+    """
+    if fmt == "csv":
+        return load_csv_strict(source, table, upload_id)
+    if table not in EXPECTED_COLUMNS:
+        raise ValueError(f"Tabla no soportada: {table}")
+
+    with stage(f"read_{fmt}") as timer:
+        df = read_frame(source, fmt, table)
+        timer.rows = len(df)
+    return _validate_loaded(df, table, upload_id)
 
-        df = df.dropna(subset=["id", field])
-        df["id"] = pd.to_numeric(df["id"], errors="coerce")
-        df = df.dropna(subset=["id"])
-        df = df.where(pd.notnull(df), None)
-        df["id"] = df["id"].astype(int)
 
-    return df, len(invalid_rows)
+def _validate_loaded(df: pd.DataFrame, table: str, upload_id: str):
+    """Valida el DataFrame leído y encola las filas inválidas como rechazos de la carga."""
+    with stage("validate", rows=len(df)):
+        df, invalid_df = validate_frame(df, table)
+
+    if len(invalid_df):
+        with stage("reports", rows=len(invalid_df)):
+            reject_writer.submit(upload_id, table, "invalid", invalid_df)
+        logger.warning("%d registros inválidos en %s (carga %s)", len(invalid_df), table, upload_id)
+
+    return df, len(invalid_df)
+
+
+def _check_header(file_path: str, table: str):
+    """Lee solo el encabezado del archivo y valida las columnas."""
+    try:
+        check_columns(pd.read_csv(file_path, nrows=0).columns, table)
+    except (pd.errors.EmptyDataError, pd.errors.ParserError) as e:
+        raise _read_error(e)
 
 # ============================================================
 #  INSERCIÓN POR LOTES CON DETECCIÓN DE DUPLICADOS Y FK
 # ============================================================
 
-def insert_batch(db, file_or_df, table: str):
-    """Inserta registros válidos por lotes con detección de duplicados y errores FK."""
-    try:
-        # Cargar DataFrame
-        if isinstance(file_or_df, (str, bytes)):
-            df, invalid_count = load_csv_strict(file_or_df, table)
-        elif isinstance(file_or_df, pd.DataFrame):
-            df, invalid_count = file_or_df, 0
-        else:
-            raise ValueError("Entrada inválida (debe ser path o DataFrame)")
-
-        # 🚨 Validación: tamaño del batch
-        record_count = len(df)
-        if record_count == 0:
-            raise HTTPException(
-                status_code=400,
-                detail="El archivo CSV está vacío. Debe contener al menos 1 registro."
-            )
-        if record_count > MAX_BATCH_SIZE:
-            raise HTTPException(
-                status_code=400,
-                detail=(
-                    f"El archivo CSV contiene {record_count} registros. "
-                    f"El límite máximo permitido por request es de {MAX_BATCH_SIZE} registros."
-                ),
-            )
+def _load_frame(db, df: pd.DataFrame, table: str, upload_id: str = None, on_conflict: str = "skip"):
+    """
+    Deduplica dentro del lote, carga con COPY + INSERT ... ON CONFLICT y hace commit.
+    Los duplicados contra la base salen de lo que devuelve el INSERT (no se consultan antes).
+    Duplicados y FK rechazadas se encolan en el almacén de rechazos bajo `upload_id`.
+    Devuelve un dict con total, inserted, updated, duplicates y rejected_fk (lista de filas).
+    """
+    if table not in EXPECTED_COLUMNS:
+        raise ValueError(f"Tabla desconocida: {table}")
 
-        # Selección de modelo
-        if table == "hired_employees":
-            model = models.HiredEmployee
-        elif table == "departments":
-            model = models.Department
-        elif table == "jobs":
-            model = models.Job
-        else:
-            raise ValueError(f"Tabla desconocida: {table}")
-
-        # Detectar duplicados existentes
-        existing_ids = {r[0] for r in db.query(model.id).filter(model.id.in_(df["id"].tolist()))}
-        duplicates_detected = len(existing_ids)
-        if duplicates_detected:
-            duplicates = df[df["id"].isin(existing_ids)]
-            os.makedirs("logs", exist_ok=True)
-            duplicates.to_csv(f"logs/duplicates_{table}.csv", index=False)
-            df = df[~df["id"].isin(existing_ids)]
-            logger.warning(f"{duplicates_detected} duplicados detectados en {table} → logs/duplicates_{table}.csv")
-
-        # Duplicados dentro del CSV
+    # Duplicados dentro del CSV
+    duplicates_detected = 0
+    with stage("dedupe", rows=len(df)):
         duplicate_ids_in_csv = df["id"].duplicated(keep=False)
         if duplicate_ids_in_csv.any():
             duplicates_csv = df[duplicate_ids_in_csv]
-            os.makedirs("logs", exist_ok=True)
-            duplicates_csv.to_csv(f"logs/duplicates_infile_{table}.csv", index=False)
+            reject_writer.submit(upload_id, table, "duplicate_in_file", duplicates_csv)
             df = df.drop_duplicates(subset=["id"], keep="first")
             duplicates_detected += len(duplicates_csv)
-            logger.warning(f"{len(duplicates_csv)} duplicados dentro del CSV detectados en {table}")
+            logger.warning("%d duplicados dentro del CSV detectados en %s", len(duplicates_csv), table)
 
-        # Conversión ORM
-        valid_objects, fk_errors = [], []
-        for _, row in df.iterrows():
-            try:
-                if table == "departments":
-                    valid_objects.append(models.Department(**row))
-                elif table == "jobs":
-                    valid_objects.append(models.Job(**row))
-                else:
-                    dt = datetime.fromisoformat(str(row["datetime"]).replace("Z", "+00:00"))
-                    valid_objects.append(models.HiredEmployee(
-                        id=int(row["id"]),
-                        name=row["name"],
-                        datetime=dt,
-                        department_id=int(row["department_id"]),
-                        job_id=int(row["job_id"])
-                    ))
-            except Exception as e:
-                fk_errors.append({**row.to_dict(), "error": str(e)})
-
-        inserted, rejected_fk = 0, []
-
-        # Inserción fila por fila para capturar errores FK sin abortar
-        for obj in valid_objects:
+    # Carga masiva: COPY a staging + un único INSERT ... ON CONFLICT ... RETURNING
+    with stage("prepare", rows=len(df)):
+        frame = prepare_copy_frame(df, table, EXPECTED_COLUMNS[table])
+    total = len(frame)
+
+    # FK huérfanas descartadas con el caché de dimensiones antes de cualquier SQL de carga
+    with stage("fk_filter", rows=total):
+        frame, cached_rejects = reject_unknown_fk(db, frame, FOREIGN_KEYS.get(table))
+    if is_partitioned(table):
+        # Particiones del lote creadas antes de la carga, en su propia transacción
+        with stage("partitions", rows=len(frame)):
+            ensure_partitions(db.get_bind(), frame["datetime"])
+    loaded = copy_frame(db, table, frame, on_conflict)
+    with stage("commit", rows=loaded["inserted"] + loaded["updated"]):
+        db.commit()
+
+    # Refrescar el caché de ids cuando cambia una dimensión
+    if table in DIMENSION_TABLES and (loaded["inserted"] or loaded["updated"]):
+        dimension_cache.refresh(db, table)
+
+    # Nueva versión de datos: los resultados de consultas en caché dejan de servirse
+    # y las lecturas van al primario durante la ventana de read-your-writes
+    if loaded["inserted"] or loaded["updated"]:
+        query_cache.bump_version()
+        replica_router.mark_write()
+
+    duplicate_ids = loaded["duplicate_ids"]
+    if duplicate_ids:
+        duplicates = df[df["id"].isin(duplicate_ids)]
+        with stage("reports", rows=len(duplicates)):
+            reject_writer.submit(upload_id, table, "duplicate", duplicates)
+        duplicates_detected += len(duplicate_ids)
+        logger.warning("%d duplicados detectados en %s (carga %s)", len(duplicate_ids), table, upload_id)
+
+    rejected_fk = cached_rejects + loaded["rejected_fk"]
+    if rejected_fk:
+        with stage("reports", rows=len(rejected_fk)):
+            reject_writer.submit(upload_id, table, "foreign_key", rejected_fk)
+        logger.warning("%d errores de clave foránea detectados en %s (carga %s)", len(rejected_fk), table, upload_id)
+
+    return {
+        "total": total - len(duplicate_ids),
+        "inserted": loaded["inserted"],
+        "updated": loaded["updated"],
+        "duplicates": duplicates_detected,
+        "rejected_fk": rejected_fk,
+    }
+
+
+def _build_result(table: str, totals: dict, invalid_count: int, rejected_fk: list, **extra):
+    """Arma la respuesta estándar de ingesta (misma forma para batch y streaming)."""
+    inserted = totals["inserted"]
+    duplicates_detected = totals["duplicates"]
+    rejected_fk_count = totals.get("rejected_fk_count", len(rejected_fk))
+
+    summary = {
+        "total": totals["total"],
+        "inserted": inserted,
+        "rejected_fk": rejected_fk_count,
+        "duplicates": duplicates_detected,
+        "updated": totals.get("updated", 0),
+        "invalid_rows": invalid_count,
+        "rejected_rows": rejected_fk,
+        **extra,
+    }
+    record_ingest(table, summary)
+
+    return {
+        "inserted": inserted,
+        "invalid_rows": invalid_count,
+        "duplicates": duplicates_detected,
+        "summary": summary,
+        "message": (
+            f"Insertadas {inserted}, "
+            f"{invalid_count} inválidas, "
+            f"{duplicates_detected} duplicadas, "
+            f"{rejected_fk_count} rechazadas por FK en {table}"
+        ),
+    }
+
+
+def insert_batch(db, file_or_df, table: str, on_conflict: str = "skip", upload_id: str = None, fmt: str = "csv"):
+    """
+    Inserta registros válidos por lotes con detección de duplicados y errores FK.
+    on_conflict: 'skip' (ignora ids existentes), 'update' (los actualiza) o 'error' (rechaza el lote).
+    Las filas rechazadas quedan en ingest_rejects bajo `upload_id` (se genera uno si no viene).
+    fmt: csv | parquet | arrow | ndjson (ver input_formats).
+    """
+    upload_id = upload_id or new_upload_id()
+    try:
+        with track_ingest(
+            "insert_batch", table=table, on_conflict=on_conflict, upload_id=upload_id, format=fmt
+        ) as timings:
+            # Cargar DataFrame (path o stream binario, p. ej. el archivo spooleado del upload)
+            if isinstance(file_or_df, (str, bytes)) or hasattr(file_or_df, "read"):
+                df, invalid_count = load_file_strict(file_or_df, table, fmt, upload_id)
+            elif isinstance(file_or_df, pd.DataFrame):
+                df, invalid_count = file_or_df, 0
+            else:
+                raise ValueError("Entrada inválida (debe ser path, stream o DataFrame)")
+
+            # 🚨 Validación: tamaño del batch
+            record_count = len(df)
+            if record_count == 0:
+                raise HTTPException(
+                    status_code=400,
+                    detail="El archivo CSV está vacío. Debe contener al menos 1 registro."
+                )
+            if record_count > MAX_BATCH_SIZE:
+                raise HTTPException(
+                    status_code=400,
+                    detail=(
+                        f"El archivo CSV contiene {record_count} registros. "
+                        f"El límite máximo permitido por request es de {MAX_BATCH_SIZE} registros."
+                    ),
+                )
+
+            totals = _load_frame(db, df, table, upload_id, on_conflict)
+            return _build_result(
+                table, totals, invalid_count, totals["rejected_fk"], upload_id=upload_id, timings=timings.as_dict()
+            )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        db.rollback()
+        logger.error("Error inesperado en batch %s: %s", table, e, exc_info=True)
+        raise
+
+# ============================================================
+#  INGESTA EN STREAMING POR CHUNKS (ARCHIVOS GRANDES)
+# ============================================================
+
+def _iter_validated_chunks(
+    file_path, table: str, chunksize: int = None, parse_workers: int = None, fmt: str = "csv"
+):
+    """
+    Genera (chunk_válido, chunk_inválido) en el orden del archivo.
+    Con parse_workers > 1 y un path en disco, las particiones se parsean y validan
+    en paralelo; si no, se usa pd.read_csv(chunksize=...) en el proceso actual.
+    Parquet / Arrow IPC / NDJSON se leen por record batches de `chunksize` filas.
+    """
+    if fmt != "csv":
+        for frame in iter_frames(file_path, fmt, table, chunksize or STREAM_CHUNK_SIZE):
+            yield validate_frame(frame, table)
+        return
+
+    parse_workers = parse_workers or PARSE_WORKERS
+    if parse_workers > 1 and isinstance(file_path, str):
+        _check_header(file_path, table)
+        yield from map_partitions(parse_partition, file_path, table, workers=parse_workers)
+        return
+
+    first = True
+    for chunk in pd.read_csv(file_path, chunksize=chunksize or STREAM_CHUNK_SIZE):
+        if first:
+            check_columns(chunk.columns, table)
+            first = False
+        yield validate_frame(chunk, table)
+
+
+def insert_stream(
+    db, file_path, table: str, chunksize: int = None, on_progress=None,
+    on_conflict: str = "skip", parse_workers: int = None, upload_id: str = None, fmt: str = "csv",
+):
+    """
+    Lee el archivo (CSV o `fmt`: parquet | arrow | ndjson) en chunks acotados y valida, deduplica y carga cada uno a medida que llega.
+    La memoria pico depende de `chunksize` (STREAM_CHUNK_SIZE por defecto), no del tamaño del archivo.
+    Cada chunk se confirma por separado; se devuelve un único resumen combinado
+    (con on_conflict='error' los chunks anteriores al conflicto quedan confirmados).
+    `on_progress(parcial: dict)` se invoca después de cada chunk.
+    `parse_workers` (INGEST_PARSE_WORKERS por defecto) activa el parseo paralelo por particiones.
+    Las filas rechazadas quedan en ingest_rejects bajo `upload_id` (el job_id en las cargas asíncronas).
+    """
+    if table not in EXPECTED_COLUMNS:
+        raise ValueError(f"Tabla no soportada: {table}")
+
+    upload_id = upload_id or new_upload_id()
+    with track_ingest(
+        "insert_stream", table=table, on_conflict=on_conflict, upload_id=upload_id, format=fmt
+    ) as timings:
+        return _insert_stream(
+            db, file_path, table, chunksize, on_progress, on_conflict, parse_workers, upload_id, fmt, timings
+        )
+
+
+def _timed_chunks(chunks):
+    """Mide la lectura + validación de cada chunk como la etapa read_validate."""
+    iterator = iter(chunks)
+    while True:
+        with stage("read_validate") as timer:
             try:
-                db.add(obj)
-                db.commit()
-                inserted += 1
-            except IntegrityError as e:
-                db.rollback()
-                err_msg = str(e.orig).lower()
-                if "foreign key" in err_msg:
-                    rejected_fk.append({
-                        "id": getattr(obj, "id", None),
-                        "error": err_msg
-                    })
-                else:
-                    raise
-            except SQLAlchemyError as e:
-                db.rollback()
-                logger.error(f"❌ Error SQL inesperado: {e}")
-
-        if rejected_fk:
-            os.makedirs("logs", exist_ok=True)
-            pd.DataFrame(rejected_fk).to_csv("logs/foreign_key_errors_hired_employees.csv", index=False)
-            logger.warning(
-                f"{len(rejected_fk)} errores de clave foránea detectados → logs/foreign_key_errors_hired_employees.csv"
+                chunk, invalid_df = next(iterator)
+            except StopIteration:
+                return
+            timer.rows = len(chunk) + len(invalid_df)
+        yield chunk, invalid_df
+
+
+def _insert_stream(
+    db, file_path, table, chunksize, on_progress, on_conflict, parse_workers, upload_id, fmt, timings
+):
+    totals = {"total": 0, "inserted": 0, "updated": 0, "duplicates": 0, "rejected_fk_count": 0}
+    invalid_count, parsed, chunks = 0, 0, 0
+    rejected_fk = []
+
+    try:
+        try:
+            chunk_source = _iter_validated_chunks(file_path, table, chunksize, parse_workers, fmt)
+            for chunk, invalid_df in _timed_chunks(chunk_source):
+                parsed += len(chunk) + len(invalid_df)
+                if len(invalid_df):
+                    with stage("reports", rows=len(invalid_df)):
+                        reject_writer.submit(upload_id, table, "invalid", invalid_df)
+                    invalid_count += len(invalid_df)
+
+                if len(chunk):
+                    loaded = _load_frame(db, chunk, table, upload_id, on_conflict)
+                    chunks += 1
+                    for key in ("total", "inserted", "updated", "duplicates"):
+                        totals[key] += loaded[key]
+                    totals["rejected_fk_count"] += len(loaded["rejected_fk"])
+                    # El detalle se acota para mantener la memoria plana (el completo va a ingest_rejects)
+                    rejected_fk.extend(loaded["rejected_fk"][:MAX_REPORTED_REJECTS - len(rejected_fk)])
+
+                if on_progress:
+                    on_progress({**totals, "parsed": parsed, "invalid_rows": invalid_count})
+        except (pd.errors.EmptyDataError, pd.errors.ParserError) as e:
+            raise _read_error(e)
+
+        if parsed == 0:
+            raise HTTPException(
+                status_code=400,
+                detail="El archivo CSV está vacío. Debe contener al menos 1 registro."
             )
 
-        summary = {
-            "total": len(df),
-            "inserted": inserted,
-            "rejected_fk": len(rejected_fk),
-            "duplicates": duplicates_detected,
-            "invalid_rows": invalid_count,
-            "rejected_rows": rejected_fk,
-        }
-
-        return {
-            "inserted": inserted,
-            "invalid_rows": invalid_count,
-            "duplicates": duplicates_detected,
-            "summary": summary,
-            "message": (
-                f"Insertadas {inserted}, "
-                f"{invalid_count} inválidas, "
-                f"{duplicates_detected} duplicadas, "
-                f"{len(rejected_fk)} rechazadas por FK en {table}"
-            ),
-        }
+        if invalid_count:
+            logger.warning("%d registros inválidos en %s (carga %s)", invalid_count, table, upload_id)
+        logger.info("🌊 Streaming %s: %d filas leídas en %d chunks", table, parsed, chunks)
+
+        return _build_result(
+            table, totals, invalid_count, rejected_fk,
+            chunks=chunks, parsed=parsed, upload_id=upload_id, timings=timings.as_dict(),
+        )
 
     except HTTPException:
         raise
     except Exception as e:
         db.rollback()
-        logger.error(f"Error inesperado en batch {table}: {e}", exc_info=True)
+        logger.error("Error inesperado en streaming %s: %s", table, e, exc_info=True)
         raise
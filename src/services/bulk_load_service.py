@@ -0,0 +1,221 @@
+import io
+import pandas as pd
+import psycopg
+from src.services.partition_service import is_partitioned
+from src.utils.logger import get_logger
+from src.utils.timing import stage as timed
+
+logger = get_logger(__name__)
+
+# Filas serializadas por cada escritura al stream de COPY
+COPY_WRITE_ROWS = 10_000
+
+# Políticas ante ids que ya existen en la tabla destino
+CONFLICT_POLICIES = ("skip", "update", "error")
+
+# Claves foráneas validadas en staging con anti-joins (columna, tabla referenciada)
+FOREIGN_KEYS = {
+    "hired_employees": [("department_id", "departments"), ("job_id", "jobs")],
+}
+
+
+class DuplicateKeyError(Exception):
+    """Se encontraron ids existentes con la política on_conflict='error'."""
+
+# ============================================================
+#  PREPARACIÓN DEL DATAFRAME PARA COPY
+# ============================================================
+
+def prepare_copy_frame(df: pd.DataFrame, table: str, columns: list) -> pd.DataFrame:
+    """Normaliza tipos del DataFrame validado al formato que espera PostgreSQL."""
+    frame = df[columns].copy()
+    frame["id"] = pd.to_numeric(frame["id"]).astype("int64")
+
+    if table == "hired_employees":
+        # Timestamps en UTC sin zona horaria (columna DateTime sin tz)
+        frame["datetime"] = pd.to_datetime(frame["datetime"], utc=True).dt.tz_convert(None)
+        frame["department_id"] = pd.to_numeric(frame["department_id"]).astype("Int64")
+        frame["job_id"] = pd.to_numeric(frame["job_id"]).astype("Int64")
+
+    return frame
+
+
+def _write_copy(cursor, table: str, frame: pd.DataFrame):
+    """Envía el DataFrame a PostgreSQL con COPY ... FROM STDIN en bloques de texto CSV."""
+    columns = ", ".join(frame.columns)
+    with cursor.copy(f"COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv)") as copy:
+        for start in range(0, len(frame), COPY_WRITE_ROWS):
+            buffer = io.StringIO()
+            frame.iloc[start:start + COPY_WRITE_ROWS].to_csv(
+                buffer, index=False, header=False, date_format="%Y-%m-%d %H:%M:%S.%f"
+            )
+            copy.write(buffer.getvalue())
+
+
+def _merge_sql(table: str, stage: str, columns: list, on_conflict: str, filtered: bool) -> str:
+    """INSERT ... SELECT desde staging con la cláusula ON CONFLICT de la política elegida."""
+    column_list = ", ".join(columns)
+    where = " WHERE id = ANY(%(ids)s)" if filtered else ""
+    sql = f"INSERT INTO {table} ({column_list}) SELECT {column_list} FROM {stage}{where}"
+
+    if on_conflict == "skip":
+        return sql + " ON CONFLICT (id) DO NOTHING RETURNING id, true"
+    if on_conflict == "update":
+        assignments = ", ".join(f"{c} = EXCLUDED.{c}" for c in columns if c != "id")
+        # xmax = 0 solo en filas recién insertadas (las actualizadas tienen xmax del UPDATE)
+        return sql + f" ON CONFLICT (id) DO UPDATE SET {assignments} RETURNING id, (xmax = 0)"
+    return sql + " RETURNING id, true"
+
+
+def _merge_sql_partitioned(table: str, stage: str, columns: list, on_conflict: str, filtered: bool) -> str:
+    """
+    Variante para tablas particionadas: la clave primaria incluye la columna de partición,
+    así que no hay índice único sobre id para ON CONFLICT (id). Los ids existentes se
+    detectan con NOT EXISTS y, con la política update, un UPDATE ... FROM staging en la
+    misma sentencia (ambos CTE ven la misma foto de la tabla).
+    """
+    column_list = ", ".join(columns)
+    condition = " AND s.id = ANY(%(ids)s)" if filtered else ""
+    insert = (
+        f"INSERT INTO {table} ({column_list}) SELECT {', '.join(f's.{c}' for c in columns)} FROM {stage} s "
+        f"WHERE NOT EXISTS (SELECT 1 FROM {table} t WHERE t.id = s.id){condition} RETURNING id, true"
+    )
+    if on_conflict != "update":
+        return insert
+
+    assignments = ", ".join(f"{c} = s.{c}" for c in columns if c != "id")
+    return f"""
+        WITH updated AS (
+            UPDATE {table} t SET {assignments} FROM {stage} s WHERE t.id = s.id{condition} RETURNING t.id, false
+        ), inserted AS ({insert})
+        SELECT * FROM inserted UNION ALL SELECT * FROM updated
+    """
+
+
+def _reject_orphans(cursor, table: str, stage: str) -> list:
+    """
+    Separa en bloque las filas de staging cuyas FK no existen (anti-joins contra las
+    tablas referenciadas), las elimina de staging y las devuelve con su motivo.
+    """
+    foreign_keys = FOREIGN_KEYS.get(table)
+    if not foreign_keys:
+        return []
+
+    joins = " ".join(
+        f"LEFT JOIN {ref} r{i} ON r{i}.id = s.{column}" for i, (column, ref) in enumerate(foreign_keys)
+    )
+    missing = [f"(s.{column} IS NOT NULL AND r{i}.id IS NULL)" for i, (column, _) in enumerate(foreign_keys)]
+    fk_columns = ", ".join(f"s.{column}" for column, _ in foreign_keys)
+
+    cursor.execute(f"""
+        WITH orphans AS (
+            SELECT s.id, {fk_columns}, {", ".join(missing)}
+            FROM {stage} s {joins}
+            WHERE {" OR ".join(missing)}
+        ), removed AS (
+            DELETE FROM {stage} s USING orphans o WHERE s.id = o.id
+        )
+        SELECT * FROM orphans ORDER BY id
+    """)
+
+    rejected = []
+    for row in cursor.fetchall():
+        values = dict(zip([column for column, _ in foreign_keys], row[1:1 + len(foreign_keys)]))
+        flags = row[1 + len(foreign_keys):]
+        reasons = [
+            f"{column}={values[column]} no existe en {ref}"
+            for (column, ref), is_missing in zip(foreign_keys, flags) if is_missing
+        ]
+        rejected.append({"id": row[0], **values, "error": "foreign key violation: " + "; ".join(reasons)})
+    return rejected
+
+# ============================================================
+#  CARGA MASIVA: COPY A STAGING + INSERT ... ON CONFLICT
+# ============================================================
+
+def copy_frame(db, table: str, frame: pd.DataFrame, on_conflict: str = "skip") -> dict:
+    """
+    Carga el DataFrame con COPY a una tabla temporal y lo mueve a la tabla destino
+    con un único INSERT ... SELECT ... ON CONFLICT ... RETURNING.
+    Los duplicados salen de lo que devuelve la base (sin consultar ids antes) y las
+    filas con FK inexistentes se separan antes con anti-joins en staging.
+    Si aun así el INSERT falla por FK (p. ej. una dimensión borrada en paralelo)
+    se divide en mitades hasta aislar solo las filas que fallan.
+    Devuelve dict con inserted, updated, duplicate_ids y rejected_fk.
+    """
+    if on_conflict not in CONFLICT_POLICIES:
+        raise ValueError(f"Política on_conflict inválida: '{on_conflict}'. Debe ser una de: {list(CONFLICT_POLICIES)}")
+
+    result = {"inserted": 0, "updated": 0, "duplicate_ids": [], "rejected_fk": []}
+    if not len(frame):
+        return result
+
+    raw_conn = db.connection().connection.driver_connection
+    stage = f"stage_{table}"
+    columns = list(frame.columns)
+    returned = {}
+    partitioned = is_partitioned(table)
+    merge_sql = _merge_sql_partitioned if partitioned else _merge_sql
+
+    with raw_conn.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {stage}")
+        cursor.execute(f"CREATE TEMP TABLE {stage} (LIKE {table} INCLUDING DEFAULTS) ON COMMIT DROP")
+        with timed("copy", rows=len(frame)):
+            _write_copy(cursor, stage, frame)
+        with timed("fk_antijoin", rows=len(frame)):
+            result["rejected_fk"] = _reject_orphans(cursor, table, stage)
+
+        if partitioned:
+            # Sin índice único sobre id: las cargas a la misma tabla se serializan hasta el commit
+            cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (f"merge:{table}",))
+            if on_conflict == "error":
+                cursor.execute(f"SELECT s.id FROM {stage} s JOIN {table} t ON t.id = s.id ORDER BY s.id LIMIT 10")
+                existing = [row[0] for row in cursor.fetchall()]
+                if existing:
+                    raise DuplicateKeyError(f"Ids existentes en {table} con on_conflict='error': {existing}")
+
+        def _merge(ids):
+            try:
+                # Savepoint de psycopg sobre la transacción abierta por la sesión
+                with raw_conn.transaction():
+                    if ids is None:
+                        cursor.execute(merge_sql(table, stage, columns, on_conflict, False))
+                    else:
+                        cursor.execute(merge_sql(table, stage, columns, on_conflict, True), {"ids": ids})
+                    returned.update(cursor.fetchall())
+            except psycopg.errors.ForeignKeyViolation as e:
+                if ids is None:
+                    orphan_ids = {r["id"] for r in result["rejected_fk"]}
+                    ids = [i for i in frame["id"].tolist() if i not in orphan_ids]
+                if not ids:
+                    return
+                if len(ids) > 1:
+                    mid = len(ids) // 2
+                    _merge(ids[:mid])
+                    _merge(ids[mid:])
+                else:
+                    result["rejected_fk"].append({"id": int(ids[0]), "error": str(e).lower()})
+            except psycopg.errors.UniqueViolation as e:
+                if on_conflict == "error":
+                    raise DuplicateKeyError(
+                        f"Ids existentes en {table} con on_conflict='error': {e.diag.message_detail}"
+                    ) from e
+                raise
+
+        with timed("merge") as timer:
+            _merge(None)
+            timer.rows = len(returned)
+
+    rejected_ids = {r["id"] for r in result["rejected_fk"]}
+    result["inserted"] = sum(1 for was_inserted in returned.values() if was_inserted)
+    result["updated"] = len(returned) - result["inserted"]
+    result["duplicate_ids"] = [
+        i for i in frame["id"].tolist() if i not in returned and i not in rejected_ids
+    ]
+
+    logger.info(
+        "📥 COPY %s (%s): %d insertadas, %d actualizadas, %d duplicadas, %d FK",
+        table, on_conflict, result["inserted"], result["updated"],
+        len(result["duplicate_ids"]), len(result["rejected_fk"]),
+    )
+    return result
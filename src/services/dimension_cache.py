@@ -0,0 +1,115 @@
+import os
+import threading
+import time
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Segundos durante los cuales se confía en el caché sin verificar la versión en la base
+DIMENSION_CACHE_TTL = float(os.getenv("DIMENSION_CACHE_TTL", "30"))
+DIMENSION_TABLES = ("departments", "jobs")
+
+# ============================================================
+#  CACHÉ EN PROCESO DE IDS VÁLIDOS DE DIMENSIONES
+# ============================================================
+
+class DimensionIdCache:
+    """
+    Ids válidos de departments/jobs en memoria.
+    - Se recarga cuando la ingesta de la dimensión hace commit (mismo proceso).
+    - Vencido el TTL se compara una huella barata (count, max, sum de ids) para
+      detectar cambios hechos por otros workers y recargar solo si cambió.
+    """
+
+    def __init__(self, ttl: float = DIMENSION_CACHE_TTL):
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _fingerprint(db, table: str) -> tuple:
+        row = db.execute(text(f"SELECT COUNT(*), COALESCE(MAX(id), 0), COALESCE(SUM(id), 0) FROM {table}")).one()
+        return tuple(row)
+
+    def _load(self, db, table: str) -> np.ndarray:
+        version = self._fingerprint(db, table)
+        ids = np.fromiter((r[0] for r in db.execute(text(f"SELECT id FROM {table}"))), dtype="int64")
+        with self._lock:
+            self._entries[table] = {"ids": ids, "version": version, "checked_at": time.monotonic()}
+        logger.info("🗂️ Caché de %s cargado (%d ids)", table, len(ids))
+        return ids
+
+    def get_ids(self, db, table: str, verify: bool = False) -> np.ndarray:
+        """Devuelve los ids válidos; con verify=True compara la versión aunque no haya vencido el TTL."""
+        if table not in DIMENSION_TABLES:
+            raise ValueError(f"Tabla de dimensión no soportada: {table}")
+
+        entry = self._entries.get(table)
+        if entry is None:
+            return self._load(db, table)
+        if not verify and time.monotonic() - entry["checked_at"] < self.ttl:
+            return entry["ids"]
+
+        if self._fingerprint(db, table) != entry["version"]:
+            return self._load(db, table)
+        entry["checked_at"] = time.monotonic()
+        return entry["ids"]
+
+    def refresh(self, db, table: str):
+        """Recarga la dimensión (se llama después del commit de su ingesta)."""
+        if table in DIMENSION_TABLES:
+            self._load(db, table)
+
+    def invalidate(self, table: str = None):
+        with self._lock:
+            if table is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(table, None)
+
+
+dimension_cache = DimensionIdCache()
+
+# ============================================================
+#  PRE-VALIDACIÓN VECTORIZADA DE CLAVES FORÁNEAS
+# ============================================================
+
+def reject_unknown_fk(db, frame: pd.DataFrame, foreign_keys: list):
+    """
+    Separa las filas cuyas FK no están en el caché con un `isin` vectorizado, antes de
+    cualquier SQL de carga. Si aparecen huérfanas se verifica la versión del caché una vez
+    para no rechazar ids creados por otro worker.
+    Devuelve (frame_válido, filas_rechazadas).
+    """
+    if not foreign_keys or frame.empty:
+        return frame, []
+
+    missing_any = pd.Series(False, index=frame.index)
+    reason_parts = []
+    for column, ref in foreign_keys:
+        values = frame[column]
+        missing = values.notna() & ~values.isin(dimension_cache.get_ids(db, ref))
+        if missing.any():
+            missing = values.notna() & ~values.isin(dimension_cache.get_ids(db, ref, verify=True))
+        if missing.any():
+            reason_parts.append((column + "=" + values.astype(str) + f" no existe en {ref}").where(missing))
+            missing_any |= missing
+
+    if not missing_any.any():
+        return frame, []
+
+    # Motivos combinados solo para las filas huérfanas
+    reasons = pd.concat(reason_parts, axis=1).loc[missing_any]
+    errors = reasons.apply(lambda row: "; ".join(row.dropna()), axis=1).tolist()
+
+    orphans = frame.loc[missing_any]
+    fk_columns = [column for column, _ in foreign_keys]
+    rejected = [
+        {"id": row[0], **dict(zip(fk_columns, row[1:])), "error": f"foreign key violation: {error}"}
+        for row, error in zip(zip(*(orphans[c].tolist() for c in ["id", *fk_columns])), errors)
+    ]
+    logger.warning("🧹 %d filas con FK inexistente rechazadas por el caché de dimensiones", len(rejected))
+    return frame.loc[~missing_any], rejected
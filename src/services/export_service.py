@@ -0,0 +1,81 @@
+import json
+import os
+import uuid
+from src.config.database import async_engine
+from src.config.replicas import replica_router
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Filas que trae el cursor del servidor por cada viaje a la base (NDJSON)
+EXPORT_FETCH_ROWS = int(os.getenv("EXPORT_FETCH_ROWS", "5000"))
+
+# Columnas exportables por tabla (en orden)
+EXPORT_TABLES = {
+    "departments": ["id", "department"],
+    "jobs": ["id", "job"],
+    "hired_employees": ["id", "name", "datetime", "department_id", "job_id"],
+}
+
+EXPORT_FORMATS = ["csv", "ndjson"]
+
+# ============================================================
+#  SQL DE EXPORTACIÓN
+# ============================================================
+
+def table_sql(table: str) -> tuple:
+    """SELECT de la tabla completa ordenada por id; devuelve (sql, params)."""
+    if table not in EXPORT_TABLES:
+        raise ValueError(f"Tabla no exportable: '{table}'. Debe ser una de: {list(EXPORT_TABLES)}")
+    return f"SELECT {', '.join(EXPORT_TABLES[table])} FROM {table} ORDER BY id", {}
+
+
+def compile_query(query, params: dict) -> tuple:
+    """Pasa un text() de SQLAlchemy con :parámetros al estilo %(nombre)s de psycopg."""
+    compiled = query.compile(dialect=async_engine.dialect)
+    return compiled.string.strip().rstrip(";"), {**compiled.params, **params}
+
+# ============================================================
+#  STREAMING DESDE POSTGRESQL (MEMORIA CONSTANTE)
+# ============================================================
+
+def _json_default(value):
+    return value.isoformat() if hasattr(value, "isoformat") else str(value)
+
+
+async def stream_csv(sql: str, params: dict):
+    """Genera bloques CSV (con encabezado) directo desde COPY (...) TO STDOUT."""
+    engine = await replica_router.read_engine()
+    async with engine.connect() as conn:
+        raw = (await conn.get_raw_connection()).driver_connection
+        async with raw.cursor() as cursor:
+            async with cursor.copy(f"COPY ({sql}) TO STDOUT WITH (FORMAT csv, HEADER)", params) as copy:
+                async for block in copy:
+                    yield bytes(block)
+
+
+async def stream_ndjson(sql: str, params: dict):
+    """Genera una línea JSON por fila leyendo con un cursor del servidor (EXPORT_FETCH_ROWS por viaje)."""
+    engine = await replica_router.read_engine()
+    async with engine.connect() as conn:
+        raw = (await conn.get_raw_connection()).driver_connection
+        async with raw.cursor(name=f"export_{uuid.uuid4().hex}") as cursor:
+            await cursor.execute(sql, params)
+            columns = None
+            while True:
+                rows = await cursor.fetchmany(EXPORT_FETCH_ROWS)
+                if not rows:
+                    break
+                columns = columns or [c.name for c in cursor.description]
+                yield "".join(
+                    json.dumps(dict(zip(columns, row)), default=_json_default, ensure_ascii=False) + "\n"
+                    for row in rows
+                ).encode("utf-8")
+        await raw.rollback()
+
+
+def stream(fmt: str, sql: str, params: dict):
+    """Devuelve (generador, media_type) para el formato pedido."""
+    if fmt == "csv":
+        return stream_csv(sql, params), "text/csv"
+    return stream_ndjson(sql, params), "application/x-ndjson"
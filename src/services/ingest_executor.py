@@ -0,0 +1,90 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Hilos dedicados a la ingesta y cupos de espera adicionales antes de rechazar
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "2"))
+INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", "4"))
+# Segundos sugeridos al cliente en Retry-After cuando el pool está saturado
+INGEST_RETRY_AFTER = int(os.getenv("INGEST_RETRY_AFTER", "5"))
+
+
+class IngestPoolSaturated(Exception):
+    """El pool de ingesta no tiene cupos libres (en ejecución + en cola)."""
+
+
+# ============================================================
+#  POOL DE INGESTA CON CONTROL DE ADMISIÓN
+# ============================================================
+
+_executor = ThreadPoolExecutor(max_workers=INGEST_WORKERS, thread_name_prefix="ingest")
+_slots = threading.BoundedSemaphore(INGEST_WORKERS + INGEST_QUEUE_SIZE)
+_in_flight = 0
+_lock = threading.Lock()
+
+
+def _release(_future: Future):
+    global _in_flight
+    with _lock:
+        _in_flight -= 1
+    _slots.release()
+
+
+def reserve():
+    """
+    Reserva un cupo del pool sin encolar nada todavía.
+    Lanza IngestPoolSaturated si ya hay INGEST_WORKERS + INGEST_QUEUE_SIZE trabajos admitidos.
+    El cupo se libera al terminar el trabajo de submit_reserved o con cancel_reservation.
+    """
+    global _in_flight
+    if not _slots.acquire(blocking=False):
+        logger.warning("⛔ Pool de ingesta saturado, rechazando trabajo")
+        raise IngestPoolSaturated(
+            f"El servicio de ingesta está saturado ({INGEST_WORKERS} en ejecución, "
+            f"{INGEST_QUEUE_SIZE} en cola). Reintente en {INGEST_RETRY_AFTER} segundos."
+        )
+    with _lock:
+        _in_flight += 1
+
+
+def cancel_reservation():
+    """Devuelve un cupo reservado que no llegó a encolarse."""
+    _release(None)
+
+
+def submit_reserved(fn, *args, **kwargs) -> Future:
+    """Encola `fn` usando un cupo ya reservado con reserve()."""
+    try:
+        future = _executor.submit(fn, *args, **kwargs)
+    except Exception:
+        cancel_reservation()
+        raise
+    future.add_done_callback(_release)
+    return future
+
+
+def submit(fn, *args, **kwargs) -> Future:
+    """
+    Encola `fn` en el pool de ingesta sin bloquear.
+    Lanza IngestPoolSaturated si ya hay INGEST_WORKERS + INGEST_QUEUE_SIZE trabajos admitidos.
+    """
+    reserve()
+    return submit_reserved(fn, *args, **kwargs)
+
+
+async def run_ingest(fn, *args, **kwargs):
+    """Ejecuta `fn` en el pool de ingesta y espera el resultado sin bloquear el event loop."""
+    return await asyncio.wrap_future(submit(fn, *args, **kwargs))
+
+
+def stats() -> dict:
+    """Estado actual del pool (para monitoreo)."""
+    return {
+        "workers": INGEST_WORKERS,
+        "queue_size": INGEST_QUEUE_SIZE,
+        "in_flight": _in_flight,
+    }
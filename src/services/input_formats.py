@@ -0,0 +1,142 @@
+"""
+📦 Formatos de entrada de la ingesta además de CSV: Parquet, Arrow IPC y NDJSON.
+
+Parquet y Arrow IPC se leen con pyarrow (dependencia opcional) directamente a columnas
+tipadas, sin parsear texto ni inferir tipos; el esquema del archivo se valida contra
+EXPECTED_COLUMNS antes de leer datos. NDJSON (una fila JSON por línea) usa pandas.
+Todos los formatos exigen las mismas columnas y en el mismo orden que el CSV, y los
+DataFrames resultantes pasan por la misma validación columnar.
+"""
+import pandas as pd
+from src.services.validation_service import EXPECTED_COLUMNS, NUMERIC_COLUMNS, check_columns
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow no instalado: solo CSV y NDJSON
+    pa = None
+
+# Extensión → formato
+FORMATS = {
+    ".csv": "csv",
+    ".parquet": "parquet",
+    ".arrow": "arrow",
+    ".feather": "arrow",
+    ".ipc": "arrow",
+    ".ndjson": "ndjson",
+    ".jsonl": "ndjson",
+}
+# Formatos leídos con pyarrow (el resto de los no-CSV se lee con pandas)
+ARROW_FORMATS = ("parquet", "arrow")
+
+
+def detect_format(filename: str):
+    """Formato según la extensión del archivo (None si no está soportada)."""
+    for extension, fmt in FORMATS.items():
+        if filename.lower().endswith(extension):
+            return fmt
+    return None
+
+
+def _require_pyarrow(fmt: str):
+    if pa is None:
+        raise ValueError(f"El formato {fmt} requiere pyarrow (pip install pyarrow).")
+
+
+def _arrow_type_error(field, column: str, numeric: bool, temporal: bool):
+    """Motivo por el que el tipo Arrow de una columna no sirve para el esquema, o None."""
+    kind = field.type
+    if pa.types.is_dictionary(kind):
+        kind = kind.value_type
+    if pa.types.is_null(kind) or pa.types.is_string(kind) or pa.types.is_large_string(kind):
+        return None  # se valida fila a fila igual que en CSV
+    if numeric and (pa.types.is_integer(kind) or pa.types.is_floating(kind) or pa.types.is_decimal(kind)):
+        return None
+    if temporal and (pa.types.is_timestamp(kind) or pa.types.is_date(kind)):
+        return None
+    return f"{column}: {kind}"
+
+
+def check_arrow_schema(schema, table: str):
+    """Columnas exactas y en orden (como en CSV) y tipos compatibles: números, fechas o texto."""
+    check_columns(schema.names, table)
+    errors = [
+        error for column in EXPECTED_COLUMNS[table]
+        if (error := _arrow_type_error(
+            schema.field(column), column, column in NUMERIC_COLUMNS[table], column == "datetime"
+        ))
+    ]
+    if errors:
+        raise ValueError(f"Tipos de columna inválidos para {table}: {', '.join(errors)}")
+
+
+def _to_frame(batch) -> pd.DataFrame:
+    """Tabla o RecordBatch de Arrow a DataFrame (conversión columnar)."""
+    return batch.to_pandas()
+
+
+def _open_ipc(source):
+    """Lector de Arrow IPC en formato archivo (.arrow / .feather v2) o stream."""
+    try:
+        return pa_ipc.open_file(source)
+    except pa.ArrowInvalid:
+        if hasattr(source, "seek"):
+            source.seek(0)
+        return pa_ipc.open_stream(source)
+
+
+def _ipc_batches(reader):
+    if isinstance(reader, pa_ipc.RecordBatchFileReader):
+        return (reader.get_batch(i) for i in range(reader.num_record_batches))
+    return iter(reader)
+
+
+def _ndjson_frame(frame: pd.DataFrame, table: str) -> pd.DataFrame:
+    """Las claves de cada fila siguen el orden de aparición: mismo chequeo que las cabeceras CSV."""
+    check_columns(frame.columns, table)
+    return frame
+
+
+def _read_ndjson(source, chunksize: int = None):
+    # dtype=False: sin inferencia de tipos (la validación convierte números y fechas)
+    return pd.read_json(source, lines=True, dtype=False, convert_dates=False, chunksize=chunksize)
+
+
+def read_frame(source, fmt: str, table: str) -> pd.DataFrame:
+    """Lee el archivo completo (carga por lotes) con las columnas validadas."""
+    if fmt not in ARROW_FORMATS:
+        return _ndjson_frame(_read_ndjson(source), table)
+
+    _require_pyarrow(fmt)
+    if fmt == "parquet":
+        parquet = pq.ParquetFile(source)
+        check_arrow_schema(parquet.schema_arrow, table)
+        return _to_frame(parquet.read())
+
+    reader = _open_ipc(source)
+    check_arrow_schema(reader.schema, table)
+    return _to_frame(reader.read_all())
+
+
+def iter_frames(source, fmt: str, table: str, chunksize: int):
+    """Genera DataFrames de a lo sumo `chunksize` filas (streaming con memoria acotada)."""
+    if fmt not in ARROW_FORMATS:
+        for chunk in _read_ndjson(source, chunksize):
+            yield _ndjson_frame(chunk, table)
+        return
+
+    _require_pyarrow(fmt)
+    if fmt == "parquet":
+        parquet = pq.ParquetFile(source)
+        check_arrow_schema(parquet.schema_arrow, table)
+        batches = parquet.iter_batches(batch_size=chunksize)
+    else:
+        reader = _open_ipc(source)
+        check_arrow_schema(reader.schema, table)
+        batches = _ipc_batches(reader)
+
+    for batch in batches:
+        # Los batches de IPC conservan el tamaño con el que se escribieron
+        for start in range(0, batch.num_rows, chunksize):
+            yield _to_frame(batch.slice(start, chunksize))
@@ -0,0 +1,178 @@
+import json
+import os
+import uuid
+from datetime import datetime, timezone
+from fastapi import HTTPException
+from src.config.database import SessionLocal
+from src.models.models import IngestJob
+from src.services.batch_insert_service import insert_stream
+from src.services.reject_store import reject_writer
+from src.utils.logger import get_logger
+from src.utils.timing import profiled
+
+logger = get_logger(__name__)
+
+# Trabajos terminados que se conservan (se descartan los más antiguos)
+MAX_TRACKED_JOBS = int(os.getenv("INGEST_MAX_TRACKED_JOBS", "1000"))
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+
+# ============================================================
+#  REGISTRO DE TRABAJOS DE INGESTA ASÍNCRONA (TABLA ingest_jobs)
+# ============================================================
+# El estado vive en PostgreSQL y no en memoria del proceso, así que
+# GET /jobs/{id} responde igual desde cualquier worker de uvicorn.
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _jsonable(value):
+    """Convierte escalares de numpy/pandas del resumen a tipos JSON nativos."""
+    return json.loads(json.dumps(value, default=lambda o: o.item() if hasattr(o, "item") else str(o)))
+
+
+def _to_dict(job: IngestJob) -> dict:
+    def iso(value):
+        return value.isoformat() if value else None
+
+    return {
+        "job_id": job.job_id,
+        "table": job.table_name,
+        "filename": job.filename,
+        "status": job.status,
+        "created_at": iso(job.created_at),
+        "started_at": iso(job.started_at),
+        "finished_at": iso(job.finished_at),
+        "progress": dict(job.progress),
+        "result": job.result,
+        "error": job.error,
+    }
+
+
+def _update(job_id: str, **values):
+    db = SessionLocal()
+    try:
+        db.query(IngestJob).filter(IngestJob.job_id == job_id).update(values)
+        db.commit()
+    finally:
+        db.close()
+
+
+def create_job(table: str, filename: str) -> dict:
+    """Registra un trabajo nuevo en estado 'queued' y lo devuelve como dict."""
+    job = IngestJob(
+        job_id=uuid.uuid4().hex,
+        table_name=table,
+        filename=filename,
+        status=JOB_QUEUED,
+        created_at=_now(),
+        progress={"parsed": 0, "inserted": 0, "duplicates": 0, "invalid_rows": 0, "rejected_fk": 0},
+    )
+    db = SessionLocal()
+    try:
+        db.add(job)
+        db.flush()
+        _evict_finished(db)
+        db.commit()
+        return _to_dict(job)
+    finally:
+        db.close()
+
+
+def _evict_finished(db):
+    """Mantiene la tabla acotada descartando los trabajos terminados más antiguos."""
+    keep = (
+        db.query(IngestJob.job_id)
+        .filter(IngestJob.status.in_((JOB_COMPLETED, JOB_FAILED)))
+        .order_by(IngestJob.created_at.desc())
+        .limit(MAX_TRACKED_JOBS)
+    )
+    db.query(IngestJob).filter(
+        IngestJob.status.in_((JOB_COMPLETED, JOB_FAILED)),
+        IngestJob.job_id.notin_(keep.scalar_subquery()),
+    ).delete(synchronize_session=False)
+
+
+def get_job(job_id: str):
+    """Devuelve el trabajo como dict o None si no existe."""
+    db = SessionLocal()
+    try:
+        job = db.get(IngestJob, job_id)
+        return _to_dict(job) if job else None
+    finally:
+        db.close()
+
+
+def discard_job(job_id: str):
+    """Elimina un trabajo que nunca llegó a encolarse."""
+    db = SessionLocal()
+    try:
+        db.query(IngestJob).filter(IngestJob.job_id == job_id).delete()
+        db.commit()
+    finally:
+        db.close()
+
+
+def mark_running(job_id: str):
+    _update(job_id, status=JOB_RUNNING, started_at=_now())
+
+
+def update_progress(job_id: str, partial: dict):
+    """Callback de progreso de insert_stream (se invoca después de cada chunk)."""
+    _update(job_id, progress=_jsonable({
+        "parsed": partial.get("parsed", 0),
+        "inserted": partial.get("inserted", 0),
+        "duplicates": partial.get("duplicates", 0),
+        "invalid_rows": partial.get("invalid_rows", 0),
+        "rejected_fk": partial.get("rejected_fk_count", 0),
+    }))
+
+
+def mark_completed(job_id: str, result: dict):
+    _update(job_id, status=JOB_COMPLETED, finished_at=_now(), result=_jsonable(result))
+
+
+def mark_failed(job_id: str, error: str):
+    _update(job_id, status=JOB_FAILED, finished_at=_now(), error=error)
+
+
+# ============================================================
+#  EJECUCIÓN DEL TRABAJO (CORRE EN EL POOL DE INGESTA)
+# ============================================================
+
+def run_job(
+    job_id: str, file_path: str, table: str, on_conflict: str = "skip", profile: str = None, fmt: str = "csv"
+):
+    """
+    Procesa el archivo spooleado (CSV o `fmt`) en streaming con su propia sesión y elimina el temporal al final.
+    `profile` (cprofile | pyinstrument) perfila la carga y agrega summary['profile'] al resultado.
+    Los rechazos se guardan con upload_id = job_id y el trabajo pasa a 'completed' cuando ya
+    son visibles en GET /rejects/{job_id}.
+    """
+    mark_running(job_id)
+    db = SessionLocal()
+    try:
+        result = profiled(profile, f"job_{job_id}", insert_stream)(
+            db, file_path, table,
+            on_progress=lambda partial: update_progress(job_id, partial),
+            on_conflict=on_conflict, upload_id=job_id, fmt=fmt,
+        )
+        reject_writer.flush(job_id)
+        mark_completed(job_id, result)
+        logger.info("✅ Job %s completado: %s", job_id, result["message"])
+    except HTTPException as e:
+        mark_failed(job_id, str(e.detail))
+    except Exception as e:
+        logger.error("❌ Job %s falló: %s", job_id, e, exc_info=True)
+        mark_failed(job_id, str(e))
+    finally:
+        db.close()
+        try:
+            os.remove(file_path)
+        except OSError as e:
+            logger.warning("No se pudo eliminar el archivo temporal: %s (%s)", file_path, e)
@@ -0,0 +1,81 @@
+from datetime import datetime
+from sqlalchemy import text
+from src.services.quarterly_summary_service import SUMMARY_TABLE
+
+# Granularidades soportadas (argumento de date_trunc)
+METRIC_GRAINS = ["day", "week", "month", "quarter", "year"]
+
+# Dimensiones agrupables: (columna de salida, join con la dimensión)
+METRIC_DIMENSIONS = {
+    "department": ("d.department", "JOIN departments d ON d.id = {source}.department_id"),
+    "job": ("j.job", "JOIN jobs j ON j.id = {source}.job_id"),
+}
+
+# ============================================================
+#  CONSTRUCCIÓN DE LA CONSULTA DE MÉTRICAS
+# ============================================================
+
+def _quarter_start(value: datetime) -> bool:
+    return value == datetime(value.year, value.month, 1) and value.month in (1, 4, 7, 10)
+
+
+def _validate(grain: str, dimensions: list):
+    if grain not in METRIC_GRAINS:
+        raise ValueError(f"Granularidad inválida: '{grain}'. Debe ser una de: {METRIC_GRAINS}")
+    unknown = [d for d in dimensions if d not in METRIC_DIMENSIONS]
+    if unknown:
+        raise ValueError(f"Dimensiones inválidas: {unknown}. Deben estar en: {list(METRIC_DIMENSIONS)}")
+    if len(set(dimensions)) != len(dimensions):
+        raise ValueError("Dimensiones repetidas en group_by")
+
+
+def build_metrics_query(grain: str, dimensions: list, start: datetime, end: datetime) -> tuple:
+    """
+    Compila la consulta de contrataciones por período y dimensiones en un único
+    GROUP BY con parámetros enlazados. Devuelve (query, params, origen).
+    - Granularidad trimestre/año con un rango alineado a trimestres: se lee el agregado
+      hired_by_quarter_summary (filas por par department/job y trimestre).
+    - En otro caso: date_trunc sobre hired_employees con un predicado de rango sargable.
+    Solo se cuentan contrataciones con department y job asignados (igual que las consultas de la sección 2).
+    """
+    _validate(grain, dimensions)
+    params = {"grain": grain, "start": start, "end": end}
+    use_rollup = grain in ("quarter", "year") and _quarter_start(start) and _quarter_start(end)
+
+    if use_rollup:
+        source = "s"
+        period = "date_trunc(:grain, make_date(s.year, s.quarter * 3 - 2, 1)::timestamp)"
+        measure = "SUM(s.hired)"
+        from_clause = f"{SUMMARY_TABLE} s"
+        # Comparación de filas (year, quarter) sobre la clave primaria del agregado
+        where = "(s.year, s.quarter) >= (:start_year, :start_quarter) AND (s.year, s.quarter) < (:end_year, :end_quarter)"
+        params.update(
+            start_year=start.year, start_quarter=(start.month - 1) // 3 + 1,
+            end_year=end.year, end_quarter=(end.month - 1) // 3 + 1,
+        )
+    else:
+        source = "e"
+        period = "date_trunc(:grain, e.datetime)"
+        measure = "COUNT(*)"
+        from_clause = "hired_employees e"
+        where = ("e.datetime >= :start AND e.datetime < :end "
+                 "AND e.department_id IS NOT NULL AND e.job_id IS NOT NULL")
+
+    columns = [f"{period} AS period"]
+    joins = []
+    for name in dimensions:
+        column, join = METRIC_DIMENSIONS[name]
+        columns.append(f"{column} AS {name}")
+        joins.append(join.format(source=source))
+    group_by = ", ".join(str(i) for i in range(1, len(columns) + 1))
+
+    query = text(f"""
+        SELECT {", ".join(columns)}, {measure} AS hired
+        FROM {from_clause}
+        {" ".join(joins)}
+        WHERE {where}
+        GROUP BY {group_by}
+        HAVING {measure} > 0
+        ORDER BY {group_by}
+    """)
+    return query, params, "rollup" if use_rollup else "raw"
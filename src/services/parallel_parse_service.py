@@ -0,0 +1,91 @@
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from src.services.parse_worker import read_partition  # noqa: F401  (reexportado)
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Procesos para parsear/validar particiones del CSV (1 = modo secuencial)
+PARSE_WORKERS = int(os.getenv("INGEST_PARSE_WORKERS", "1"))
+# Tamaño aproximado de cada partición (se corta siempre en un fin de línea fuera de comillas)
+PARTITION_BYTES = int(os.getenv("INGEST_PARTITION_MB", "16")) * 1024 * 1024
+
+# ============================================================
+#  PARTICIONADO DEL CSV EN LÍMITES DE LÍNEA
+# ============================================================
+
+def split_csv(file_path: str, partition_bytes: int = None):
+    """
+    Divide el archivo en rangos de bytes que terminan en un fin de línea fuera de comillas.
+    Lleva la paridad de comillas dobles (las escapadas "" suman dos) para no cortar un
+    campo entre comillas con saltos de línea embebidos: si el corte cae dentro de uno,
+    se avanza línea a línea hasta cerrarlo.
+    Devuelve (encabezado, [(inicio, fin), ...]).
+    """
+    partition_bytes = partition_bytes or PARTITION_BYTES
+    size = os.path.getsize(file_path)
+    ranges = []
+
+    with open(file_path, "rb") as f:
+        header = f.readline()
+        start = f.tell()
+        in_quotes = False
+        while start < size:
+            block = f.read(partition_bytes)
+            in_quotes ^= block.count(b'"') % 2 == 1
+            # Completar la línea actual y seguir mientras el salto quede dentro de comillas
+            while True:
+                line = f.readline()
+                in_quotes ^= line.count(b'"') % 2 == 1
+                if not line or not in_quotes:
+                    break
+            end = f.tell()
+            ranges.append((start, end))
+            start = end
+
+    return header, ranges
+
+# ============================================================
+#  POOL DE PROCESOS Y MAPEO ORDENADO DE PARTICIONES
+# ============================================================
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    """Pool persistente por cantidad de workers (spawn: seguro dentro de un servidor con hilos)."""
+    with _pools_lock:
+        if workers not in _pools:
+            _pools[workers] = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pools[workers]
+
+
+def map_partitions(fn, file_path: str, *args, workers: int = None, partition_bytes: int = None):
+    """
+    Ejecuta fn(file_path, header, inicio, fin, *args) sobre cada partición en el pool de procesos
+    y entrega los resultados en el orden original del archivo. `fn` debe vivir en un módulo
+    liviano (ver parse_worker): cada proceso spawn importa el módulo de `fn`.
+    Mantiene como máximo 2 × workers particiones en vuelo para acotar la memoria.
+    """
+    workers = workers or PARSE_WORKERS
+    header, ranges = split_csv(file_path, partition_bytes)
+    pool = _get_pool(workers)
+    logger.info("🧵 Parseo paralelo: %d particiones con %d procesos", len(ranges), workers)
+
+    pending = deque()
+    try:
+        for start, end in ranges:
+            pending.append(pool.submit(fn, file_path, header, start, end, *args))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
@@ -0,0 +1,22 @@
+"""
+🧵 Código que corre dentro de los procesos del pool de parseo paralelo.
+
+Los procesos se crean con spawn e importan solo este módulo: pandas y validation_service,
+sin src.config.database (engines y pools de conexiones) ni el QueueListener del logging.
+"""
+import io
+import pandas as pd
+from src.services.validation_service import validate_frame
+
+
+def read_partition(file_path: str, header: bytes, start: int, end: int) -> pd.DataFrame:
+    """Lee un rango de bytes del CSV anteponiendo el encabezado."""
+    with open(file_path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    return pd.read_csv(io.BytesIO(header + data))
+
+
+def parse_partition(file_path: str, header: bytes, start: int, end: int, table: str):
+    """Parsea y valida una partición del CSV; devuelve (df_válido, df_inválido)."""
+    return validate_frame(read_partition(file_path, header, start, end), table)
@@ -0,0 +1,212 @@
+"""
+🗂️ Particionado por rango de fechas de hired_employees (opcional).
+
+Con HIRED_EMPLOYEES_PARTITIONING=year|month la tabla se crea como
+PARTITION BY RANGE (datetime) con una partición DEFAULT; la ingesta crea antes de
+cada carga las particiones que el lote necesita. Las particiones viejas se pueden
+desacoplar (quedan como tablas de archivo) o eliminar:
+
+    python -m src.services.partition_service list
+    python -m src.services.partition_service detach --before 2020-01-01 [--drop]
+
+El modo se elige al crear la tabla: cambiarlo sobre una base existente requiere migrar los datos.
+"""
+import argparse
+import re
+import sys
+import threading
+from datetime import datetime
+import os
+import pandas as pd
+from sqlalchemy import text
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+PARTITION_GRAINS = ("none", "year", "month")
+PARTITIONING = os.getenv("HIRED_EMPLOYEES_PARTITIONING", "none").lower()
+if PARTITIONING not in PARTITION_GRAINS:
+    raise ValueError(f"HIRED_EMPLOYEES_PARTITIONING inválido: '{PARTITIONING}'. Debe ser uno de: {PARTITION_GRAINS}")
+
+PARTITIONED_TABLE = "hired_employees"
+DEFAULT_PARTITION = f"{PARTITIONED_TABLE}_default"
+HIRED_EMPLOYEES_PARTITIONED = PARTITIONING != "none"
+
+_BOUND_RE = re.compile(r"FROM \('([^']+)'\) TO \('([^']+)'\)")
+
+
+def is_partitioned(table: str) -> bool:
+    return HIRED_EMPLOYEES_PARTITIONED and table == PARTITIONED_TABLE
+
+# ============================================================
+#  LÍMITES Y NOMBRES DE PARTICIÓN
+# ============================================================
+
+def partition_bounds(period_start: datetime) -> tuple:
+    """(nombre, inicio, fin) de la partición que contiene a period_start."""
+    if PARTITIONING == "month":
+        start = datetime(period_start.year, period_start.month, 1)
+        end = datetime(start.year + start.month // 12, start.month % 12 + 1, 1)
+        return f"{PARTITIONED_TABLE}_m{start:%Y%m}", start, end
+    start = datetime(period_start.year, 1, 1)
+    return f"{PARTITIONED_TABLE}_y{start:%Y}", start, datetime(start.year + 1, 1, 1)
+
+
+def _periods(datetimes: pd.Series) -> list:
+    """Inicios de período distintos presentes en la columna (vectorizado)."""
+    values = pd.to_datetime(datetimes.dropna())
+    if values.empty:
+        return []
+    freq = "M" if PARTITIONING == "month" else "Y"
+    return [p.to_timestamp().to_pydatetime() for p in values.dt.to_period(freq).unique()]
+
+# ============================================================
+#  CREACIÓN DE PARTICIONES
+# ============================================================
+
+_known = set()
+_known_lock = threading.Lock()
+
+
+def install_partitions(target, connection, **kw):
+    """
+    Listener `after_create` de Base.metadata: crea la partición DEFAULT (recibe filas de
+    escrituras por fuera de la ingesta) y avisa si la tabla existente no coincide con el modo.
+    """
+    if connection.dialect.name != "postgresql" or not HIRED_EMPLOYEES_PARTITIONED:
+        return
+    relkind = connection.exec_driver_sql(
+        f"SELECT relkind FROM pg_class WHERE oid = '{PARTITIONED_TABLE}'::regclass"
+    ).scalar()
+    if relkind != "p":
+        logger.warning(
+            "⚠️ HIRED_EMPLOYEES_PARTITIONING=%s pero %s ya existe sin particionar; "
+            "se usa la tabla existente (migrar los datos para activar el particionado)",
+            PARTITIONING, PARTITIONED_TABLE,
+        )
+        return
+    connection.exec_driver_sql(
+        f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {PARTITIONED_TABLE} DEFAULT"
+    )
+
+
+def _create_partition(conn, name: str, start: datetime, end: datetime):
+    """Crea la partición; si la DEFAULT ya tiene filas del rango, las mueve a la nueva."""
+    bounds = {"start": start, "end": end}
+    in_default = conn.execute(text(
+        f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE datetime >= :start AND datetime < :end)"
+    ), bounds).scalar()
+    create = f"CREATE TABLE {name} PARTITION OF {PARTITIONED_TABLE} FOR VALUES FROM ('{start}') TO ('{end}')"
+
+    if not in_default:
+        conn.execute(text(create))
+    else:
+        # Movimiento directo entre particiones: no dispara los triggers de la tabla padre (el total no cambia)
+        conn.execute(text(f"ALTER TABLE {PARTITIONED_TABLE} DETACH PARTITION {DEFAULT_PARTITION}"))
+        conn.execute(text(create))
+        conn.execute(text(f"""
+            WITH moved AS (
+                DELETE FROM {DEFAULT_PARTITION} WHERE datetime >= :start AND datetime < :end RETURNING *
+            )
+            INSERT INTO {name} SELECT * FROM moved
+        """), bounds)
+        conn.execute(text(f"ALTER TABLE {PARTITIONED_TABLE} ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT"))
+    logger.info("🗂️ Partición %s creada [%s, %s)", name, start.date(), end.date())
+
+
+def list_partitions(conn) -> list:
+    """[(nombre, inicio, fin)] de las particiones con rango (sin la DEFAULT), ordenadas."""
+    rows = conn.execute(text(f"""
+        SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+        FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = '{PARTITIONED_TABLE}'::regclass
+    """)).all()
+    partitions = []
+    for name, bound in rows:
+        match = _BOUND_RE.search(bound or "")
+        if match:
+            partitions.append((name, datetime.fromisoformat(match.group(1)), datetime.fromisoformat(match.group(2))))
+    return sorted(partitions, key=lambda p: p[1])
+
+
+def ensure_partitions(bind, datetimes: pd.Series) -> list:
+    """
+    Crea las particiones que necesitan las fechas del lote, en una transacción corta y
+    propia (antes de la carga) serializada con un advisory lock. Devuelve las creadas.
+    La sesión que carga no debe tener abierta una transacción que ya leyó hired_employees
+    (el DDL esperaría a esa misma sesión; lock_timeout lo corta a los 10 s).
+    """
+    needed = {}
+    for period in _periods(datetimes):
+        name, start, end = partition_bounds(period)
+        if name not in _known:
+            needed[name] = (start, end)
+    if not needed:
+        return []
+
+    created = []
+    with bind.begin() as conn:
+        conn.execute(text("SET LOCAL lock_timeout = '10s'"))
+        conn.execute(text("SELECT pg_advisory_xact_lock(hashtext(:key))"), {"key": f"partitions:{PARTITIONED_TABLE}"})
+        existing = {name for name, _, _ in list_partitions(conn)}
+        for name, (start, end) in needed.items():
+            if name not in existing:
+                _create_partition(conn, name, start, end)
+                created.append(name)
+    with _known_lock:
+        _known.update(needed)
+    return created
+
+# ============================================================
+#  ARCHIVO DE PARTICIONES VIEJAS
+# ============================================================
+
+def detach_before(db, before: datetime, drop: bool = False) -> list:
+    """
+    Desacopla las particiones que terminan en o antes de `before` (quedan como tablas
+    independientes de archivo, o se eliminan con drop=True) y reconstruye el agregado
+    trimestral, ya que DETACH no dispara los triggers de hired_employees.
+    """
+    from src.services import quarterly_summary_service
+
+    detached = []
+    for name, _, end in list_partitions(db):
+        if end <= before:
+            db.execute(text(f"ALTER TABLE {PARTITIONED_TABLE} DETACH PARTITION {name}"))
+            if drop:
+                db.execute(text(f"DROP TABLE {name}"))
+            detached.append(name)
+    db.commit()
+    with _known_lock:
+        _known.difference_update(detached)
+
+    if detached:
+        logger.info("📦 Particiones %s: %s", "eliminadas" if drop else "archivadas", ", ".join(detached))
+        quarterly_summary_service.rebuild(db)
+    return detached
+
+
+if __name__ == "__main__":
+    from src.config.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Gestión de particiones de hired_employees")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list", help="Lista las particiones con su rango")
+    detach = sub.add_parser("detach", help="Desacopla (archiva) particiones viejas")
+    detach.add_argument("--before", required=True, type=datetime.fromisoformat, help="Fecha límite (YYYY-MM-DD)")
+    detach.add_argument("--drop", action="store_true", help="Eliminar en lugar de archivar")
+    args = parser.parse_args()
+
+    session = SessionLocal()
+    try:
+        if args.command == "list":
+            for name, start, end in list_partitions(session):
+                print(f"{name}: [{start:%Y-%m-%d}, {end:%Y-%m-%d})")
+        else:
+            names = detach_before(session, args.before, args.drop)
+            print(f"✅ {len(names)} particiones {'eliminadas' if args.drop else 'archivadas'}: {', '.join(names) or '-'}")
+    except Exception as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        session.close()
@@ -0,0 +1,137 @@
+"""
+📊 Agregado trimestral de contrataciones (hired_by_quarter_summary).
+
+Lo mantienen triggers por sentencia sobre hired_employees (INSERT, UPDATE, DELETE
+y TRUNCATE), así que cualquier escritura lo actualiza en la misma transacción:
+la ingesta, seed_data.sql, inserts del ORM o correcciones manuales.
+Se puede reconstruir completo para backfills:
+
+    python -m src.services.quarterly_summary_service rebuild
+"""
+import sys
+from sqlalchemy import text
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+SUMMARY_TABLE = "hired_by_quarter_summary"
+SYNC_FUNCTION = "hired_by_quarter_summary_sync"
+
+# Conteos por (año, trimestre, department_id, job_id) de un conjunto de filas con esas columnas
+_GROUPED = """
+    SELECT EXTRACT(YEAR FROM datetime)::int AS year,
+           EXTRACT(QUARTER FROM datetime)::int AS quarter,
+           department_id, job_id, COUNT(*) AS hired
+    FROM {rows} r
+    WHERE datetime IS NOT NULL AND department_id IS NOT NULL AND job_id IS NOT NULL
+    GROUP BY 1, 2, 3, 4
+"""
+
+# ============================================================
+#  MANTENIMIENTO INCREMENTAL (TRIGGERS SOBRE hired_employees)
+# ============================================================
+
+# Las tablas de transición tienen exactamente las filas que la sentencia cambió
+# (ya bloqueadas), por lo que dos upserts concurrentes del mismo id no restan dos
+# veces la misma versión. Los grupos se suman en orden para bloquear siempre igual.
+_SYNC_FUNCTION_SQL = f"""
+CREATE OR REPLACE FUNCTION {SYNC_FUNCTION}() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+        TRUNCATE TABLE {SUMMARY_TABLE};
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        UPDATE {SUMMARY_TABLE} t SET hired = t.hired - o.hired
+        FROM ({_GROUPED.format(rows="old_rows")}) o
+        WHERE t.year = o.year AND t.quarter = o.quarter
+          AND t.department_id = o.department_id AND t.job_id = o.job_id;
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO {SUMMARY_TABLE} (year, quarter, department_id, job_id, hired)
+        {_GROUPED.format(rows="new_rows")}
+        ORDER BY 1, 2, 3, 4
+        ON CONFLICT (year, quarter, department_id, job_id)
+        DO UPDATE SET hired = {SUMMARY_TABLE}.hired + EXCLUDED.hired;
+    END IF;
+
+    RETURN NULL;
+END
+$$
+"""
+
+# Las tablas de transición solo se permiten en triggers de un único evento
+_TRIGGERS_SQL = [
+    f"""CREATE OR REPLACE TRIGGER {SUMMARY_TABLE}_ins AFTER INSERT ON hired_employees
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION {SYNC_FUNCTION}()""",
+    f"""CREATE OR REPLACE TRIGGER {SUMMARY_TABLE}_upd AFTER UPDATE ON hired_employees
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION {SYNC_FUNCTION}()""",
+    f"""CREATE OR REPLACE TRIGGER {SUMMARY_TABLE}_del AFTER DELETE ON hired_employees
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION {SYNC_FUNCTION}()""",
+    f"""CREATE OR REPLACE TRIGGER {SUMMARY_TABLE}_trunc AFTER TRUNCATE ON hired_employees
+        FOR EACH STATEMENT EXECUTE FUNCTION {SYNC_FUNCTION}()""",
+]
+
+
+def install_triggers(target, connection, **kw):
+    """
+    Crea (o reemplaza) la función y los triggers de sincronización.
+    Registrado como listener `after_create` de Base.metadata, corre en cada create_all.
+    """
+    if connection.dialect.name != "postgresql":
+        return
+    connection.exec_driver_sql(_SYNC_FUNCTION_SQL)
+    for statement in _TRIGGERS_SQL:
+        connection.exec_driver_sql(statement)
+
+# ============================================================
+#  RECONSTRUCCIÓN COMPLETA (BACKFILL)
+# ============================================================
+
+def rebuild(db):
+    """Recalcula el agregado completo desde hired_employees."""
+    db.execute(text(f"TRUNCATE TABLE {SUMMARY_TABLE}"))
+    result = db.execute(text(f"""
+        INSERT INTO {SUMMARY_TABLE} (year, quarter, department_id, job_id, hired)
+        {_GROUPED.format(rows="hired_employees")}
+    """))
+    db.commit()
+    logger.info("📊 %s reconstruida (%d grupos)", SUMMARY_TABLE, result.rowcount)
+    return result.rowcount
+
+
+def rebuild_if_stale(db) -> bool:
+    """
+    Verificación al iniciar: reconstruye si el total del agregado no coincide con las
+    contrataciones agrupables (p. ej. datos cargados antes de instalar los triggers).
+    """
+    summarized, expected = db.execute(text(f"""
+        SELECT (SELECT COALESCE(SUM(hired), 0) FROM {SUMMARY_TABLE}),
+               (SELECT COUNT(*) FROM hired_employees
+                WHERE datetime IS NOT NULL AND department_id IS NOT NULL AND job_id IS NOT NULL)
+    """)).one()
+    db.commit()
+    if summarized == expected:
+        return False
+    logger.warning("⚠️ %s desincronizada (%s vs %s contrataciones), reconstruyendo", SUMMARY_TABLE, summarized, expected)
+    rebuild(db)
+    return True
+
+
+if __name__ == "__main__":
+    from src.config.database import SessionLocal
+
+    if sys.argv[1:] != ["rebuild"]:
+        print("Uso: python -m src.services.quarterly_summary_service rebuild", file=sys.stderr)
+        sys.exit(2)
+    session = SessionLocal()
+    try:
+        print(f"✅ {rebuild(session)} grupos recalculados en {SUMMARY_TABLE}")
+    finally:
+        session.close()
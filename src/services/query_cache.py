@@ -0,0 +1,98 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Resultados retenidos (LRU) y segundos de validez para cambios hechos fuera de este proceso
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "256"))
+QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", "30"))
+
+# ============================================================
+#  CACHÉ VERSIONADO DE RESULTADOS DE CONSULTAS
+# ============================================================
+
+class QueryResultCache:
+    """
+    Resultados de las consultas en memoria con desalojo LRU.
+    - La clave incluye el endpoint, sus parámetros y la versión de datos vigente.
+    - La ingesta llama a bump_version() después de cada commit: las entradas de la
+      versión anterior dejan de servirse y se descartan.
+    - Las escrituras de otros workers o por fuera de la ingesta no suben la versión
+      local; el TTL acota cuánto puede servirse un resultado en ese caso.
+    """
+
+    def __init__(self, max_entries: int = QUERY_CACHE_SIZE, ttl: float = QUERY_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._version = 0
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def bump_version(self):
+        """Invalida todos los resultados (se llama después del commit de una ingesta)."""
+        with self._lock:
+            self._version += 1
+            self._entries.clear()
+
+    def get(self, key: tuple):
+        """Devuelve (encontrado, valor) para la clave en la versión actual."""
+        with self._lock:
+            entry = self._entries.get((self._version, key))
+            if entry is None or time.monotonic() - entry[0] >= self.ttl:
+                self._misses += 1
+                return False, None
+            self._entries.move_to_end((self._version, key))
+            self._hits += 1
+            return True, entry[1]
+
+    def put(self, key: tuple, value, version: int):
+        """Guarda el valor calculado con los datos de `version` (se ignora si la versión ya cambió)."""
+        with self._lock:
+            if version != self._version:
+                return
+            self._entries[(version, key)] = (time.monotonic(), value)
+            self._entries.move_to_end((version, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    async def get_or_compute_async(self, key: tuple, compute):
+        """Sirve el resultado desde memoria o lo calcula con la corrutina `compute()` y lo guarda."""
+        found, value = self.get(key)
+        if found:
+            return value
+        version = self._version
+        value = await compute()
+        self.put(key, value, version)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._hits = 0
+            self._misses = 0
+
+    def stats(self) -> dict:
+        """Métricas para monitoreo."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "data_version": self._version,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+query_cache = QueryResultCache()
@@ -0,0 +1,231 @@
+"""
+🗃️ Almacén de filas rechazadas por carga (tabla ingest_rejects).
+
+Cada carga tiene un upload_id (el job_id en las cargas asíncronas) y sus rechazos se
+guardan con el motivo, el error y la fila original (JSON):
+
+    invalid            validación de formato, tipos o nulos
+    duplicate_in_file  id repetido dentro del mismo archivo
+    duplicate          id ya existente en la tabla (on_conflict=skip)
+    foreign_key        department_id / job_id inexistente
+
+La ingesta solo encola los lotes; un hilo escritor los serializa y los agrega con un
+único COPY por tanda, fuera del camino de la request. La cola está acotada en filas
+(REJECT_QUEUE_ROWS) y en lotes (REJECT_QUEUE_SIZE): si un lote no entra, la ingesta lo
+escribe ella misma en lugar de retenerlo en memoria o descartarlo. Los rechazos de más
+de REJECT_RETENTION_DAYS días se eliminan periódicamente.
+"""
+import atexit
+import io
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import Counter
+import pandas as pd
+from sqlalchemy import text
+from src.config import database
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+REASONS = ("invalid", "duplicate_in_file", "duplicate", "foreign_key")
+
+# Lotes y filas en cola como máximo; por encima la ingesta escribe sus rechazos directamente
+REJECT_QUEUE_SIZE = int(os.getenv("REJECT_QUEUE_SIZE", "256"))
+REJECT_QUEUE_ROWS = int(os.getenv("REJECT_QUEUE_ROWS", "50000"))
+REJECT_RETENTION_DAYS = int(os.getenv("REJECT_RETENTION_DAYS", "7"))
+# Lotes agrupados como máximo en un mismo COPY
+REJECT_WRITE_BATCHES = 64
+PRUNE_INTERVAL_SECONDS = 3600
+MAX_PAGE_SIZE = 1000
+
+COPY_COLUMNS = ["upload_id", "table_name", "reason", "error", "data"]
+
+
+def new_upload_id() -> str:
+    return uuid.uuid4().hex
+
+
+def _copy_frame(upload_id: str, table: str, reason: str, rows) -> pd.DataFrame:
+    """Filas de ingest_rejects para un lote: la columna 'error' se separa y el resto va como JSON."""
+    frame = rows if isinstance(rows, pd.DataFrame) else pd.DataFrame(rows)
+    errors = frame["error"].astype(object).where(frame["error"].notna(), None) if "error" in frame else None
+    data = frame.drop(columns="error", errors="ignore").to_json(
+        orient="records", lines=True, date_format="iso", force_ascii=False
+    ).splitlines()
+    return pd.DataFrame({
+        "upload_id": upload_id,
+        "table_name": table,
+        "reason": reason,
+        "error": errors.tolist() if errors is not None else None,
+        "data": data,
+    }, columns=COPY_COLUMNS)
+
+# ============================================================
+#  ESCRITOR EN SEGUNDO PLANO
+# ============================================================
+
+class RejectWriter:
+    """Cola acotada (lotes y filas) de rechazos y un hilo que los escribe con COPY."""
+
+    def __init__(self, queue_size: int = REJECT_QUEUE_SIZE, queue_rows: int = REJECT_QUEUE_ROWS):
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._max_rows = queue_rows
+        self._queued_rows = 0
+        self._pending = Counter()
+        self._done = threading.Condition()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._pruned_at = 0.0
+        self.written = 0
+        self.failed = 0
+        self.direct = 0
+
+    def submit(self, upload_id: str, table: str, reason: str, rows):
+        """
+        Encola un lote (DataFrame o lista de dicts). Si no entra en la cola (REJECT_QUEUE_ROWS
+        filas o REJECT_QUEUE_SIZE lotes) se escribe en el hilo que llama: la memoria retenida
+        por rechazos no crece con la tasa de rechazos.
+        """
+        if upload_id is None or not len(rows):
+            return
+        self._start()
+        item = (upload_id, table, reason, rows)
+        with self._done:
+            queued = self._queued_rows + len(rows) <= self._max_rows
+            if queued:
+                try:
+                    self._queue.put_nowait(item)
+                except queue.Full:
+                    queued = False
+                else:
+                    self._queued_rows += len(rows)
+                    self._pending[upload_id] += 1
+        if not queued:
+            with self._done:
+                self.direct += len(rows)
+            self._write([item])
+
+    def flush(self, upload_id: str = None, timeout: float = None) -> bool:
+        """Espera a que se escriban los lotes de `upload_id` (o todos). False si vence el timeout."""
+        def idle():
+            return not self._pending[upload_id] if upload_id else not sum(self._pending.values())
+
+        with self._done:
+            return self._done.wait_for(idle, timeout)
+
+    def pending(self, upload_id: str = None) -> int:
+        with self._done:
+            return self._pending[upload_id] if upload_id else sum(self._pending.values())
+
+    def stats(self) -> dict:
+        return {
+            "pending_batches": self.pending(), "written_rows": self.written,
+            "failed_rows": self.failed, "direct_rows": self.direct,
+        }
+
+    def _start(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="reject-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < REJECT_WRITE_BATCHES:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write(batch)
+            finally:
+                with self._done:
+                    for upload_id, _, _, rows in batch:
+                        self._queued_rows -= len(rows)
+                        self._pending[upload_id] -= 1
+                        if not self._pending[upload_id]:
+                            del self._pending[upload_id]
+                    self._done.notify_all()
+
+    def _write(self, batch: list):
+        try:
+            frame = pd.concat([_copy_frame(*item) for item in batch], ignore_index=True)
+        except Exception as e:
+            logger.error("❌ No se pudieron serializar %d lotes de rechazos: %s", len(batch), e, exc_info=True)
+            return
+        if database.engine is None:
+            return
+
+        conn = database.engine.raw_connection()
+        try:
+            with conn.driver_connection.cursor() as cursor:
+                buffer = io.StringIO()
+                frame.to_csv(buffer, index=False, header=False)
+                with cursor.copy(f"COPY ingest_rejects ({', '.join(COPY_COLUMNS)}) FROM STDIN WITH (FORMAT csv)") as copy:
+                    copy.write(buffer.getvalue())
+                if time.monotonic() - self._pruned_at > PRUNE_INTERVAL_SECONDS:
+                    cursor.execute(
+                        "DELETE FROM ingest_rejects WHERE created_at < now() - make_interval(days => %s)",
+                        (REJECT_RETENTION_DAYS,),
+                    )
+                    self._pruned_at = time.monotonic()
+            conn.commit()
+            with self._done:
+                self.written += len(frame)
+        except Exception as e:
+            conn.rollback()
+            with self._done:
+                self.failed += len(frame)
+            logger.error("❌ No se pudieron guardar %d rechazos: %s", len(frame), e, exc_info=True)
+        finally:
+            conn.close()
+
+
+reject_writer = RejectWriter()
+# Al terminar el proceso se esperan los lotes en cola (con tope para no colgar el apagado)
+atexit.register(reject_writer.flush, None, 10)
+
+# ============================================================
+#  CONSULTA PAGINADA
+# ============================================================
+
+def list_rejects(db, upload_id: str, reason: str = None, after: int = 0, limit: int = 100) -> dict:
+    """
+    Página de rechazos de una carga en orden de llegada. Paginación por cursor:
+    `next_after` se pasa como `after` para pedir la página siguiente (None = no hay más).
+    """
+    params = {"upload_id": upload_id, "after": after, "limit": limit + 1}
+    condition = ""
+    if reason:
+        condition = " AND reason = :reason"
+        params["reason"] = reason
+
+    rows = db.execute(text(f"""
+        SELECT id, table_name, reason, error, data, created_at
+        FROM ingest_rejects
+        WHERE upload_id = :upload_id AND id > :after{condition}
+        ORDER BY id
+        LIMIT :limit
+    """), params).mappings().all()
+
+    items = [
+        {
+            "id": row["id"],
+            "table": row["table_name"],
+            "reason": row["reason"],
+            "error": row["error"],
+            "row": row["data"],
+            "created_at": row["created_at"].isoformat(),
+        }
+        for row in rows[:limit]
+    ]
+    return {
+        "upload_id": upload_id,
+        "items": items,
+        "next_after": items[-1]["id"] if len(rows) > limit else None,
+        "pending_batches": reject_writer.pending(upload_id),
+    }
@@ -0,0 +1,83 @@
+"""
+✅ Esquema esperado por tabla y validación columnar de los DataFrames de la ingesta.
+
+Solo depende de pandas: lo importan los procesos del pool de parseo (parse_worker),
+que no deben cargar la configuración de base de datos, los pools ni el logging.
+"""
+import pandas as pd
+
+# Columnas esperadas por tabla
+EXPECTED_COLUMNS = {
+    "departments": ["id", "department"],
+    "jobs": ["id", "job"],
+    "hired_employees": ["id", "name", "datetime", "department_id", "job_id"],
+}
+
+# Columnas que deben poder convertirse a número
+NUMERIC_COLUMNS = {
+    "departments": ["id"],
+    "jobs": ["id"],
+    "hired_employees": ["id", "department_id", "job_id"],
+}
+
+NULL_FIELDS_ERROR = "Campos obligatorios nulos"
+
+
+def check_columns(received: list, table: str):
+    """Encabezados exactos y en el orden de EXPECTED_COLUMNS (misma regla para todos los formatos)."""
+    if list(received) != EXPECTED_COLUMNS[table]:
+        raise ValueError(
+            f"Estructura inválida: faltan columnas esperadas para {table}. "
+            f"Cabeceras recibidas: {list(received)}"
+        )
+
+
+def _datetime_error(value) -> str:
+    """Reproduce el mensaje de pandas para un valor de fecha que no se pudo interpretar."""
+    try:
+        pd.to_datetime(value, errors="raise", utc=True)
+    except Exception as e:
+        return str(e)
+    return f"Formato de fecha no ISO 8601: {value}"
+
+
+def validate_frame(df: pd.DataFrame, table: str):
+    """
+    Valida un DataFrame de forma columnar (máscaras booleanas, sin iterar filas).
+    Devuelve (df_válido, df_inválido) donde df_inválido incluye la columna 'error'.
+    """
+    columns = EXPECTED_COLUMNS[table]
+    df = df.dropna(how="all")
+
+    # Motivo del rechazo por fila (gana el primer error detectado, igual que antes)
+    reasons = pd.Series(None, index=df.index, dtype=object)
+    reasons[df[columns].isna().any(axis=1)] = NULL_FIELDS_ERROR
+
+    if table == "hired_employees":
+        parsed = pd.to_datetime(df["datetime"], format="ISO8601", utc=True, errors="coerce")
+        bad_dates = parsed.isna() & reasons.isna()
+        if bad_dates.any():
+            bad_values = df.loc[bad_dates, "datetime"]
+            messages = {value: _datetime_error(value) for value in bad_values.unique()}
+            reasons[bad_dates] = bad_values.map(messages)
+
+    numeric = {}
+    for column in NUMERIC_COLUMNS[table]:
+        numeric[column] = pd.to_numeric(df[column], errors="coerce")
+        reasons[numeric[column].isna() & reasons.isna()] = f"Valor no numérico en {column}"
+
+    valid_mask = reasons.isna()
+    invalid_df = df.loc[~valid_mask].assign(error=reasons[~valid_mask])
+
+    valid_df = df.loc[valid_mask].copy()
+    for column, values in numeric.items():
+        valid_df[column] = values[valid_mask]
+
+    if table == "hired_employees":
+        valid_df["datetime"] = parsed[valid_mask]
+        valid_df = valid_df.where(pd.notnull(valid_df), None)
+    else:
+        valid_df = valid_df.where(pd.notnull(valid_df), None)
+        valid_df["id"] = valid_df["id"].astype(int)
+
+    return valid_df, invalid_df
@@ -14,21 +14,18 @@ Columnas:
 ------------------------------------------------------------
 */
 
-SELECT 
+WITH counts AS (
+    -- Un solo recorrido: conteo por departamento y promedio con ventana sobre esos conteos
+    SELECT department_id, COUNT(*) AS hired, AVG(COUNT(*)) OVER () AS mean
+    FROM hired_employees
+    WHERE datetime >= '2021-01-01' AND datetime < '2022-01-01'
+    GROUP BY department_id
+)
+SELECT
     d.id AS id,
     d.department AS department,
-    COUNT(e.id) AS hired
-FROM hired_employees e
-JOIN departments d ON e.department_id = d.id
-WHERE EXTRACT(YEAR FROM e.datetime) = 2021
-GROUP BY d.id, d.department
-HAVING COUNT(e.id) > (
-    SELECT AVG(sub.hired)
-    FROM (
-        SELECT COUNT(id) AS hired
-        FROM hired_employees
-        WHERE EXTRACT(YEAR FROM datetime) = 2021
-        GROUP BY department_id
-    ) AS sub
-)
+    c.hired AS hired
+FROM counts c
+JOIN departments d ON c.department_id = d.id
+WHERE c.hired > c.mean
 ORDER BY hired DESC;
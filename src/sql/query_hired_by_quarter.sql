@@ -18,6 +18,6 @@ SELECT
 FROM hired_employees e
 JOIN departments d ON e.department_id = d.id
 JOIN jobs j ON e.job_id = j.id
-WHERE EXTRACT(YEAR FROM e.datetime) = 2021
+WHERE e.datetime >= '2021-01-01' AND e.datetime < '2022-01-01'
 GROUP BY d.department, j.job
 ORDER BY d.department ASC, j.job ASC;
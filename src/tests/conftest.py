@@ -2,6 +2,7 @@ import pytest
 from sqlalchemy import text
 from src.config.database import SessionLocal, Base, engine
 from src.models.models import Department, Job, HiredEmployee
+from src.services.query_cache import query_cache
 
 
 # ⚙️ Crear tablas automáticamente antes de los tests (solo si engine existe)
@@ -26,10 +27,15 @@ def clean_db():
         db.execute(text("TRUNCATE TABLE hired_employees RESTART IDENTITY CASCADE;"))
         db.execute(text("TRUNCATE TABLE jobs RESTART IDENTITY CASCADE;"))
         db.execute(text("TRUNCATE TABLE departments RESTART IDENTITY CASCADE;"))
+        db.execute(text("TRUNCATE TABLE hired_by_quarter_summary;"))
+        db.execute(text("TRUNCATE TABLE ingest_rejects;"))
         db.commit()
     finally:
         db.close()
 
+    # Los tests escriben directo en la base (sin pasar por la ingesta)
+    query_cache.clear()
+
 
 @pytest.fixture
 def seed_base_data():
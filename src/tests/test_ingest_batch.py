@@ -194,3 +194,603 @@ def test_upload_hired_employees_with_invalid_fk():
 
     # Validar mensaje coherente
     assert "rechazadas por fk" in data["message"].lower()
+
+
+# ============================================================
+# 🚚 TEST: CARGA MASIVA CON COPY Y FALLBACK POR FILA
+# ============================================================
+
+def test_insert_batch_copy_isolates_fk_failures(seed_base_data):
+    """
+    ✅ Test: la carga con COPY inserta las filas válidas del lote
+    y solo rechaza por FK (anti-join en staging) las filas huérfanas, con su motivo.
+    """
+    import pandas as pd
+    from sqlalchemy import text
+    from src.config.database import SessionLocal
+    from src.services.batch_insert_service import insert_batch
+
+    df = pd.DataFrame([
+        {"id": i, "name": f"Emp {i}", "datetime": "2021-05-01T10:00:00Z",
+         "department_id": 999 if i in (3, 7) else 1, "job_id": 1}
+        for i in range(1, 11)
+    ])
+
+    db = SessionLocal()
+    try:
+        result = insert_batch(db, df, "hired_employees")
+        stored = db.execute(text("SELECT COUNT(*) FROM hired_employees")).scalar()
+    finally:
+        db.close()
+
+    assert result["inserted"] == 8
+    assert stored == 8
+    rejected_ids = sorted(r["id"] for r in result["summary"]["rejected_rows"])
+    assert rejected_ids == [3, 7]
+    assert all("foreign key" in r["error"] for r in result["summary"]["rejected_rows"])
+    assert all("department_id=999 no existe en departments" in r["error"]
+               for r in result["summary"]["rejected_rows"])
+
+
+# ============================================================
+# 🌊 TEST: INGESTA EN STREAMING SIN LÍMITE DE BATCH
+# ============================================================
+
+def test_upload_stream_exceeds_batch_limit(tmp_path, seed_base_data, monkeypatch):
+    """
+    ✅ Test: el endpoint de streaming acepta más filas que MAX_BATCH_SIZE
+    y las procesa por chunks devolviendo un resumen combinado.
+    """
+    import csv
+    from src.services import batch_insert_service
+    from src.services.batch_insert_service import MAX_BATCH_SIZE
+
+    monkeypatch.setattr(batch_insert_service, "STREAM_CHUNK_SIZE", 700)
+    rows = MAX_BATCH_SIZE + 500
+    path = tmp_path / "big_hired.csv"
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "name", "datetime", "department_id", "job_id"])
+        for i in range(1, rows + 1):
+            writer.writerow([i if i != rows else 1, f"Employee {i}", "2021-06-01T10:00:00Z", 1, 1])
+
+    with open(path, "rb") as f:
+        response = client.post(
+            "/api/ingest/upload/stream/",
+            data={"type": "hired_employees"},
+            files={"file": ("big_hired.csv", f, "text/csv")}
+        )
+
+    data = response.json()
+    assert response.status_code == 200
+    assert data["inserted"] == rows - 1
+    assert data["duplicates"] == 1
+    assert data["chunks"] == 4
+
+
+# ============================================================
+# 🧾 TEST: INGESTA ASÍNCRONA CON JOB ID
+# ============================================================
+
+def test_upload_async_job_reports_progress_and_summary(setup_csv_files, seed_base_data):
+    """
+    ✅ Test: mode=async responde 202 con un job_id y el endpoint de estado
+    devuelve el progreso y el resumen final de la ingesta.
+    """
+    import time
+
+    with open(setup_csv_files["hired"], "rb") as f:
+        response = client.post(
+            "/api/ingest/upload/",
+            data={"type": "hired_employees", "mode": "async"},
+            files={"file": ("hired_employees.csv", f, "text/csv")}
+        )
+
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+
+    deadline = time.time() + 30
+    job = client.get(f"/api/ingest/jobs/{job_id}").json()
+    while job["status"] in ("queued", "running") and time.time() < deadline:
+        time.sleep(0.05)
+        job = client.get(f"/api/ingest/jobs/{job_id}").json()
+
+    assert job["status"] == "completed", job.get("error")
+    assert job["progress"]["parsed"] == 1000
+    assert job["progress"]["inserted"] == job["result"]["inserted"] == 1000
+    assert client.get("/api/ingest/jobs/does-not-exist").status_code == 404
+
+
+def test_job_registry_is_shared_through_the_database(monkeypatch):
+    """
+    ✅ Test: el estado de los trabajos vive en ingest_jobs (visible desde otro worker)
+    y solo se conservan los MAX_TRACKED_JOBS terminados más recientes.
+    """
+    from sqlalchemy import text
+    from src.config.database import SessionLocal
+    from src.services import job_service
+
+    monkeypatch.setattr(job_service, "MAX_TRACKED_JOBS", 1)
+    old = job_service.create_job("jobs", "old.csv")
+    job_service.mark_failed(old["job_id"], "boom")
+    recent = job_service.create_job("jobs", "recent.csv")
+    job_service.mark_completed(recent["job_id"], {"inserted": 3})
+    pending = job_service.create_job("jobs", "pending.csv")
+
+    db = SessionLocal()
+    try:
+        stored = dict(db.execute(text("SELECT job_id, status FROM ingest_jobs")).all())
+    finally:
+        db.close()
+
+    assert stored == {recent["job_id"]: "completed", pending["job_id"]: "queued"}
+    assert job_service.get_job(recent["job_id"])["result"] == {"inserted": 3}
+
+
+# ============================================================
+# 🔁 TEST: POLÍTICAS ON CONFLICT (skip / update / error)
+# ============================================================
+
+def test_upload_conflict_policies():
+    """✅ Test: ids existentes se omiten, se actualizan o rechazan el lote según on_conflict."""
+    from sqlalchemy import text
+    from src.config.database import SessionLocal
+
+    def upload(content: bytes, policy: str):
+        return client.post(
+            "/api/ingest/upload/",
+            data={"type": "departments", "on_conflict": policy},
+            files={"file": ("departments.csv", io.BytesIO(content), "text/csv")}
+        )
+
+    assert upload(b"id,department\n1,Sales\n2,Legal\n", "skip").json()["inserted"] == 2
+
+    skipped = upload(b"id,department\n2,Legal v2\n3,Support\n", "skip").json()
+    assert skipped["inserted"] == 1
+    assert skipped["duplicates"] == 1
+
+    updated = upload(b"id,department\n1,Sales v2\n4,Training\n", "update").json()
+    assert updated["inserted"] == 1
+    assert updated["summary"]["updated"] == 1
+
+    conflict = upload(b"id,department\n3,Support v2\n5,Marketing\n", "error")
+    assert conflict.status_code == 409
+
+    db = SessionLocal()
+    try:
+        rows = dict(db.execute(text("SELECT id, department FROM departments ORDER BY id")).all())
+    finally:
+        db.close()
+    assert rows == {1: "Sales v2", 2: "Legal", 3: "Support", 4: "Training"}
+
+
+def test_insert_batch_falls_back_to_bisection_on_fk_error(seed_base_data, monkeypatch):
+    """✅ Test: si el caché y el anti-join no detectan la FK inválida, el INSERT se divide hasta aislar la fila."""
+    import pandas as pd
+    from src.config.database import SessionLocal
+    from src.services import batch_insert_service, bulk_load_service
+    from src.services.batch_insert_service import insert_batch
+
+    monkeypatch.setattr(bulk_load_service, "FOREIGN_KEYS", {})
+    monkeypatch.setattr(batch_insert_service, "FOREIGN_KEYS", {})
+    df = pd.DataFrame([
+        {"id": i, "name": f"Emp {i}", "datetime": "2021-05-01T10:00:00Z",
+         "department_id": 999 if i == 5 else 1, "job_id": 1}
+        for i in range(1, 9)
+    ])
+
+    db = SessionLocal()
+    try:
+        result = insert_batch(db, df, "hired_employees")
+    finally:
+        db.close()
+
+    assert result["inserted"] == 7
+    assert [r["id"] for r in result["summary"]["rejected_rows"]] == [5]
+    assert "foreign key" in result["summary"]["rejected_rows"][0]["error"]
+
+
+# ============================================================
+# 🗂️ TEST: CACHÉ DE IDS DE DIMENSIONES
+# ============================================================
+
+def test_dimension_cache_prevalidates_and_detects_new_ids(seed_base_data):
+    """
+    ✅ Test: el caché rechaza FK huérfanas antes del SQL de carga, se refresca con la
+    ingesta de la dimensión y detecta ids creados por fuera (otro worker).
+    """
+    import pandas as pd
+    from sqlalchemy import text
+    from src.config.database import SessionLocal
+    from src.services.dimension_cache import dimension_cache, reject_unknown_fk
+
+    foreign_keys = [("department_id", "departments"), ("job_id", "jobs")]
+    frame = pd.DataFrame({"id": [1, 2, 3], "department_id": [1, 50, 60], "job_id": [1, 1, 70]})
+
+    db = SessionLocal()
+    try:
+        dimension_cache.invalidate()
+        valid, rejected = reject_unknown_fk(db, frame, foreign_keys)
+        assert valid["id"].tolist() == [1]
+        assert rejected[1]["error"] == (
+            "foreign key violation: department_id=60 no existe en departments; job_id=70 no existe en jobs"
+        )
+
+        # Alta por fuera de la ingesta: el TTL no venció, pero la verificación de versión lo detecta
+        db.execute(text("INSERT INTO departments (id, department) VALUES (50, 'New')"))
+        db.commit()
+        valid, rejected = reject_unknown_fk(db, frame, foreign_keys)
+        assert valid["id"].tolist() == [1, 2]
+    finally:
+        db.close()
+
+    # La ingesta de departments refresca el caché al hacer commit
+    client.post(
+        "/api/ingest/upload/",
+        data={"type": "departments"},
+        files={"file": ("departments.csv", io.BytesIO(b"id,department\n60,Other\n"), "text/csv")}
+    )
+    assert 60 in dimension_cache._entries["departments"]["ids"]
+
+
+# ============================================================
+# ⏱️ TEST: TIEMPOS POR ETAPA Y PROFILING
+# ============================================================
+
+def test_upload_reports_stage_timings_and_optional_profile(monkeypatch):
+    """✅ Test: summary.timings por etapa, línea de log estructurada y perfil con X-Ingest-Profile."""
+    import json
+    import os
+    from src.utils import timing
+
+    logged = []
+    monkeypatch.setattr(timing.logger, "info", lambda msg, *args, **kwargs: logged.append(msg % args))
+
+    def upload(headers=None):
+        return client.post(
+            "/api/ingest/upload/",
+            data={"type": "jobs"},
+            files={"file": ("jobs.csv", io.BytesIO(b"id,job\n1,Dev\n2,QA\n3,\n"), "text/csv")},
+            headers=headers or {},
+        ).json()
+
+    data = upload()
+    stages = data["summary"]["timings"]["stages"]
+    assert list(stages) == ["read_csv", "validate", "reports", "dedupe", "prepare", "fk_filter",
+                            "copy", "fk_antijoin", "merge", "commit"]
+    assert stages["read_csv"]["rows"] == 3 and stages["merge"]["rows"] == 2
+    assert all(s["seconds"] >= 0 and "peak_rss_delta_mb" in s for s in stages.values())
+    assert "profile" not in data["summary"]
+
+    record = json.loads(next(line for line in logged if line.startswith("⏱️ ingest_timings")).split(" ", 2)[2])
+    assert (record["operation"], record["table"], record["status"]) == ("insert_batch", "jobs", "ok")
+
+    profile = upload({"X-Ingest-Profile": "1"})["summary"]["profile"]
+    assert profile["profiler"] == "cprofile" and os.path.exists(profile["path"])
+    assert any("insert_batch" in f["function"] for f in profile["top"])
+    os.remove(profile["path"])
+
+
+# ============================================================
+# 🗂️ PARTICIONADO POR RANGO DE FECHAS (base aparte)
+# ============================================================
+
+PARTITIONED_DB = "landing_partitioned"
+
+PARTITIONED_SCRIPT = textwrap.dedent("""
+    import json
+    import pandas as pd
+    from sqlalchemy import text
+    from src.config.database import Base, engine, SessionLocal
+    from src.models import models  # noqa: F401
+    from src.api.queries import above_mean_query
+    from src.services.batch_insert_service import insert_batch
+    from src.services.bulk_load_service import DuplicateKeyError
+    from src.services.partition_service import list_partitions, detach_before, DEFAULT_PARTITION
+
+    def hired(rows):
+        return pd.DataFrame(rows, columns=["id", "name", "datetime", "department_id", "job_id"])
+
+    def count(db, table):
+        # Cierra la transacción de lectura: la creación de particiones usa otra conexión
+        value = db.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar()
+        db.commit()
+        return value
+
+    def summary_total(db):
+        return db.execute(text("SELECT COALESCE(SUM(hired), 0) FROM hired_by_quarter_summary")).scalar()
+
+    Base.metadata.create_all(engine)
+    out = {}
+    db = SessionLocal()
+    insert_batch(db, pd.DataFrame({"id": [1, 2], "department": ["Eng", "Ops"]}), "departments")
+    insert_batch(db, pd.DataFrame({"id": [1], "job": ["Dev"]}), "jobs")
+    insert_batch(db, hired([
+        (1, "A", "2020-05-01T10:00:00Z", 1, 1), (2, "B", "2020-06-01T10:00:00Z", 1, 1),
+        (3, "C", "2021-02-01T10:00:00Z", 1, 1), (4, "D", "2021-03-01T10:00:00Z", 1, 1),
+        (5, "E", "2021-07-01T10:00:00Z", 1, 1), (6, "F", "2021-08-01T10:00:00Z", 2, 1),
+    ]), "hired_employees")
+    out["partitions"] = [p[0] for p in list_partitions(db)]
+
+    again = hired([(3, "C", "2022-02-01T10:00:00Z", 1, 1)])
+    out["skip"] = insert_batch(db, again, "hired_employees")["summary"]
+    try:
+        insert_batch(db, again, "hired_employees", on_conflict="error")
+        out["error"] = None
+    except DuplicateKeyError as e:
+        out["error"] = str(e)
+    out["update"] = insert_batch(db, again, "hired_employees", on_conflict="update")["summary"]
+    out["moved_to"] = db.execute(text("SELECT tableoid::regclass::text FROM hired_employees WHERE id = 3")).scalar()
+
+    # Escritura directa fuera de rango → DEFAULT; la ingesta del período la mueve a su partición
+    db.execute(text("INSERT INTO hired_employees VALUES (7, 'G', '2023-03-01', 1, 1)"))
+    db.commit()
+    out["default_before"] = count(db, DEFAULT_PARTITION)
+    insert_batch(db, hired([(8, "H", "2023-04-01T10:00:00Z", 1, 1)]), "hired_employees")
+    out["default_after"] = count(db, DEFAULT_PARTITION)
+    out["y2023"] = count(db, "hired_employees_y2023")
+
+    query, params = above_mean_query(2021)
+    plan = db.execute(text("EXPLAIN " + query.text), params).scalars().all()
+    out["plan_partitions"] = sorted({p for line in plan for p in out["partitions"] + ["hired_employees_y2022"] if p in line})
+    out["above_mean"] = [dict(r) for r in db.execute(query, params).mappings()]
+
+    out["detached"] = detach_before(db, pd.Timestamp("2021-01-01").to_pydatetime())
+    out["remaining"] = count(db, "hired_employees")
+    out["archived"] = count(db, "hired_employees_y2020")
+    out["summary_matches"] = summary_total(db) == out["remaining"]
+    db.close()
+    print(json.dumps(out, default=str))
+""")
+
+
+def test_partitioned_hired_employees_end_to_end():
+    """Con HIRED_EMPLOYEES_PARTITIONING=year: particiones por carga, merge sin ON CONFLICT, pruning y archivo."""
+    import json
+    import os
+    import subprocess
+    import sys
+    from sqlalchemy import text
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text(f"DROP DATABASE IF EXISTS {PARTITIONED_DB} WITH (FORCE)"))
+        conn.execute(text(f"CREATE DATABASE {PARTITIONED_DB}"))
+    try:
+        env = {**os.environ, "PG_DB": PARTITIONED_DB, "HIRED_EMPLOYEES_PARTITIONING": "year"}
+        proc = subprocess.run(
+            [sys.executable, "-c", PARTITIONED_SCRIPT], env=env, capture_output=True, text=True, timeout=120
+        )
+        assert proc.returncode == 0, proc.stderr
+        out = json.loads(proc.stdout.strip().splitlines()[-1])
+    finally:
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text(f"DROP DATABASE IF EXISTS {PARTITIONED_DB} WITH (FORCE)"))
+
+    assert out["partitions"] == ["hired_employees_y2020", "hired_employees_y2021"]
+    assert out["skip"]["duplicates"] == 1 and out["skip"]["inserted"] == 0
+    assert "[3]" in out["error"]
+    assert out["update"]["updated"] == 1 and out["update"]["inserted"] == 0
+    assert out["moved_to"] == "hired_employees_y2022"
+    assert (out["default_before"], out["default_after"], out["y2023"]) == (1, 0, 2)
+    # El rango de 2021 solo lee su partición
+    assert out["plan_partitions"] == ["hired_employees_y2021"]
+    assert [r["id"] for r in out["above_mean"]] == [1]
+    assert out["detached"] == ["hired_employees_y2020"]
+    assert (out["remaining"], out["archived"]) == (6, 2)
+    assert out["summary_matches"]
+
+
+# ============================================================
+# 📈 TEST: /metrics EN FORMATO PROMETHEUS
+# ============================================================
+
+def test_metrics_endpoint_exposes_ingest_latency_pool_and_cache():
+    """✅ Test: contadores de ingesta por tabla, histograma por ruta, pools y caché en /metrics."""
+    import re
+
+    def value(text: str, sample: str) -> float:
+        match = re.search(rf"^{re.escape(sample)} (\S+)$", text, re.MULTILINE)
+        return float(match.group(1)) if match else 0.0
+
+    before = client.get("/metrics").text
+    client.post(
+        "/api/ingest/upload/",
+        data={"type": "jobs"},
+        files={"file": ("jobs.csv", io.BytesIO(b"id,job\n1,Dev\n2,QA\n2,QA\n3,\n"), "text/csv")},
+    )
+    response = client.get("/metrics")
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+
+    assert value(text, 'ingest_rows_total{table="jobs",outcome="inserted"}') - \
+        value(before, 'ingest_rows_total{table="jobs",outcome="inserted"}') == 2
+    assert value(text, 'ingest_rows_total{table="jobs",outcome="invalid"}') - \
+        value(before, 'ingest_rows_total{table="jobs",outcome="invalid"}') == 1
+    assert value(text, 'ingest_rows_total{table="jobs",outcome="duplicate"}') - \
+        value(before, 'ingest_rows_total{table="jobs",outcome="duplicate"}') == 2
+
+    upload = 'http_request_duration_seconds_count{method="POST",route="/api/ingest/upload/",status="200"}'
+    assert value(text, upload) == value(before, upload) + 1
+    assert 'http_request_duration_seconds_bucket{method="POST",route="/api/ingest/upload/",status="200",le="+Inf"}' in text
+    assert 'db_pool_checked_out{pool="sync"} 0' in text
+    assert "ingest_uploads_in_flight 0" in text
+    assert re.search(r"^query_cache_hit_ratio \S+$", text, re.MULTILINE)
+
+
+# ============================================================
+# 🗃️ TEST: ALMACÉN DE RECHAZOS POR CARGA
+# ============================================================
+
+def test_rejects_are_stored_per_upload_and_paged_by_reason(seed_base_data):
+    """
+    ✅ Test: inválidas, duplicadas (en el archivo y contra la base) y FK rechazadas quedan
+    en ingest_rejects bajo el upload_id de cada carga; dos cargas no se pisan y el
+    endpoint pagina por cursor y filtra por motivo. En modo async el upload_id es el job_id.
+    """
+    import time
+    from src.services.reject_store import reject_writer
+
+    def upload(content: str, mode: str = "sync"):
+        return client.post(
+            "/api/ingest/upload/",
+            data={"type": "hired_employees", "mode": mode},
+            files={"file": ("hired_employees.csv", io.BytesIO(content.encode()), "text/csv")},
+        ).json()
+
+    header = "id,name,datetime,department_id,job_id\n"
+    first = upload(header + "1,Ana,2021-01-10T10:00:00Z,1,1\n2,Bob,bad-date,1,1\n")
+    second = upload(
+        header
+        + "1,Ana,2021-01-10T10:00:00Z,1,1\n"        # ya existe
+        + "3,Cid,2021-02-10T10:00:00Z,999,1\n"      # FK inexistente
+        + "4,Dan,2021-03-10T10:00:00Z,1,1\n4,Dan,2021-03-10T10:00:00Z,1,1\n"  # repetido en el archivo
+        + "5,Eva,,1,1\n6,Fer,nope,1,1\n7,Gus,also-bad,1,2\n"
+    )
+    assert first["upload_id"] != second["upload_id"]
+
+    def rejects(upload_id, **params):
+        reject_writer.flush(upload_id, timeout=10)
+        response = client.get(f"/api/ingest/rejects/{upload_id}", params=params)
+        assert response.status_code == 200
+        return response.json()
+
+    only_first = rejects(first["upload_id"])["items"]
+    assert [(r["reason"], r["row"]["id"]) for r in only_first] == [("invalid", 2)]
+
+    reasons = [r["reason"] for r in rejects(second["upload_id"])["items"]]
+    assert sorted(set(reasons)) == ["duplicate", "duplicate_in_file", "foreign_key", "invalid"]
+    fk = rejects(second["upload_id"], reason="foreign_key")["items"]
+    assert fk[0]["row"]["id"] == 3 and "foreign key" in fk[0]["error"]
+
+    # Paginación por cursor sobre las 3 inválidas
+    page = rejects(second["upload_id"], reason="invalid", limit=2)
+    assert len(page["items"]) == 2 and page["next_after"] is not None
+    rest = rejects(second["upload_id"], reason="invalid", limit=2, after=page["next_after"])
+    assert [r["row"]["name"] for r in page["items"] + rest["items"]] == ["Eva", "Fer", "Gus"]
+    assert rest["next_after"] is None
+
+    assert client.get(f"/api/ingest/rejects/{first['upload_id']}", params={"reason": "bogus"}).status_code == 400
+
+    job_id = upload(header + "8,Hal,2021-01-10T10:00:00Z,1,1\n9,Ivy,x,1,1\n", mode="async")["job_id"]
+    deadline = time.time() + 30
+    while client.get(f"/api/ingest/jobs/{job_id}").json()["status"] != "completed" and time.time() < deadline:
+        time.sleep(0.05)
+    job_rejects = client.get(f"/api/ingest/rejects/{job_id}").json()
+    assert [r["row"]["id"] for r in job_rejects["items"]] == [9] and job_rejects["pending_batches"] == 0
+
+
+def test_rejects_over_queue_bound_are_written_by_the_ingest(seed_base_data, monkeypatch):
+    """
+    ✅ Test: un lote de rechazos que supera REJECT_QUEUE_ROWS no queda retenido en la cola:
+    lo escribe la propia carga y ya está guardado cuando la respuesta vuelve.
+    """
+    from src.services.reject_store import reject_writer
+
+    reject_writer.flush(timeout=10)
+    monkeypatch.setattr(reject_writer, "_max_rows", 2)
+    direct = reject_writer.direct
+
+    content = "id,name,datetime,department_id,job_id\n50,Ok,2021-01-10T10:00:00Z,1,1\n" + "".join(
+        f"{i},N{i},bad-date,1,1\n" for i in range(1, 6)
+    )
+    data = client.post(
+        "/api/ingest/upload/",
+        data={"type": "hired_employees"},
+        files={"file": ("hired_employees.csv", io.BytesIO(content.encode()), "text/csv")},
+    ).json()
+
+    assert data["invalid_rows"] == 5 and reject_writer.direct - direct == 5
+    stored = client.get(f"/api/ingest/rejects/{data['upload_id']}").json()
+    assert [r["row"]["id"] for r in stored["items"]] == [1, 2, 3, 4, 5] and stored["pending_batches"] == 0
+
+
+# ============================================================
+# 📦 TEST: FORMATOS PARQUET / ARROW IPC / NDJSON
+# ============================================================
+
+def test_upload_parquet_arrow_and_ndjson_inputs(seed_base_data):
+    """
+    ✅ Test: Parquet y Arrow IPC (columnas tipadas) y NDJSON se cargan por /upload/ y
+    /upload/stream/ con la misma validación que el CSV; un tipo incompatible, columnas
+    faltantes o fuera de orden se rechazan con 400 en todos los formatos.
+    """
+    import time
+    import pandas as pd
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.ipc as ipc
+    import pyarrow.parquet as pq
+    from src.config.database import SessionLocal
+    from sqlalchemy import text
+
+    def frame(first_id: int) -> pd.DataFrame:
+        # Una fila con nombre nulo (inválida) y una con FK inexistente
+        return pd.DataFrame({
+            "id": [first_id, first_id + 1, first_id + 2],
+            "name": ["Ana", None, "Cid"],
+            "datetime": pd.to_datetime(["2021-01-10 10:00", "2021-05-01 09:00", "2021-07-15 08:00"]),
+            "department_id": [1, 2, 999],
+            "job_id": [1, 2, 3],
+        })
+
+    def parquet_bytes(df) -> bytes:
+        buffer = io.BytesIO()
+        pq.write_table(pa.Table.from_pandas(df, preserve_index=False), buffer)
+        return buffer.getvalue()
+
+    def arrow_bytes(df) -> bytes:
+        buffer = io.BytesIO()
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        with ipc.new_file(buffer, table.schema) as writer:
+            writer.write_table(table, max_chunksize=1)
+        return buffer.getvalue()
+
+    def upload(filename: str, content: bytes, path: str = "/api/ingest/upload/", **data):
+        return client.post(
+            path, data={"type": "hired_employees", **data}, files={"file": (filename, io.BytesIO(content))}
+        )
+
+    for filename, content, path in (
+        ("hired.parquet", parquet_bytes(frame(1)), "/api/ingest/upload/"),
+        ("hired.arrow", arrow_bytes(frame(11)), "/api/ingest/upload/stream/"),
+    ):
+        response = upload(filename, content, path)
+        assert response.status_code == 200, response.text
+        data = response.json()
+        assert (data["inserted"], data["invalid_rows"], data["summary"]["rejected_fk"]) == (1, 1, 1)
+
+    ndjson = b"".join(
+        b'{"id": %d, "name": "Nd %d", "datetime": "2021-0%d-01T00:00:00Z", "department_id": 1, "job_id": 1}\n'
+        % (20 + i, i, i) for i in range(1, 4)
+    ) + b'{"id": 30, "name": "Bad", "datetime": "nope", "department_id": 1, "job_id": 1}\n'
+    job_id = upload("hired.ndjson", ndjson, mode="async").json()["job_id"]
+    deadline = time.time() + 30
+    job = client.get(f"/api/ingest/jobs/{job_id}").json()
+    while job["status"] in ("queued", "running") and time.time() < deadline:
+        time.sleep(0.05)
+        job = client.get(f"/api/ingest/jobs/{job_id}").json()
+    assert job["status"] == "completed", job.get("error")
+    assert (job["result"]["inserted"], job["result"]["invalid_rows"]) == (3, 1)
+
+    db = SessionLocal()
+    try:
+        stored = db.execute(text("SELECT id, name, datetime FROM hired_employees ORDER BY id")).all()
+    finally:
+        db.close()
+    assert [row.id for row in stored] == [1, 11, 21, 22, 23]
+    assert stored[0].name == "Ana" and str(stored[0].datetime) == "2021-01-10 10:00:00"
+
+    wrong_type = frame(40).assign(id=[True, False, True])
+    response = upload("bad.parquet", parquet_bytes(wrong_type))
+    assert response.status_code == 400 and "id: bool" in response.json()["detail"]
+    response = upload("bad.parquet", parquet_bytes(frame(50).drop(columns="job_id")))
+    assert response.status_code == 400 and "Estructura inválida" in response.json()["detail"]
+
+    # Mismas columnas en otro orden: rechazadas igual que un CSV con cabeceras desordenadas
+    reordered = frame(60)[["job_id", "department_id", "datetime", "id", "name"]]
+    for filename, content in (
+        ("reordered.parquet", parquet_bytes(reordered)),
+        ("reordered.arrow", arrow_bytes(reordered)),
+        ("reordered.ndjson", b'{"name": "X", "id": 70, "datetime": "2021-01-01", "department_id": 1, "job_id": 1}\n'),
+    ):
+        response = upload(filename, content, "/api/ingest/upload/stream/")
+        assert response.status_code == 400 and "Estructura inválida" in response.json()["detail"], filename
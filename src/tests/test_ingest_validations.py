@@ -7,6 +7,7 @@ from src.main import app
 from src.tests.utils_csv_generator import generate_hired_csv
 from src.config.database import Base, engine
 from src.services.batch_insert_service import MAX_BATCH_SIZE
+from src.services.reject_store import reject_writer
 
 
 client = TestClient(app)
@@ -44,7 +45,7 @@ def invalid_csvs(tmp_path_factory):
 def test_upload_invalid_date_csv(invalid_csvs):
     """
     ✅ Test: CSV con fechas inválidas debe procesarse parcialmente (status 200)
-    y registrar las filas erróneas en logs/invalid_hired_employees.csv.
+    y registrar las filas erróneas en el almacén de rechazos de la carga.
     """
     with open(invalid_csvs["invalid_date"], "rb") as f:
         response = client.post(
@@ -63,8 +64,11 @@ def test_upload_invalid_date_csv(invalid_csvs):
     assert "message" in data
     assert "invalid" in data["message"].lower() or "inválidas" in data["message"].lower()
 
-    # Validar que el archivo de logs exista
-    assert os.path.exists("logs/invalid_hired_employees.csv"), "Debe generarse el archivo de logs"
+    # Validar que las filas inválidas queden en el almacén de rechazos de la carga
+    reject_writer.flush(data["upload_id"], timeout=10)
+    rejects = client.get(f"/api/ingest/rejects/{data['upload_id']}", params={"reason": "invalid"}).json()
+    assert len(rejects["items"]) == data["invalid_rows"]
+    assert all(item["error"] and "datetime" in item["row"] for item in rejects["items"])
 
 
 def test_upload_empty_csv(invalid_csvs):
@@ -124,3 +128,183 @@ def test_upload_hired_employees_exceeds_batch_limit(tmp_path):
     assert str(MAX_BATCH_SIZE) in detail or "límite" in detail, f"Mensaje inesperado: {detail}"
 
 
+# ============================================================
+# 🧪 TEST DE VALIDACIÓN COLUMNAR
+# ============================================================
+
+def test_validate_frame_reports_reason_per_column():
+    """✅ Test: validate_frame separa filas válidas e inválidas con el motivo de cada una."""
+    import pandas as pd
+    from src.services.batch_insert_service import validate_frame, NULL_FIELDS_ERROR
+
+    raw = pd.DataFrame({
+        "id": [1, 2, 3, "x", 5],
+        "name": ["Ana", None, "Luis", "Eva", "Sol"],
+        "datetime": ["2021-01-10T10:00:00Z", "2021-02-10T10:00:00Z", "INVALID_DATE",
+                     "2021-03-10T10:00:00Z", "2021-04-10 08:00:00"],
+        "department_id": [1, 1, 1, 1, 2],
+        "job_id": [1, 1, 1, 1, 2],
+    })
+
+    valid, invalid = validate_frame(raw, "hired_employees")
+
+    assert list(valid["id"]) == [1, 5]
+    assert str(valid["datetime"].iloc[1]) == "2021-04-10 08:00:00+00:00"
+    reasons = dict(zip(invalid["id"].astype(str), invalid["error"]))
+    assert reasons["2"] == NULL_FIELDS_ERROR
+    assert "INVALID_DATE" in reasons["3"]
+    assert reasons["x"] == "Valor no numérico en id"
+
+
+def test_upload_exceeds_max_upload_bytes(monkeypatch):
+    """❌ Test: el endpoint por lotes rechaza archivos mayores al tamaño máximo con 413."""
+    from src.api import ingest
+
+    monkeypatch.setattr(ingest, "MAX_UPLOAD_BYTES", 64)
+    content = b"id,department\n" + b"".join(f"{i},Dept {i}\n".encode() for i in range(1, 20))
+    response = client.post(
+        "/api/ingest/upload/",
+        data={"type": "departments"},
+        files={"file": ("departments.csv", io.BytesIO(content), "text/csv")}
+    )
+
+    assert response.status_code == 413
+    assert "tamaño máximo" in response.json()["detail"]
+
+
+def test_upload_rejected_when_ingest_pool_saturated(monkeypatch):
+    """❌ Test: con el pool de ingesta saturado se responde 503 rápido con Retry-After."""
+    import threading
+    from src.services import ingest_executor
+
+    monkeypatch.setattr(ingest_executor, "_slots", threading.BoundedSemaphore(1))
+    ingest_executor._slots.acquire()
+
+    response = client.post(
+        "/api/ingest/upload/",
+        data={"type": "departments"},
+        files={"file": ("departments.csv", io.BytesIO(b"id,department\n1,Sales\n"), "text/csv")}
+    )
+
+    assert response.status_code == 503
+    assert "saturado" in response.json()["detail"]
+    assert response.headers["retry-after"] == str(ingest_executor.INGEST_RETRY_AFTER)
+
+
+def test_async_upload_rejected_before_spooling_when_saturated(monkeypatch):
+    """❌ Test: en modo async el 503 llega antes de copiar el archivo a disco."""
+    import threading
+    from src.api import ingest
+    from src.services import ingest_executor
+
+    monkeypatch.setattr(ingest_executor, "_slots", threading.BoundedSemaphore(1))
+    ingest_executor._slots.acquire()
+    spooled = []
+    monkeypatch.setattr(ingest, "_spool_to_disk", lambda *args: spooled.append(args))
+
+    response = client.post(
+        "/api/ingest/upload/",
+        data={"type": "departments", "mode": "async"},
+        files={"file": ("departments.csv", io.BytesIO(b"id,department\n1,Sales\n"), "text/csv")}
+    )
+
+    assert response.status_code == 503
+    assert spooled == []
+
+
+def test_async_upload_releases_slot_and_temp_file_when_job_registration_fails(monkeypatch):
+    """❌ Test: si falla el INSERT en ingest_jobs se devuelve el cupo del pool y se borra el temporal."""
+    from sqlalchemy.exc import OperationalError
+    from src.api import ingest
+    from src.services import ingest_executor, job_service
+
+    spooled = []
+    real_spool = ingest._spool_to_disk
+    monkeypatch.setattr(ingest, "_spool_to_disk", lambda *args: spooled.append(real_spool(*args)) or spooled[-1])
+
+    def broken_create_job(*args):
+        raise OperationalError("INSERT INTO ingest_jobs", {}, Exception("db down"))
+    monkeypatch.setattr(job_service, "create_job", broken_create_job)
+
+    in_flight = ingest_executor.stats()["in_flight"]
+    response = client.post(
+        "/api/ingest/upload/",
+        data={"type": "departments", "mode": "async"},
+        files={"file": ("departments.csv", io.BytesIO(b"id,department\n1,Sales\n"), "text/csv")}
+    )
+
+    assert response.status_code == 500
+    assert ingest_executor.stats()["in_flight"] == in_flight
+    assert len(spooled) == 1 and not os.path.exists(spooled[0])
+
+
+def _validated_chunks(path, workers: int):
+    """Filas válidas e inválidas del camino de insert_stream, combinadas en orden."""
+    import pandas as pd
+    from src.services.batch_insert_service import _iter_validated_chunks
+
+    parts = list(_iter_validated_chunks(str(path), "hired_employees", chunksize=500, parse_workers=workers))
+    return (
+        pd.concat([valid for valid, _ in parts], ignore_index=True),
+        pd.concat([invalid for _, invalid in parts], ignore_index=True),
+    )
+
+
+def test_parallel_stream_parse_matches_sequential_order(tmp_path, monkeypatch):
+    """✅ Test: el parseo paralelo por particiones de insert_stream devuelve las mismas filas e inválidas, en el mismo orden."""
+    from src.services import parallel_parse_service
+
+    path = generate_hired_csv(tmp_path / "hired_parallel.csv", rows=3000, valid=False)
+    sequential, invalid_seq = _validated_chunks(path, workers=1)
+
+    header, ranges = parallel_parse_service.split_csv(path, partition_bytes=8 * 1024)
+    assert len(ranges) > 4
+    assert all(a[1] == b[0] for a, b in zip(ranges, ranges[1:]))
+
+    monkeypatch.setattr(parallel_parse_service, "PARTITION_BYTES", 8 * 1024)
+    parallel, invalid_par = _validated_chunks(path, workers=2)
+
+    assert len(invalid_par) == len(invalid_seq) > 0
+    assert parallel["id"].tolist() == sequential["id"].tolist()
+    assert parallel["datetime"].tolist() == sequential["datetime"].tolist()
+    assert invalid_par["name"].fillna("").tolist() == invalid_seq["name"].fillna("").tolist()
+    assert invalid_par["error"].tolist() == invalid_seq["error"].tolist()
+
+
+def test_parse_workers_do_not_import_database_or_logging():
+    """✅ Test: el módulo que importan los procesos spawn del pool no carga engines, pools ni el logging."""
+    import subprocess
+    import sys
+
+    loaded = subprocess.run(
+        [sys.executable, "-c", (
+            "import sys, src.services.parse_worker; "
+            "print(sorted(m for m in sys.modules if m.startswith('src.') or m.startswith(('sqlalchemy', 'psycopg'))))"
+        )],
+        capture_output=True, text=True, check=True,
+    ).stdout
+    assert "src.config.database" not in loaded and "src.utils.logger" not in loaded
+    assert "sqlalchemy" not in loaded and "psycopg" not in loaded
+
+
+def test_split_csv_never_cuts_inside_quoted_newlines(tmp_path):
+    """✅ Test: las particiones no cortan campos entre comillas con saltos de línea embebidos."""
+    from src.services import parallel_parse_service
+
+    path = tmp_path / "hired_quoted.csv"
+    lines = ["id,name,datetime,department_id,job_id"]
+    for i in range(1, 201):
+        name = f'"Line one {i}\nline ""two"" {i}"' if i % 3 == 0 else f"Name {i}"
+        lines.append(f"{i},{name},2021-0{i % 9 + 1}-10T10:00:00Z,{i % 5 + 1},{i % 7 + 1}")
+    path.write_text("\n".join(lines) + "\n")
+
+    header, ranges = parallel_parse_service.split_csv(str(path), partition_bytes=64)
+    assert len(ranges) > 10
+    for start, end in ranges:
+        frame = parallel_parse_service.read_partition(str(path), header, start, end)
+        assert frame["id"].notna().all()
+
+    sequential, _ = _validated_chunks(path, workers=1)
+    parallel, _ = _validated_chunks(path, workers=2)
+    assert parallel["name"].tolist() == sequential["name"].tolist()
+    assert len(parallel) == 200
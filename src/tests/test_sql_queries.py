@@ -1,9 +1,12 @@
+import io
 import pytest
+from sqlalchemy import text
 from fastapi.testclient import TestClient
 from src.main import app
 from src.config.database import SessionLocal, Base, engine
 from src.models.models import Department, Job, HiredEmployee
-from datetime import datetime
+from src.services import quarterly_summary_service
+from datetime import date, datetime
 
 client = TestClient(app)
 pytestmark = pytest.mark.tdd
@@ -47,18 +50,38 @@ def setup_test_data():
     Base.metadata.drop_all(bind=engine)
 
 
+def seed_query_data():
+    """Inserta con el ORM los datos de prueba (clean_db vacía las tablas antes de cada test)."""
+    db = SessionLocal()
+    try:
+        db.add_all([
+            Department(id=1, department="Staff"),
+            Job(id=1, job="Manager"),
+            Job(id=3, job="Recruiter"),
+        ])
+        db.flush()
+        db.add_all([
+            HiredEmployee(id=1, name="Alice", datetime=datetime(2021, 1, 5), department_id=1, job_id=3),
+            HiredEmployee(id=5, name="Eve", datetime=datetime(2021, 2, 20), department_id=1, job_id=3),
+            HiredEmployee(id=6, name="Frank", datetime=datetime(2021, 8, 1), department_id=1, job_id=1),
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+
 def test_query_hired_by_quarter():
     """✅ Test: Endpoint /api/queries/hired-by-quarter/"""
+    seed_query_data()
     response = client.get("/api/queries/hired-by-quarter/")
     assert response.status_code == 200
     data = response.json()
     assert "rows" in data
     assert isinstance(data["rows"], list)
-    if len(data["rows"]) > 0:
-        sample = data["rows"][0]
-        assert "department" in sample
-        assert "job" in sample
-        assert all(q in sample for q in ["Q1", "Q2", "Q3", "Q4"])
+    assert data["rows"] == [
+        {"department": "Staff", "job": "Manager", "Q1": 0, "Q2": 0, "Q3": 1, "Q4": 0},
+        {"department": "Staff", "job": "Recruiter", "Q1": 2, "Q2": 0, "Q3": 0, "Q4": 0},
+    ]
 
 
 def test_query_departments_above_mean():
@@ -75,3 +98,338 @@ def test_query_departments_above_mean():
         assert "id" in sample
         assert "department" in sample
         assert "hired" in sample
+
+
+def upload_hired(content: str, policy: str = "skip"):
+    """Sube un CSV de hired_employees con la política on_conflict indicada."""
+    response = client.post(
+        "/api/ingest/upload/",
+        data={"type": "hired_employees", "on_conflict": policy},
+        files={"file": ("hired_employees.csv", io.BytesIO(content.encode()), "text/csv")}
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+SUMMARY_QUERY = text(
+    "SELECT year, quarter, department_id, job_id, hired FROM hired_by_quarter_summary "
+    "WHERE hired > 0 ORDER BY 1, 2, 3, 4"
+)
+
+
+def read_summary(db):
+    rows = [tuple(r) for r in db.execute(SUMMARY_QUERY).all()]
+    db.commit()
+    return rows
+
+
+def test_hired_by_quarter_summary_is_maintained_by_ingest():
+    """
+    ✅ Test: los triggers mantienen hired_by_quarter_summary en la misma transacción
+    que la ingesta (inserción y on_conflict=update) y rebuild() produce el mismo resultado.
+    """
+    db = SessionLocal()
+    try:
+        db.add_all([Department(id=1, department="Staff"), Job(id=1, job="Manager"), Job(id=2, job="Analyst")])
+        db.commit()
+
+        header = "id,name,datetime,department_id,job_id\n"
+        upload_hired(header + "1,Ana,2021-01-10T10:00:00Z,1,1\n2,Bob,2021-05-10T10:00:00Z,1,1\n"
+                              "3,Eva,2021-05-11T10:00:00Z,1,2\n")
+        # Bob pasa de Q2/job 1 a Q4/job 2
+        assert upload_hired(header + "2,Bob,2021-11-10T10:00:00Z,1,2\n", policy="update")["summary"]["updated"] == 1
+
+        incremental = read_summary(db)
+        assert incremental == [(2021, 1, 1, 1, 1), (2021, 2, 1, 2, 1), (2021, 4, 1, 2, 1)]
+
+        quarterly_summary_service.rebuild(db)
+        assert read_summary(db) == incremental
+    finally:
+        db.close()
+
+    rows = client.get("/api/queries/hired-by-quarter/").json()["rows"]
+    assert rows == [
+        {"department": "Staff", "job": "Analyst", "Q1": 0, "Q2": 1, "Q3": 0, "Q4": 1},
+        {"department": "Staff", "job": "Manager", "Q1": 1, "Q2": 0, "Q3": 0, "Q4": 0},
+    ]
+
+
+def test_hired_by_quarter_summary_follows_direct_writes():
+    """
+    ✅ Test: DELETE, UPDATE y TRUNCATE directos sobre hired_employees también se reflejan,
+    y rebuild_if_stale() repara un agregado desincronizado a mano.
+    """
+    seed_query_data()
+    db = SessionLocal()
+    try:
+        assert read_summary(db) == [(2021, 1, 1, 3, 2), (2021, 3, 1, 1, 1)]
+
+        db.execute(text("DELETE FROM hired_employees WHERE id = 5"))
+        db.execute(text("UPDATE hired_employees SET datetime = '2021-12-01' WHERE id = 6"))
+        db.commit()
+        assert read_summary(db) == [(2021, 1, 1, 3, 1), (2021, 4, 1, 1, 1)]
+
+        assert quarterly_summary_service.rebuild_if_stale(db) is False
+        db.execute(text("UPDATE hired_by_quarter_summary SET hired = hired + 5"))
+        db.commit()
+        assert quarterly_summary_service.rebuild_if_stale(db) is True
+        assert read_summary(db) == [(2021, 1, 1, 3, 1), (2021, 4, 1, 1, 1)]
+
+        db.execute(text("TRUNCATE TABLE hired_employees"))
+        db.commit()
+        assert read_summary(db) == []
+    finally:
+        db.close()
+
+
+def test_query_results_are_cached_until_ingest_commits():
+    """
+    ✅ Test: las consultas se sirven desde el caché hasta que una ingesta hace commit
+    y sube la versión de datos; /cache/stats/ expone aciertos y fallos.
+    """
+    seed_query_data()
+    first = client.get("/api/queries/hired-by-quarter/").json()
+    assert client.get("/api/queries/hired-by-quarter/").json() == first
+
+    stats = client.get("/api/queries/cache/stats/").json()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+    upload_hired("id,name,datetime,department_id,job_id\n7,Gus,2021-08-02T10:00:00Z,1,1\n")
+    rows = client.get("/api/queries/hired-by-quarter/").json()["rows"]
+    assert rows[0] == {"department": "Staff", "job": "Manager", "Q1": 0, "Q2": 0, "Q3": 2, "Q4": 0}
+
+    stats = client.get("/api/queries/cache/stats/").json()
+    assert stats["data_version"] > 0
+    assert (stats["hits"], stats["misses"]) == (1, 2)
+
+
+def test_queries_accept_year_and_date_range():
+    """✅ Test: year y start/end (end exclusivo) filtran ambos endpoints; un rango invertido es 400."""
+    seed_query_data()
+
+    assert client.get("/api/queries/hired-by-quarter/", params={"year": 2020}).json()["rows"] == []
+    rows = client.get("/api/queries/hired-by-quarter/", params={"start": "2021-02-01", "end": "2021-09-01"}).json()["rows"]
+    assert rows == [
+        {"department": "Staff", "job": "Manager", "Q1": 0, "Q2": 0, "Q3": 1, "Q4": 0},
+        {"department": "Staff", "job": "Recruiter", "Q1": 1, "Q2": 0, "Q3": 0, "Q4": 0},
+    ]
+
+    above = client.get("/api/queries/above-mean/", params={"year": 2021}).json()
+    assert above["rows"] == []  # un solo departamento: nunca supera su propio promedio
+    bad = client.get("/api/queries/above-mean/", params={"start": "2021-05-01", "end": "2021-01-01"})
+    assert bad.status_code == 400
+
+
+def test_year_predicates_use_datetime_index():
+    """
+    ✅ Test: el SQL real de los endpoints, con el año ligado, usa el índice sobre datetime
+    con estadísticas reales (10 años de contrataciones, sin forzar el planner).
+    """
+    from sqlalchemy import text
+    from src.api.queries import hired_by_quarter_query, above_mean_query
+
+    db = SessionLocal()
+    try:
+        db.add_all([Department(id=i, department=f"Dept {i}") for i in range(1, 6)]
+                   + [Job(id=i, job=f"Job {i}") for i in range(1, 6)])
+        db.flush()
+        db.execute(text("""
+            INSERT INTO hired_employees (id, name, datetime, department_id, job_id)
+            SELECT g, 'Emp ' || g, TIMESTAMP '2015-01-01' + (g * INTERVAL '53 minutes'), g % 5 + 1, g % 3 + 1
+            FROM generate_series(1, 100000) g
+        """))
+        db.commit()
+    finally:
+        db.close()
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("VACUUM ANALYZE hired_employees"))
+
+    def plan(query, params) -> str:
+        db = SessionLocal()
+        try:
+            return "\n".join(row[0] for row in db.execute(text("EXPLAIN " + query.text), params))
+        finally:
+            db.close()
+
+    for query, params in (
+        above_mean_query(2021),
+        hired_by_quarter_query(2021, start=date(2021, 1, 1), end=date(2022, 1, 1)),
+    ):
+        explained = plan(query, params)
+        assert "ix_hired_employees_datetime_dept_job" in explained, explained
+        assert "Seq Scan on hired_employees" not in explained, explained
+
+    # Sin start/end el trimestral lee el agregado y no toca hired_employees
+    assert "hired_employees" not in plan(*hired_by_quarter_query(2021)).replace("hired_employees_", "")
+
+
+def test_query_routes_serve_concurrent_reads_on_the_event_loop():
+    """✅ Test: las rutas de consultas son async y atienden lecturas concurrentes con el motor async."""
+    import asyncio
+    import inspect
+    import httpx
+    from src.api import queries
+
+    assert inspect.iscoroutinefunction(queries.employees_by_quarter)
+    assert inspect.iscoroutinefunction(queries.departments_above_mean)
+    seed_query_data()
+
+    async def read_all():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+            return await asyncio.gather(*(
+                ac.get("/api/queries/above-mean/", params={"year": year}) for year in range(2010, 2030)
+            ))
+
+    responses = asyncio.run(read_all())
+    assert [r.status_code for r in responses] == [200] * 20
+
+
+def test_export_streams_tables_and_query_results():
+    """✅ Test: /api/export/ entrega CSV (COPY TO STDOUT) y NDJSON (cursor del servidor) en streaming."""
+    import json
+    seed_query_data()
+
+    csv_response = client.get("/api/export/hired_employees/")
+    assert csv_response.status_code == 200
+    assert csv_response.headers["content-type"].startswith("text/csv")
+    lines = csv_response.text.strip().splitlines()
+    assert lines[0] == "id,name,datetime,department_id,job_id"
+    assert [line.split(",")[0] for line in lines[1:]] == ["1", "5", "6"]
+
+    ndjson = client.get("/api/export/jobs/", params={"format": "ndjson"})
+    assert [json.loads(line) for line in ndjson.text.splitlines()] == [
+        {"id": 1, "job": "Manager"}, {"id": 3, "job": "Recruiter"}
+    ]
+
+    quarter = client.get("/api/export/queries/hired-by-quarter/", params={"format": "ndjson", "year": 2021})
+    assert json.loads(quarter.text.splitlines()[1]) == {
+        "department": "Staff", "job": "Recruiter", "Q1": 2, "Q2": 0, "Q3": 0, "Q4": 0
+    }
+    above = client.get("/api/export/queries/above-mean/", params={"start": "2021-01-01", "end": "2022-01-01"})
+    assert above.text.strip() == "id,department,hired"
+
+    assert client.get("/api/export/salaries/").status_code == 400
+    assert client.get("/api/export/jobs/", params={"format": "xml"}).status_code == 400
+
+
+def test_metrics_endpoint_groups_by_grain_and_dimensions():
+    """
+    ✅ Test: /metrics/ agrupa por cualquier subconjunto de dimensiones y granularidad,
+    y el agregado trimestral da el mismo resultado que las tablas base.
+    """
+    seed_query_data()
+
+    monthly = client.get("/api/queries/metrics/", params={"grain": "month", "group_by": "job"}).json()
+    assert monthly["source"] == "raw"
+    assert monthly["rows"] == [
+        {"period": "2021-01-01T00:00:00", "job": "Recruiter", "hired": 1},
+        {"period": "2021-02-01T00:00:00", "job": "Recruiter", "hired": 1},
+        {"period": "2021-08-01T00:00:00", "job": "Manager", "hired": 1},
+    ]
+
+    params = {"grain": "quarter", "group_by": ["department", "job"]}
+    rollup = client.get("/api/queries/metrics/", params=params).json()
+    raw = client.get("/api/queries/metrics/", params={**params, "start": "2021-01-01", "end": "2021-12-31"}).json()
+    assert (rollup["source"], raw["source"]) == ("rollup", "raw")
+    assert rollup["rows"] == raw["rows"] == [
+        {"period": "2021-01-01T00:00:00", "department": "Staff", "job": "Recruiter", "hired": 2},
+        {"period": "2021-07-01T00:00:00", "department": "Staff", "job": "Manager", "hired": 1},
+    ]
+
+    yearly = client.get("/api/queries/metrics/", params={"grain": "year"}).json()
+    assert yearly["rows"] == [{"period": "2021-01-01T00:00:00", "hired": 3}]
+
+    assert client.get("/api/queries/metrics/", params={"grain": "hour"}).status_code == 400
+    assert client.get("/api/queries/metrics/", params={"group_by": "salary"}).status_code == 400
+
+
+def test_above_mean_single_pass_with_ratio():
+    """✅ Test: above-mean con AVG() OVER () devuelve los departamentos sobre el promedio y su razón."""
+    db = SessionLocal()
+    try:
+        db.add_all([Department(id=i, department=f"Dept {i}") for i in (1, 2, 3)] + [Job(id=1, job="Manager")])
+        db.flush()
+        hires = [(1, 1), (2, 1), (3, 1), (4, 2), (5, 3)]
+        db.add_all([
+            HiredEmployee(id=i, name=f"E{i}", datetime=datetime(2021, 3, i), department_id=dept, job_id=1)
+            for i, dept in hires
+        ])
+        db.add(HiredEmployee(id=6, name="Old", datetime=datetime(2020, 3, 1), department_id=2, job_id=1))
+        db.commit()
+    finally:
+        db.close()
+
+    rows = client.get("/api/queries/above-mean/", params={"include_ratio": True}).json()["rows"]
+    assert rows == [{"id": 1, "department": "Dept 1", "hired": 3, "ratio": 1.8}]
+    assert "ratio" not in client.get("/api/queries/above-mean/").json()["rows"][0]
+
+
+def test_replica_router_round_robin_health_and_read_your_writes():
+    """Réplicas en round-robin, las caídas se saltean y tras una escritura se lee del primario."""
+    import asyncio
+    from src.config.database import async_engine
+    from src.config.replicas import ReplicaRouter
+
+    async def scenario():
+        # Dos "réplicas" sanas (el mismo servidor) y una que no responde
+        router = ReplicaRouter(["localhost", "127.0.0.1:5432", "127.0.0.1:1"], async_engine, read_your_writes=60)
+        try:
+            healthy = {router.replicas[0].engine, router.replicas[1].engine}
+            picked = [await router.read_engine() for _ in range(6)]
+            assert set(picked) == healthy
+            down = router.stats()["replicas"][2]
+            assert (down["host"], down["healthy"]) == ("127.0.0.1:1", False)
+
+            router.mark_write()
+            assert await router.read_engine() is async_engine
+
+            router.read_your_writes = 0
+            for replica in router.replicas[:2]:
+                router.mark_down(replica.engine)
+            assert await router.read_engine() is async_engine
+        finally:
+            await router.dispose()
+
+    asyncio.run(scenario())
+
+
+def test_pool_stats_endpoint_and_psycopg_backend(monkeypatch):
+    """/health/pool expone el uso de los pools; el backend psycopg_pool funciona con SQLAlchemy."""
+    from src.config import pool
+    from src.config.database import SQLALCHEMY_DATABASE_URL
+    from src.services.reject_store import reject_writer
+
+    import time
+
+    client.get("/api/queries/above-mean/")
+    # La sesión de la dependencia puede cerrarse apenas después de enviada la respuesta y el
+    # escritor de rechazos toma una conexión sync mientras vacía lotes de tests anteriores
+    reject_writer.flush(timeout=10)
+    deadline = time.time() + 5
+    stats = client.get("/health/pool").json()
+    while (stats["sync"]["checked_out"] or stats["async"]["checked_out"]) and time.time() < deadline:
+        time.sleep(0.01)
+        stats = client.get("/health/pool").json()
+    for name in ("sync", "async"):
+        assert stats[name]["backend"] == "sqlalchemy"
+        assert stats[name]["max_size"] == pool.DB_POOL_SIZE + pool.DB_MAX_OVERFLOW
+        assert stats[name]["checked_out"] == 0 and stats[name]["waiting"] == 0
+        assert stats[name]["requests"] >= 1
+    assert stats["replicas"] == []
+
+    monkeypatch.setattr(pool, "DB_POOL_BACKEND", "psycopg")
+    engine = pool.create_sync_engine(SQLALCHEMY_DATABASE_URL)
+    try:
+        with engine.connect() as conn:
+            assert conn.execute(text("SELECT 1")).scalar() == 1
+            assert pool.pool_stats(engine)["checked_out"] == 1
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        stats = pool.pool_stats(engine)
+        # close() devolvió la conexión a psycopg_pool en lugar de cerrarla
+        assert stats["backend"] == "psycopg" and stats["checked_out"] == 0
+        assert stats["requests"] == 2 and stats["size"] >= 1
+    finally:
+        engine.psycopg_pool.close()
+        engine.dispose()
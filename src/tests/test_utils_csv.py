@@ -72,3 +72,33 @@ def test_generate_hired_csv_with_duplicates(tmp_path):
     generate_hired_csv(path, rows=20, valid=True, duplicate=True)
     df = pd.read_csv(path)
     assert df["id"].duplicated().any()
+
+
+def test_logger_queues_without_blocking_and_formats_json():
+    """✅ get_logger() encola sin bloquear (descarta con la cola llena) y JsonFormatter incluye extra y traceback."""
+    import json
+    import logging
+    import queue
+    import sys
+    from logging.handlers import TimedRotatingFileHandler
+    from src.utils import logger as log_module
+
+    handler = log_module._NonBlockingQueueHandler(queue.Queue(maxsize=1))
+    record = logging.LogRecord("t", logging.INFO, __file__, 1, "%d filas", (3,), None)
+    dropped = log_module.dropped_records()
+    handler.emit(record)
+    handler.emit(record)
+    assert handler.queue.get_nowait().getMessage() == "3 filas"
+    assert log_module.dropped_records() == dropped + 1
+
+    try:
+        1 / 0
+    except ZeroDivisionError:
+        failed = logging.LogRecord("t", logging.ERROR, __file__, 1, "falló %s", ("x",), sys.exc_info())
+    failed.table = "jobs"
+    entry = json.loads(log_module.JsonFormatter().format(failed))
+    assert (entry["level"], entry["message"], entry["table"]) == ("ERROR", "falló x", "jobs")
+    assert "ZeroDivisionError" in entry["exc_info"]
+
+    file_handlers = [h for h in log_module._listener.handlers if isinstance(h, TimedRotatingFileHandler)]
+    assert file_handlers and file_handlers[0].baseFilename.endswith("app.log")
@@ -1,46 +1,128 @@
+import atexit
+import json
 import logging
 import os
+import queue
 import sys
-from datetime import datetime
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
 
-def get_logger(name: str):
+# ============================================================
+# ⚙️ Configuración (variables de entorno)
+# ============================================================
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()            # text | json
+LOG_DIR = os.getenv("LOG_DIR", "logs")
+LOG_BACKUP_DAYS = int(os.getenv("LOG_BACKUP_DAYS", "14"))       # archivos rotados que se conservan
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))      # registros en espera antes de descartar
+
+TEXT_FORMAT = "[%(asctime)s] [%(levelname)s] [%(name)s]: %(message)s"
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Atributos estándar de LogRecord (el resto viene de extra={...} y va al JSON)
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """Una línea JSON por registro: ts, level, logger, message, campos de extra y traceback."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update({k: v for k, v in vars(record).items() if k not in _RECORD_ATTRS})
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _NonBlockingQueueHandler(QueueHandler):
     """
-    Devuelve un logger configurado para consola y archivo.
-    Incluye timestamps, nivel, módulo y soporte de tracebacks con exc_info=True.
+    Encola el registro sin formatearlo: el mensaje (estilo %, p. ej. logger.info("%d filas", n))
+    se arma en el hilo escritor. Si la cola está llena se descarta en lugar de bloquear.
     """
-    log_level = os.getenv("LOG_LEVEL", "INFO").upper()
-    log_dir = "logs"
-    os.makedirs(log_dir, exist_ok=True)
 
-    # Nombre del archivo log diario
-    log_file = os.path.join(log_dir, f"app_{datetime.now().strftime('%Y%m%d')}.log")
+    dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _NonBlockingQueueHandler.dropped += 1
+
+
+# ============================================================
+# 🧵 Escritor único en segundo plano (consola + archivo con rotación diaria)
+# ============================================================
+_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+_queue_handler = _NonBlockingQueueHandler(_queue)
+_listener = None
+_listener_lock = threading.Lock()
+
+
+def _build_handlers() -> list:
+    formatter = JsonFormatter() if LOG_FORMAT == "json" else logging.Formatter(TEXT_FORMAT, DATE_FORMAT)
+
+    # 🖥️ Consola (stdout)
+    console_handler = logging.StreamHandler(sys.stdout)
+
+    # 📁 Archivo logs/app.log, rota a medianoche (app.log.YYYY-MM-DD)
+    os.makedirs(LOG_DIR, exist_ok=True)
+    file_handler = TimedRotatingFileHandler(
+        os.path.join(LOG_DIR, "app.log"), when="midnight", backupCount=LOG_BACKUP_DAYS, encoding="utf-8"
+    )
+
+    for handler in (console_handler, file_handler):
+        handler.setLevel(LOG_LEVEL)
+        handler.setFormatter(formatter)
+    return [console_handler, file_handler]
+
+
+def _start_listener():
+    global _listener
+    with _listener_lock:
+        if _listener is None:
+            _listener = QueueListener(_queue, *_build_handlers(), respect_handler_level=True)
+            _listener.start()
+            atexit.register(stop_logging)
+
+
+def stop_logging():
+    """Vacía la cola y detiene el escritor (se registra con atexit)."""
+    global _listener
+    with _listener_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+def dropped_records() -> int:
+    """Registros descartados por cola llena desde el inicio del proceso."""
+    return _NonBlockingQueueHandler.dropped
+
+
+def get_logger(name: str):
+    """
+    Devuelve un logger que solo encola registros; un único hilo los escribe en consola y
+    en logs/app.log (rotación diaria, LOG_BACKUP_DAYS archivos). LOG_FORMAT=json escribe
+    una línea JSON por registro. Soporta tracebacks con exc_info=True.
+    """
+    _start_listener()
 
     # Crear logger
     logger = logging.getLogger(name)
-    logger.setLevel(log_level)
+    logger.setLevel(LOG_LEVEL)
 
     # Evitar duplicar handlers
     if not logger.handlers:
-        # 🖥️ Consola (stdout)
-        console_handler = logging.StreamHandler(sys.stdout)
-        console_handler.setLevel(log_level)
-        console_format = logging.Formatter(
-            "[%(asctime)s] [%(levelname)s] [%(name)s]: %(message)s",
-            "%Y-%m-%d %H:%M:%S"
-        )
-        console_handler.setFormatter(console_format)
-
-        # 📁 Archivo (logs/app_YYYYMMDD.log)
-        file_handler = logging.FileHandler(log_file, encoding="utf-8")
-        file_handler.setLevel(log_level)
-        file_format = logging.Formatter(
-            "[%(asctime)s] [%(levelname)s] [%(name)s]: %(message)s",
-            "%Y-%m-%d %H:%M:%S"
-        )
-        file_handler.setFormatter(file_format)
-
-        logger.addHandler(console_handler)
-        logger.addHandler(file_handler)
+        logger.addHandler(_queue_handler)
 
         # 🧩 Evitar propagación a root (doble impresión en consola)
         logger.propagate = False
@@ -57,4 +139,4 @@ if __name__ == "__main__":
         1 / 0
     except Exception as e:
         # El parámetro exc_info=True muestra el stack completo en el log
-        log.error(f"❌ Error de prueba: {e}", exc_info=True)
+        log.error("❌ Error de prueba: %s", e, exc_info=True)
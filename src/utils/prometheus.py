@@ -0,0 +1,183 @@
+"""
+📈 Métricas en formato de texto de Prometheus (sin dependencias externas).
+
+- Counter / Histogram con etiquetas; los histogramas tienen buckets fijos y observe()
+  solo hace una búsqueda binaria y tres sumas (microsegundos).
+- Gauges calculados al momento del scrape (pool de conexiones, caché, ingesta en curso).
+- MetricsMiddleware (ASGI puro) mide la latencia de cada request por método, ruta
+  (plantilla de FastAPI, p. ej. /api/ingest/jobs/{job_id}) y status.
+"""
+import threading
+import time
+from bisect import bisect_left
+
+# Buckets de latencia HTTP en segundos (5 ms .. 30 s)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+# ============================================================
+#  TIPOS DE MÉTRICA
+# ============================================================
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues, amount: float = 1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for labelvalues, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, labelvalues)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    """Histograma acumulativo con buckets fijos por combinación de etiquetas."""
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                # Conteos por bucket (el último es +Inf), suma y total
+                series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = [(labels, list(s[0]), s[1], s[2]) for labels, s in sorted(self._series.items())]
+        for labelvalues, counts, total, count in snapshot:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = 'le="' + _number(bound) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labelvalues, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labelvalues)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labelvalues)} {count}")
+        return lines
+
+
+class CallbackMetric:
+    """Gauge o counter cuyo valor se lee al hacer scrape: fn() -> [(valores_de_etiquetas, valor)]."""
+
+    def __init__(self, name: str, documentation: str, fn, labelnames=(), kind: str = "gauge"):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.kind = kind
+        self.fn = fn
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for labelvalues, value in self.fn():
+            lines.append(f"{self.name}{_labels(self.labelnames, labelvalues)} {_number(value)}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# ============================================================
+#  MÉTRICAS DE LA APLICACIÓN
+# ============================================================
+
+HTTP_REQUEST_DURATION = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "Latencia de las requests HTTP por ruta.", ("method", "route", "status"),
+))
+
+INGEST_ROWS = REGISTRY.register(Counter(
+    "ingest_rows_total",
+    "Filas procesadas por la ingesta por tabla y resultado (inserted, updated, duplicate, invalid, rejected_fk).",
+    ("table", "outcome"),
+))
+
+
+def record_ingest(table: str, summary: dict):
+    """Suma el resumen de una carga a los contadores de filas por tabla."""
+    for outcome, key in (
+        ("inserted", "inserted"), ("updated", "updated"), ("duplicate", "duplicates"),
+        ("invalid", "invalid_rows"), ("rejected_fk", "rejected_fk"),
+    ):
+        if summary.get(key):
+            INGEST_ROWS.inc(table, outcome, amount=int(summary[key]))
+
+# ============================================================
+#  MIDDLEWARE ASGI
+# ============================================================
+
+class MetricsMiddleware:
+    """Mide la latencia de cada request HTTP (hasta el último byte de la respuesta)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # Plantilla de la ruta (FastAPI la deja en el scope); acota la cardinalidad de etiquetas
+            route = getattr(scope.get("route"), "path", "unmatched")
+            HTTP_REQUEST_DURATION.observe(time.perf_counter() - started, scope["method"], route, status)
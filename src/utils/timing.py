@@ -0,0 +1,205 @@
+"""
+⏱️ Cronómetros por etapa de la ingesta y profiling opcional.
+
+    with track_ingest("insert_batch", table="jobs") as timings:
+        with stage("read_csv") as s:
+            df = pd.read_csv(...)
+            s.rows = len(df)
+        summary["timings"] = timings.as_dict()
+
+Las etapas se registran en un ContextVar, así que las funciones internas llaman a
+stage() sin recibir el cronómetro (fuera de track_ingest no hacen nada). Las etapas
+repetidas (chunks del streaming) se acumulan. El delta de RSS es el crecimiento del
+pico de memoria del proceso durante la etapa (ru_maxrss; incluye a otros hilos).
+
+Profiling: INGEST_PROFILE=cprofile|pyinstrument (con INGEST_PROFILE_SAMPLE_RATE de
+las cargas) o el header X-Ingest-Profile por request. El perfil se guarda en logs/profiles/.
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from src.utils.logger import get_logger
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+logger = get_logger(__name__)
+
+INGEST_PROFILE = os.getenv("INGEST_PROFILE", "").lower()
+INGEST_PROFILE_SAMPLE_RATE = float(os.getenv("INGEST_PROFILE_SAMPLE_RATE", "1"))
+PROFILE_DIR = "logs/profiles"
+PROFILERS = ("cprofile", "pyinstrument")
+PROFILE_TOP_FUNCTIONS = 15
+
+_current = ContextVar("ingest_timings", default=None)
+
+
+def _peak_rss_mb() -> float:
+    if resource is None:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa KB y macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+# ============================================================
+#  CRONÓMETROS POR ETAPA
+# ============================================================
+
+class StageTimings:
+    """Tiempo, filas y delta de memoria pico acumulados por etapa (en orden de aparición)."""
+
+    def __init__(self):
+        self._started = time.perf_counter()
+        self.stages = {}
+
+    def add(self, name: str, seconds: float, rows, rss_delta_mb: float):
+        entry = self.stages.setdefault(name, {"seconds": 0.0, "rows": None, "calls": 0, "peak_rss_delta_mb": 0.0})
+        entry["seconds"] += seconds
+        entry["calls"] += 1
+        if rows is not None:
+            entry["rows"] = (entry["rows"] or 0) + int(rows)
+        entry["peak_rss_delta_mb"] += rss_delta_mb
+
+    def as_dict(self) -> dict:
+        stages = {}
+        for name, entry in self.stages.items():
+            seconds, rows = entry["seconds"], entry["rows"]
+            stages[name] = {
+                "seconds": round(seconds, 4),
+                "rows": rows,
+                "rows_per_s": round(rows / seconds) if rows and seconds > 0 else None,
+                "calls": entry["calls"],
+                "peak_rss_delta_mb": round(entry["peak_rss_delta_mb"], 2),
+            }
+        return {"total_seconds": round(time.perf_counter() - self._started, 4), "stages": stages}
+
+
+class _Stage:
+    def __init__(self, rows=None):
+        self.rows = rows
+
+
+@contextmanager
+def stage(name: str, rows=None):
+    """Mide una etapa del track_ingest activo; `rows` se puede fijar después con `as s: s.rows = n`."""
+    timings = _current.get()
+    record = _Stage(rows)
+    if timings is None:
+        yield record
+        return
+    rss_before = _peak_rss_mb()
+    started = time.perf_counter()
+    try:
+        yield record
+    finally:
+        timings.add(name, time.perf_counter() - started, record.rows, _peak_rss_mb() - rss_before)
+
+
+@contextmanager
+def track_ingest(operation: str, **fields):
+    """Activa los cronómetros para el bloque y emite una línea de log estructurada al terminar."""
+    timings = StageTimings()
+    token = _current.set(timings)
+    status = "error"
+    try:
+        yield timings
+        status = "ok"
+    finally:
+        _current.reset(token)
+        record = {"operation": operation, **fields, "status": status, **timings.as_dict()}
+        logger.info("⏱️ ingest_timings %s", json.dumps(record, default=str))
+
+# ============================================================
+#  PROFILING OPCIONAL (cProfile / pyinstrument)
+# ============================================================
+
+_profile_lock = threading.Lock()
+
+
+def profiler_for(header_value: str = None):
+    """
+    Profiler a usar en una carga: el header X-Ingest-Profile (1/true/cprofile/pyinstrument)
+    manda; si no viene, INGEST_PROFILE con muestreo INGEST_PROFILE_SAMPLE_RATE. None = sin profiling.
+    """
+    if header_value:
+        mode = header_value.lower()
+        mode = "cprofile" if mode in ("1", "true", "yes") else mode
+        return mode if mode in PROFILERS else None
+    if INGEST_PROFILE in PROFILERS and random.random() < INGEST_PROFILE_SAMPLE_RATE:
+        return INGEST_PROFILE
+    return None
+
+
+def _top_functions(profiler: cProfile.Profile) -> list:
+    """Funciones con mayor tiempo acumulado (para el resumen; el perfil completo queda en el .prof)."""
+    stats = pstats.Stats(profiler, stream=io.StringIO())
+    top = [
+        {"function": f"{os.path.basename(filename)}:{line}({function})", "calls": calls, "cumulative_s": round(cumulative, 4)}
+        for (filename, line, function), (_, calls, _, cumulative, _) in stats.stats.items()
+    ]
+    return sorted(top, key=lambda f: f["cumulative_s"], reverse=True)[:PROFILE_TOP_FUNCTIONS]
+
+
+def run_profiled(mode: str, name: str, fn, *args, **kwargs):
+    """
+    Ejecuta fn con el profiler elegido y guarda el perfil en logs/profiles/.
+    Devuelve (resultado, info del perfil). Un solo perfil a la vez por proceso: si ya hay
+    uno en curso, la carga corre sin profiling.
+    """
+    if not _profile_lock.acquire(blocking=False):
+        logger.warning("⏱️ Profiling omitido: ya hay otra carga perfilándose")
+        return fn(*args, **kwargs), {"profiler": None, "skipped": "profiling en curso"}
+
+    try:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        base = os.path.join(PROFILE_DIR, f"{name}_{datetime.now():%Y%m%d_%H%M%S_%f}")
+
+        if mode == "pyinstrument":
+            try:
+                from pyinstrument import Profiler
+            except ImportError:
+                logger.warning("⏱️ pyinstrument no está instalado; se usa cProfile")
+                mode = "cprofile"
+            else:
+                profiler = Profiler()
+                profiler.start()
+                try:
+                    result = fn(*args, **kwargs)
+                finally:
+                    profiler.stop()
+                    with open(f"{base}.html", "w", encoding="utf-8") as f:
+                        f.write(profiler.output_html())
+                return result, {"profiler": mode, "path": f"{base}.html"}
+
+        profiler = cProfile.Profile()
+        try:
+            result = profiler.runcall(fn, *args, **kwargs)
+        finally:
+            profiler.dump_stats(f"{base}.prof")
+        logger.info("⏱️ Perfil de %s guardado en %s.prof", name, base)
+        return result, {"profiler": mode, "path": f"{base}.prof", "top": _top_functions(profiler)}
+    finally:
+        _profile_lock.release()
+
+
+def profiled(mode: str, name: str, fn):
+    """Envuelve una función de ingesta: sin `mode` la devuelve igual; si no, agrega summary['profile']."""
+    if not mode:
+        return fn
+
+    def run(*args, **kwargs):
+        result, info = run_profiled(mode, name, fn, *args, **kwargs)
+        result["summary"]["profile"] = info
+        return result
+    return run